@@ -1,19 +1,37 @@
 """Aplicación principal para el análisis de tarifas de energía."""
 
 import streamlit as st
-import pandas as pd
+import numpy as np
+import time
 import warnings
 from pathlib import Path
-import io
 
 from config.constants import PAGE_CONFIG, INITIAL_SESSION_STATE
+from config.settings import AZURE_CONFIG, DATA_CONFIG
 from config.styles import CUSTOM_CSS
 from auth.azure_auth import AzureAuth
 from auth.sharepoint import SharePointClient
-from utils.data_processing import cargar_tabla_desde_excel, procesar_df_tarifas
-from utils.comparison import comparar_cu, calcular_promedios_periodo, filtrar_resultados_por_periodo
-from utils.visualization import crear_grafico_comparacion, crear_grafico_comparacion_multiple
-from utils.savings_analysis import calcular_ahorro_energia, mostrar_analisis_ahorro
+from auth.app_token import proveedor_token_aplicacion
+from core.comparison import calcular_promedios_periodo, filtrar_resultados_por_periodo
+from core.period_index import IndicePeriodos
+from core.excel_export import generar_excel_comparacion, generar_excel_consolidado, tabla_promedios
+from utils.comparison import comparar_cu_multiple
+from utils.visualization import ClaveGrafico, obtener_grafico_comparacion_multiple
+from utils.savings_analysis import (
+    calcular_ahorro_energia, mostrar_analisis_ahorro, calcular_cubo_ahorro, mostrar_cubo_ahorro
+)
+from utils.competitiveness import calcular_matriz_competitividad
+from utils.portfolio import analizar_cartera, descartar_resultado_cartera, mostrar_resultado_cartera
+from utils.excel_export import ClaveExportacion, boton_descarga_excel, firma_cubo_ahorro
+from utils.dataset_cache import cache_dataset, version_desde_metadatos
+from utils.background_load import gestor_cargas, mostrar_progreso_carga
+from utils.prefetch import ESTADO_ERROR, iniciar_precarga
+from utils.result_cache import cache_resultados
+from utils.latency import medir_latencia, mostrar_latencia, registrar_latencia
+from utils.streamlit_adapter import mostrar_resultado
+
+# Inicio de la ejecución completa (las reejecuciones de fragmentos se miden por separado)
+inicio_ejecucion = time.perf_counter()
 
 # Ignorar advertencias
 warnings.filterwarnings('ignore')
@@ -44,6 +62,7 @@ def reset_comparacion():
     st.session_state['df_resultado'] = None
     st.session_state['df_resultado_filtrado'] = None
     st.session_state['resultados_comparacion'] = {}
+    st.session_state['indices_periodos'] = {}
     st.session_state['comercializador_activo'] = None
     st.session_state['parametros_comparacion'] = {}
     st.session_state['mensajes_analisis'] = {}
@@ -53,6 +72,7 @@ def reset_comparacion():
     st.session_state['resultados_ahorro'] = None
     st.session_state['consumo_promedio_kwh'] = None
     st.session_state['comercializador_ahorro'] = None
+    st.session_state['cubo_ahorro'] = None
     if 'comercializador_ahorro_anterior' in st.session_state:
         del st.session_state['comercializador_ahorro_anterior']
     # Limpiar flag de error de carga
@@ -64,6 +84,19 @@ def reset_comparacion():
     if 'periodo_fin_selector' in st.session_state:
         del st.session_state['periodo_fin_selector']
 
+@st.fragment(run_every=DATA_CONFIG['intervalo_sondeo_carga'])
+def fragmento_progreso_carga(trabajo):
+    """Muestra el progreso de la carga en segundo plano y recarga la página cuando termina."""
+    if trabajo.terminado.is_set():
+        # La sesión que vio fallar la carga no la reinicia hasta que se pida reintentar
+        if trabajo.fallido:
+            st.session_state['error_carga'] = True
+        st.rerun()
+    mostrar_progreso_carga(trabajo.estado())
+
+# Precarga programada del archivo de tarifas (una sola vez por proceso, ver PRECARGA_CONFIG)
+programador_precarga = iniciar_precarga(proveedor_token_aplicacion)
+
 # --- AUTENTICACIÓN AZURE AD ---
 azure_auth = AzureAuth()
 token = azure_auth.get_token()
@@ -97,6 +130,7 @@ with st.sidebar:
     5. Visualice los resultados y gráfico de comparación
     6. Exporte los resultados en Excel si lo desea
     7. **Análisis de Ahorro**: Ingrese el consumo promedio del cliente para calcular el ahorro total
+    8. **Tabla de Ahorro por Consumo**: Compare el ahorro frente a todos los comercializadores para un rango de consumos y ventanas
     
     ### Notas
     - El archivo exportado contiene los periodos resultantes de la comparación
@@ -147,82 +181,639 @@ if not st.session_state['archivo_cargado']:
                     del st.session_state['error_carga']
                 st.rerun()
     
-    with st.spinner('Descargando archivo desde SharePoint y procesando datos...'):
-        archivo_bytes = sharepoint_client.download_file()
+    # Los metadatos validan el acceso del usuario e identifican la versión del archivo
+    with st.spinner('Consultando el archivo en SharePoint...'):
+        metadatos = sharepoint_client.get_file_metadata()
+    
+    if metadatos:
+        version = version_desde_metadatos(metadatos)
+        entrada = cache_dataset.actual()
+        if entrada is None or entrada.version != version:
+            # La carga corre en un hilo de fondo; las sesiones que llegan mientras
+            # tanto se unen al mismo trabajo. Tras un error, solo se reintenta a pedido.
+            # Con el token de aplicación, la descarga compartida no depende del token del usuario
+            # La descarga corre fuera del hilo del script: el cliente no usa Streamlit
+            # y el error se muestra desde la sesión con el resultado del trabajo
+            cliente_descarga = (
+                SharePointClient(proveedor_token=proveedor_token_aplicacion, mostrar_errores=False)
+                if AZURE_CONFIG['descarga_con_token_aplicacion'] else SharePointClient(token, mostrar_errores=False)
+            )
+            trabajo = gestor_cargas.iniciar(
+                version, metadatos, cliente_descarga,
+                reiniciar_fallido=not st.session_state.get('error_carga')
+            )
+            if not trabajo.terminado.is_set():
+                fragmento_progreso_carga(trabajo)
+                st.stop()
+            entrada = mostrar_resultado(trabajo.resultado(), st.success)
         
-        if archivo_bytes:
-            archivo_stream = io.BytesIO(archivo_bytes)
-            df = cargar_tabla_desde_excel(archivo_stream)
-            
-            if df is not None:
-                with st.spinner('Aplicando transformaciones a los datos...'):
-                    df_procesado = procesar_df_tarifas(df)
-                    
-                    if df_procesado is not None:
-                        st.session_state['df_tarifas'] = df_procesado
-                        st.session_state['archivo_cargado'] = True
-                        # Limpiar flag de error si existe
-                        if 'error_carga' in st.session_state:
-                            del st.session_state['error_carga']
-                        st.rerun()
+        if entrada is not None:
+            st.session_state['df_tarifas'] = entrada.df_tarifas
+            st.session_state['version_datos'] = entrada.version
+            st.session_state['indice_grupos'] = entrada.indice_grupos
+            st.session_state['catalogo'] = entrada.catalogo
+            st.session_state['matriz_competitividad'] = entrada.matriz_competitividad
+            st.session_state['archivo_cargado'] = True
+            # Limpiar flag de error si existe
+            if 'error_carga' in st.session_state:
+                del st.session_state['error_carga']
+            st.rerun()
         else:
-            # Marcar que hubo un error de carga
             st.session_state['error_carga'] = True
-            
-            # El error ya fue manejado en SharePointClient._handle_error()
-            # Mostramos información adicional y opciones para el usuario
-            st.markdown("---")
-            st.markdown("""
-            ### 📋 **Resumen del Problema**
-            La aplicación no pudo acceder al archivo de tarifas debido a permisos insuficientes.
-            
-            ### 🎯 **Acciones Recomendadas**
-            1. **Contacta al Analista de Ventas** para solicitar acceso
-            2. **Espera la autorización** del administrador
-            3. **Usa el botón "Reintentar Carga"** una vez autorizado
-            """)
-            
-            # Botón de reintento más prominente
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                st.button("🔄 Reintentar Carga", type="primary", key="reintentar_carga_2")
-            
-            st.stop()
+            if not mostrar_boton_reintento:
+                col1, col2, col3 = st.columns([1, 2, 1])
+                with col2:
+                    st.button("🔄 Reintentar Carga", type="primary", key="reintentar_carga_2")
+    else:
+        # Marcar que hubo un error de carga
+        st.session_state['error_carga'] = True
+        
+        # El error ya fue manejado en SharePointClient._handle_error()
+        # Mostramos información adicional y opciones para el usuario
+        st.markdown("---")
+        st.markdown("""
+        ### 📋 **Resumen del Problema**
+        La aplicación no pudo acceder al archivo de tarifas debido a permisos insuficientes.
+        
+        ### 🎯 **Acciones Recomendadas**
+        1. **Contacta al Analista de Ventas** para solicitar acceso
+        2. **Espera la autorización** del administrador
+        3. **Usa el botón "Reintentar Carga"** una vez autorizado
+        """)
+        
+        # Botón de reintento más prominente
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            st.button("🔄 Reintentar Carga", type="primary", key="reintentar_carga_2")
+        
+        st.stop()
 else:
-    # Mostrar resumen de datos del archivo cargado
-    df_procesado = st.session_state['df_tarifas']
+    # Mostrar resumen de datos del archivo cargado (precalculado en el catálogo)
+    catalogo = st.session_state['catalogo']
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Registros", len(df_procesado))
+        st.metric("Total Registros", catalogo.total_registros)
     with col2:
-        st.metric("Mercados", df_procesado['MERCADO'].nunique())
+        st.metric("Mercados", catalogo.num_mercados)
     with col3:
-        st.metric("Comercializadores", df_procesado['COMERCIALIZADOR'].nunique())
+        st.metric("Comercializadores", catalogo.num_comercializadores)
     with col4:
-        st.metric("Niveles de Tensión", df_procesado['NT'].nunique())
+        st.metric("Niveles de Tensión", catalogo.num_niveles_tension)
+    
+    entrada_actual = cache_dataset.actual()
+    if entrada_actual is not None and entrada_actual.version != st.session_state['version_datos']:
+        # La precarga programada publicó una versión más reciente del archivo
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.info("🆕 Hay una versión más reciente del archivo de tarifas.")
+        with col2:
+            if st.button("🔄 Usar datos actualizados", key="actualizar_datos_btn"):
+                reset_comparacion()
+                st.session_state['archivo_cargado'] = False
+                st.rerun()
+    
+    if programador_precarga is not None:
+        # El hilo de precarga no usa Streamlit: su último error se muestra desde la sesión
+        estado_precarga = programador_precarga.estado()
+        if estado_precarga['ultimo_resultado'] == ESTADO_ERROR and estado_precarga['ultimo_error']:
+            st.caption(f"⚠️ Falló la última revisión programada del archivo: {estado_precarga['ultimo_error']}")
+    
+    if entrada_actual is not None and 'reporte_memoria' in entrada_actual.metadatos:
+        reporte = entrada_actual.metadatos['reporte_memoria']
+        st.caption(
+            f"💾 Esquema compacto: {reporte['bytes_compacto'] / 1024 / 1024:,.1f} MB en memoria "
+            f"(ahorro de {reporte['ahorro_bytes'] / 1024 / 1024:,.1f} MB, {reporte['ahorro_porcentual']:.0f}%)"
+        )
+    
+    estadisticas_cache = cache_resultados.estadisticas()
+    if estadisticas_cache['aciertos'] or estadisticas_cache['fallos']:
+        st.caption(
+            f"⚡ Caché de comparaciones: {estadisticas_cache['entradas']} resultados "
+            f"({estadisticas_cache['bytes'] / 1024 / 1024:,.1f} MB), "
+            f"{estadisticas_cache['aciertos']} aciertos / {estadisticas_cache['fallos']} fallos "
+            f"({estadisticas_cache['tasa_aciertos']:.0f}%)"
+        )
     
     # Vista previa de datos
     st.subheader("Vista previa de datos")
     st.caption("Mostrando las últimas 5 filas de los datos cargados (orden descendente)")
     st.dataframe(
-        df_procesado.sort_values('FECHA', ascending=False).head(5),
+        catalogo.vista_previa,
         use_container_width=True,
         hide_index=True
     )
 
+# --- FRAGMENTOS DE LA SECCIÓN DE RESULTADOS ---
+# Cada fragmento se reejecuta solo (con los fragmentos que contiene) cuando cambia uno de sus widgets;
+# la barra lateral, la carga de archivo y el formulario de comparación no se vuelven a ejecutar.
+
+@st.fragment
+def fragmento_exportacion(todos_promedios):
+    """Descargas Excel bajo demanda del rango de periodos seleccionado."""
+    with medir_latencia('exportacion'):
+        indices_periodos = st.session_state['indices_periodos']
+
+        # Descargar archivos para cada comercializador (se generan solo al pedirlos)
+        st.subheader("📥 Descargar Resultados")
+
+        parametros = st.session_state['parametros_comparacion']
+        periodo_inicio_sel = st.session_state['slider_periodo_inicio']
+        periodo_fin_sel = st.session_state['slider_periodo_fin']
+        version_datos = st.session_state['version_datos']
+
+        def filtrar_com(com):
+            return filtrar_resultados_por_periodo(
+                st.session_state['resultados_comparacion'][com],
+                periodo_inicio_sel,
+                periodo_fin_sel,
+                indice_periodos=indices_periodos.get(com)
+            )
+
+        def clave_exportacion(comercializadores, tabla_ahorro=None):
+            if version_datos is None:
+                return None
+            return ClaveExportacion(
+                version_datos, parametros['mercado'], parametros['nt'], tuple(comercializadores),
+                parametros['periodo_inicio'], parametros['periodo_fin'],
+                periodo_inicio_sel, periodo_fin_sel, tabla_ahorro
+            )
+
+        for com in parametros['comercializadores']:
+            if com in st.session_state['resultados_comparacion']:
+                boton_descarga_excel(
+                    clave_exportacion([com]),
+                    lambda com=com: generar_excel_comparacion(filtrar_com(com)),
+                    etiqueta=com,
+                    nombre_archivo=f"comparacion_cu_{parametros['mercado']}_{com}_{parametros['nt']}_{periodo_inicio_sel}_{periodo_fin_sel}.xlsx",
+                    key=com,
+                    ayuda=f"Resultados de la comparación con {com} para el periodo {periodo_inicio_sel} a {periodo_fin_sel}"
+                )
+
+        # Libro único: resumen (promedios y tabla de ahorro) y una hoja por comercializador
+        comercializadores_libro = [
+            com for com in parametros['comercializadores'] if com in st.session_state['resultados_comparacion']
+        ]
+        if len(comercializadores_libro) > 1:
+            cubo = st.session_state.get('cubo_ahorro')
+            boton_descarga_excel(
+                clave_exportacion(comercializadores_libro, firma_cubo_ahorro(cubo)),
+                lambda: generar_excel_consolidado(
+                    {com: filtrar_com(com) for com in comercializadores_libro},
+                    tabla_promedios(
+                        todos_promedios, parametros['mercado'], parametros['nt'], periodo_inicio_sel, periodo_fin_sel
+                    ),
+                    cubo.tabla_larga() if cubo is not None else None
+                ),
+                etiqueta="libro con todos los comercializadores",
+                nombre_archivo=f"comparacion_cu_{parametros['mercado']}_{parametros['nt']}_{periodo_inicio_sel}_{periodo_fin_sel}.xlsx",
+                key='consolidado',
+                ayuda="Un solo libro con una hoja de resumen y una hoja por comercializador"
+            )
+    mostrar_latencia('exportacion', 'Exportación')
+
+
+@st.fragment
+def fragmento_ahorro():
+    """Sección 3: análisis de ahorro y tabla de ahorro por consumo."""
+    with medir_latencia('ahorro'):
+        # --- SECCIÓN 3: ANÁLISIS DE AHORRO ---
+        st.markdown("---")
+        st.header("3️⃣ Análisis de Ahorro")
+
+        st.info("""
+        **💡 ¿Qué hace esta sección?**
+
+        Calcula el **ahorro económico real** que tendría un cliente si cambia de su comercializador actual a RUITOQUE, 
+        basándose en su consumo promedio mensual y los precios del periodo seleccionado.
+
+        **📊 Fórmula del Ahorro:**
+        ```
+        Ahorro Total = Σ(CU_mes_n_COMERCIALIZADOR × Consumo_Promedio) - Σ(CU_mes_n_RUITOQUE × Consumo_Promedio)
+        ```
+        """)
+
+        # Selector de comercializador y inputs para análisis de ahorro
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            # Selector de comercializador para el análisis de ahorro
+            comercializadores_disponibles = st.session_state['parametros_comparacion']['comercializadores']
+
+            # Determinar el índice por defecto
+            if st.session_state.get('comercializador_ahorro') in comercializadores_disponibles:
+                default_index = comercializadores_disponibles.index(st.session_state['comercializador_ahorro'])
+            else:
+                default_index = 0
+
+            comercializador_ahorro = st.selectbox(
+                'Comercializador:',
+                options=comercializadores_disponibles,
+                key='selector_comercializador_ahorro',
+                index=default_index,
+                help="Seleccione el comercializador para calcular el análisis de ahorro"
+            )
+            # Guardar el comercializador seleccionado
+            comercializador_anterior = st.session_state.get('comercializador_ahorro')
+            st.session_state['comercializador_ahorro'] = comercializador_ahorro
+
+            # Si cambió el comercializador, limpiar resultados previos
+            if comercializador_anterior and comercializador_anterior != comercializador_ahorro:
+                st.session_state['mostrar_analisis_ahorro'] = False
+                st.session_state['resultados_ahorro'] = None
+
+        with col2:
+            consumo_promedio = st.number_input(
+                'Consumo promedio mensual del cliente (kWh):',
+                min_value=1.0,
+                max_value=1000000.0,
+                value=st.session_state.get('consumo_promedio_kwh', 1000.0),
+                step=100.0,
+                help="Ingrese el consumo promedio mensual en kilowatt-hora del cliente"
+            )
+            st.session_state['consumo_promedio_kwh'] = consumo_promedio
+
+        with col3:
+            st.markdown("")
+            st.markdown("")
+            if st.button('💰 Calcular Ahorro', type='primary', key='calcular_ahorro_btn'):
+                # Obtener el DataFrame del comercializador seleccionado
+                if comercializador_ahorro in st.session_state['resultados_comparacion']:
+                    df_resultado_ahorro = st.session_state['resultados_comparacion'][comercializador_ahorro]
+
+                    with st.spinner('Calculando análisis de ahorro...'):
+                        resultados_ahorro = calcular_ahorro_energia(
+                            df_resultado_ahorro,
+                            st.session_state['slider_periodo_inicio'],
+                            st.session_state['slider_periodo_fin'],
+                            consumo_promedio
+                        )
+
+                        if resultados_ahorro:
+                            st.session_state['resultados_ahorro'] = resultados_ahorro
+                            st.session_state['mostrar_analisis_ahorro'] = True
+                            st.success("✅ Análisis de ahorro calculado exitosamente")
+                        else:
+                            st.error("❌ No se pudo calcular el análisis de ahorro. Verifique los datos.")
+                else:
+                    st.error(f"❌ No hay datos disponibles para {comercializador_ahorro}")
+
+        with col4:
+            st.markdown("")
+            st.markdown("")
+            if st.button('🔄 Reiniciar Análisis', key='reiniciar_ahorro_btn'):
+                st.session_state['mostrar_analisis_ahorro'] = False
+                st.session_state['resultados_ahorro'] = None
+
+        # Mostrar resultados del análisis de ahorro si están disponibles
+        if st.session_state.get('mostrar_analisis_ahorro') and st.session_state.get('resultados_ahorro'):
+            mostrar_analisis_ahorro(st.session_state['resultados_ahorro'])
+
+        # Tabla de ahorro para muchos consumos, todos los comercializadores y varias ventanas
+        st.subheader("🌡️ Tabla de Ahorro por Consumo")
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            consumo_minimo = st.number_input(
+                'Consumo mínimo (kWh/mes):', min_value=1.0, max_value=1000000.0, value=100.0, step=100.0,
+                key='cubo_consumo_minimo'
+            )
+        with col2:
+            consumo_maximo = st.number_input(
+                'Consumo máximo (kWh/mes):', min_value=1.0, max_value=1000000.0, value=50000.0, step=1000.0,
+                key='cubo_consumo_maximo'
+            )
+        with col3:
+            puntos_consumo = st.number_input(
+                'Número de consumos:', min_value=2, max_value=10000, value=50, step=10,
+                key='cubo_puntos_consumo'
+            )
+        with col4:
+            ventanas_ahorro = st.multiselect(
+                'Ventanas (meses):', options=[3, 6, 12, 24, 36], default=[6, 12, 24],
+                key='cubo_ventanas'
+            )
+
+        if st.button('🌡️ Calcular Tabla de Ahorro', key='calcular_cubo_ahorro_btn'):
+            if consumo_minimo > consumo_maximo:
+                st.error("❌ El consumo mínimo no puede ser mayor que el consumo máximo")
+            elif not ventanas_ahorro:
+                st.error("❌ Seleccione al menos una ventana")
+            else:
+                consumos = np.unique(np.round(np.linspace(consumo_minimo, consumo_maximo, int(puntos_consumo))))
+                st.session_state['cubo_ahorro'] = calcular_cubo_ahorro(
+                    st.session_state['resultados_comparacion'],
+                    consumos,
+                    ventanas_ahorro,
+                    periodo_fin=st.session_state['slider_periodo_fin'],
+                    indices_periodos=st.session_state['indices_periodos']
+                )
+                # El libro consolidado de la exportación incluye la tabla de ahorro
+                st.rerun()
+
+        if st.session_state.get('cubo_ahorro') is not None:
+            mostrar_cubo_ahorro(st.session_state['cubo_ahorro'])
+    mostrar_latencia('ahorro', 'Análisis de ahorro')
+
+
+@st.fragment
+def fragmento_periodos():
+    """Rango de periodos, promedios y gráfico (contiene la exportación y el análisis de ahorro)."""
+    with medir_latencia('periodos'):
+        # Índices de periodos por comercializador (búsqueda binaria y sumas acumuladas)
+        indices_periodos = st.session_state['indices_periodos']
+        indice_activo = indices_periodos[st.session_state['comercializador_activo']]
+
+        # Obtener fechas disponibles para el slider
+        fechas_disponibles = indice_activo.periodos
+
+        # Verificar que tenemos fechas válidas antes de continuar
+        if not fechas_disponibles:
+            st.error("❌ No hay fechas disponibles para mostrar en el slider")
+            st.stop()
+
+        # Inicializar valores del slider si no existen o si no están en las fechas disponibles
+        if (st.session_state['slider_periodo_inicio'] is None or 
+            st.session_state['slider_periodo_inicio'] not in fechas_disponibles):
+            st.session_state['slider_periodo_inicio'] = fechas_disponibles[0]
+
+        if (st.session_state['slider_periodo_fin'] is None or 
+            st.session_state['slider_periodo_fin'] not in fechas_disponibles):
+            st.session_state['slider_periodo_fin'] = fechas_disponibles[-1]
+
+        # Slider para seleccionar rango de periodos
+        st.subheader("🎛️ Ajustar Rango de Periodos")
+
+        # Slider de rango con periodos como opciones
+        slider_range = st.select_slider(
+            'Seleccionar rango de periodos:',
+            options=fechas_disponibles,
+            value=(st.session_state['slider_periodo_inicio'], st.session_state['slider_periodo_fin']),
+            key='periodo_slider'
+        )
+
+        # Extraer fechas del slider
+        slider_inicio = slider_range[0]
+        slider_fin = slider_range[1]
+
+        # Mostrar información del rango seleccionado
+        st.caption(f"📅 Periodo seleccionado: {slider_inicio} a {slider_fin} ({indice_activo.contar(slider_inicio, slider_fin)} periodos)")
+
+        # Actualizar valores del slider
+        st.session_state['slider_periodo_inicio'] = slider_inicio
+        st.session_state['slider_periodo_fin'] = slider_fin
+
+        # Calcular promedios para todos los comercializadores
+        st.subheader("📊 Promedios del Periodo Seleccionado")
+
+        # Calcular promedios para cada comercializador
+        todos_promedios = {}
+        for com in st.session_state['parametros_comparacion']['comercializadores']:
+            if com in st.session_state['resultados_comparacion']:
+                df_com = st.session_state['resultados_comparacion'][com]
+                promedios = calcular_promedios_periodo(
+                    df_com, 
+                    st.session_state['slider_periodo_inicio'], 
+                    st.session_state['slider_periodo_fin'],
+                    indice_periodos=indices_periodos.get(com)
+                )
+                todos_promedios[com] = promedios
+
+        # Mostrar una fila por cada comercializador
+        for idx, com in enumerate(st.session_state['parametros_comparacion']['comercializadores']):
+            if com in todos_promedios:
+                promedios = todos_promedios[com]
+                st.markdown(f"**{com}**")
+                col1, col2, col3, col4 = st.columns(4)
+
+                with col1:
+                    st.metric(
+                        f"Promedio RUITOQUE", 
+                        f"${promedios['promedio_rtq']:,.2f}",
+                        help="Promedio del Costo Unitario de RUITOQUE en el periodo seleccionado"
+                    )
+
+                with col2:
+                    st.metric(
+                        f"Promedio {promedios['comercializador']}", 
+                        f"${promedios['promedio_competidor']:,.2f}",
+                        help=f"Promedio del Costo Unitario de {promedios['comercializador']} en el periodo seleccionado"
+                    )
+
+                with col3:
+                    # Lógica de colores:
+                    # - diferencia_absoluta > 0: RUITOQUE es más barato → porcentaje positivo → verde ("normal")
+                    # - diferencia_absoluta < 0: RUITOQUE es más caro → porcentaje negativo → rojo ("normal" muestra rojo para negativos)
+                    # Streamlit: "normal" = verde para positivos, rojo para negativos
+                    #           "inverse" = rojo para positivos, verde para negativos
+                    # Como queremos: verde cuando RUITOQUE es mejor, rojo cuando es peor
+                    # y el signo del porcentaje coincide con esto, usamos "normal"
+                    diferencia_color = "normal"
+
+                    st.metric(
+                        "Diferencia Absoluta", 
+                        f"${promedios['diferencia_absoluta']:,.2f}",
+                        delta=f"{promedios['diferencia_porcentual']:+.2f}%",
+                        delta_color=diferencia_color,
+                        help="Diferencia absoluta y porcentual entre promedios (positivo = RUITOQUE más competitivo, negativo = RUITOQUE menos competitivo)"
+                    )
+
+                with col4:
+                    st.metric(
+                        "Periodos Analizados", 
+                        f"{promedios['periodos_analizados']}",
+                        help="Número de periodos incluidos en el análisis actual"
+                    )
+
+                if idx < len(st.session_state['parametros_comparacion']['comercializadores']) - 1:
+                    st.markdown("---")
+
+        # Filtrar datos para el gráfico
+        df_filtrado = filtrar_resultados_por_periodo(
+            st.session_state['df_resultado'],
+            st.session_state['slider_periodo_inicio'],
+            st.session_state['slider_periodo_fin'],
+            indice_periodos=indice_activo
+        )
+        st.session_state['df_resultado_filtrado'] = df_filtrado
+
+        # Crear (o reutilizar del caché) y mostrar el gráfico con todos los comercializadores
+        clave_grafico = None
+        if st.session_state['version_datos'] is not None:
+            clave_grafico = ClaveGrafico(
+                st.session_state['version_datos'],
+                st.session_state['parametros_comparacion']['mercado'],
+                st.session_state['parametros_comparacion']['nt'],
+                tuple(st.session_state['resultados_comparacion']),
+                st.session_state['slider_periodo_inicio'],
+                st.session_state['slider_periodo_fin']
+            )
+        fig = obtener_grafico_comparacion_multiple(
+            clave_grafico,
+            st.session_state['resultados_comparacion'],
+            st.session_state['slider_periodo_inicio'],
+            st.session_state['slider_periodo_fin'],
+            indices_periodos=indices_periodos
+        )
+        if fig:
+            st.plotly_chart(fig, use_container_width=True)
+
+        # Botones de acción (después del gráfico)
+        st.markdown("---")
+        col1, col2 = st.columns(2)
+        with col1:
+            fragmento_exportacion(todos_promedios)
+        with col2:
+            if st.button('🔄 Nueva Comparación', key='nueva_comparacion'):
+                reset_comparacion()
+                st.rerun()
+
+        fragmento_ahorro()
+    mostrar_latencia('periodos', 'Rango de periodos')
+
+
+@st.fragment
+def fragmento_resultados():
+    """Comercializador activo, análisis periodo a periodo y resultados detallados."""
+    with medir_latencia('resultados'):
+        # Selector de comercializador activo
+        if len(st.session_state['parametros_comparacion']['comercializadores']) > 1:
+            st.markdown("---")
+            st.subheader("🔀 Seleccionar Comercializador para Visualizar")
+            comercializador_activo = st.selectbox(
+                'Comercializador a visualizar:',
+                options=st.session_state['parametros_comparacion']['comercializadores'],
+                key='selector_comercializador_activo',
+                index=st.session_state['parametros_comparacion']['comercializadores'].index(
+                    st.session_state.get('comercializador_activo', st.session_state['parametros_comparacion']['comercializadores'][0])
+                ) if st.session_state.get('comercializador_activo') in st.session_state['parametros_comparacion']['comercializadores'] else 0
+            )
+            # Verificar si cambió el comercializador activo
+            comercializador_anterior = st.session_state.get('comercializador_activo')
+            st.session_state['comercializador_activo'] = comercializador_activo
+            
+            # Si cambió el comercializador, limpiar el resultado filtrado
+            if comercializador_anterior != comercializador_activo:
+                st.session_state['df_resultado_filtrado'] = None
+            
+            # Actualizar df_resultado con el comercializador activo
+            if comercializador_activo in st.session_state['resultados_comparacion']:
+                st.session_state['df_resultado'] = st.session_state['resultados_comparacion'][comercializador_activo]
+        else:
+            st.session_state['comercializador_activo'] = st.session_state['parametros_comparacion']['comercializadores'][0]
+            # Asegurar que df_resultado esté actualizado
+            if st.session_state['comercializador_activo'] in st.session_state.get('resultados_comparacion', {}):
+                st.session_state['df_resultado'] = st.session_state['resultados_comparacion'][st.session_state['comercializador_activo']]
+
+        # Mostrar mensajes del análisis para el comercializador activo
+        st.subheader("📊 Análisis Periodo a Periodo")
+        comercializador_activo = st.session_state['comercializador_activo']
+        if comercializador_activo in st.session_state.get('mensajes_analisis', {}):
+            for mensaje in st.session_state['mensajes_analisis'][comercializador_activo]:
+                st.write(mensaje)
+
+        # Mostrar resultados
+        if st.session_state['df_resultado'] is not None:
+            st.subheader("📈 Resultados Detallados")
+            st.dataframe(st.session_state['df_resultado'])
+            fragmento_periodos()
+    mostrar_latencia('resultados', 'Comercializador activo')
+
+
+@st.fragment
+def fragmento_matriz_competitividad():
+    """Matriz de competitividad de todos los mercados para una ventana de periodos."""
+    with medir_latencia('matriz'):
+        st.caption(
+            "Compara RUITOQUE contra cada comercializador en cada mercado y nivel de tensión. "
+            "Diferencias positivas indican que RUITOQUE es más barato; haga clic en una columna para ordenar."
+        )
+        matriz_competitividad = st.session_state['matriz_competitividad']
+        periodos_matriz = matriz_competitividad.periodos if matriz_competitividad is not None else []
+        if periodos_matriz:
+            col1, col2 = st.columns(2)
+            with col1:
+                matriz_inicio = st.selectbox(
+                    'Periodo inicial:',
+                    options=periodos_matriz,
+                    index=max(len(periodos_matriz) - 12, 0),
+                    key='matriz_periodo_inicio'
+                )
+            with col2:
+                matriz_fin = st.selectbox(
+                    'Periodo final:',
+                    options=periodos_matriz,
+                    index=len(periodos_matriz) - 1,
+                    key='matriz_periodo_fin'
+                )
+
+            if matriz_inicio > matriz_fin:
+                st.warning("⚠️ El periodo de inicio debe ser menor o igual al periodo final")
+            else:
+                df_matriz = calcular_matriz_competitividad(
+                    st.session_state['df_tarifas'], matriz_inicio, matriz_fin, matriz=matriz_competitividad
+                )
+                if df_matriz is not None and not df_matriz.empty:
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Combinaciones", len(df_matriz))
+                    with col2:
+                        st.metric("RUITOQUE más barato", int((df_matriz['DIF_PROM_CU_$'] > 0).sum()))
+                    with col3:
+                        st.metric("RUITOQUE más caro", int((df_matriz['DIF_PROM_CU_$'] < 0).sum()))
+                    st.dataframe(
+                        df_matriz.sort_values('DIF_PROM_CU_%', ascending=False),
+                        use_container_width=True,
+                        hide_index=True
+                    )
+                else:
+                    st.info("No hay periodos en común con RUITOQUE en el rango seleccionado")
+        else:
+            st.info("No hay datos de RUITOQUE para construir la matriz")
+    mostrar_latencia('matriz', 'Matriz de competitividad')
+
+
+@st.fragment
+def fragmento_cartera():
+    """Análisis de ahorro de una cartera de clientes subida por el usuario."""
+    with medir_latencia('cartera'):
+        st.caption(
+            "Suba un CSV o Excel con una fila por cliente: CLIENTE (opcional), MERCADO, NT, COMERCIALIZADOR "
+            "y una columna por periodo (YYYY-MM) con el consumo en kWh. El ahorro de cada cliente es "
+            "Σ(CU_mes × kWh_mes) del comercializador actual menos el de RUITOQUE, en los periodos con tarifa de ambos."
+        )
+        archivo_cartera = st.file_uploader(
+            'Archivo de cartera:', type=['csv', 'xlsx'], key='archivo_cartera'
+        )
+        if archivo_cartera is not None and st.button('📊 Analizar Cartera', key='analizar_cartera_btn'):
+            if st.session_state['matriz_competitividad'] is None:
+                st.error("❌ No hay datos de RUITOQUE para calcular el ahorro")
+            else:
+                with st.spinner('Analizando cartera...'):
+                    descartar_resultado_cartera(st.session_state['resultado_cartera'])
+                    st.session_state['resultado_cartera'] = analizar_cartera(
+                        archivo_cartera, archivo_cartera.name, st.session_state['matriz_competitividad'],
+                        st.session_state['version_datos']
+                    )
+        if archivo_cartera is None:
+            descartar_resultado_cartera(st.session_state['resultado_cartera'])
+            st.session_state['resultado_cartera'] = None
+        mostrar_resultado_cartera(st.session_state['resultado_cartera'])
+    mostrar_latencia('cartera', 'Cartera')
+
+
 # --- SECCIÓN 2: COMPARACIÓN DE TARIFAS ---
 if st.session_state['archivo_cargado']:
     st.markdown("---")
     st.header("2️⃣ Comparación de Tarifas y Visualización")
     
     df_procesado = st.session_state['df_tarifas']
+    catalogo = st.session_state['catalogo']
     
     if not st.session_state['mostrar_resultados']:
         # Widgets de selección
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            mercados = sorted([m for m in df_procesado['MERCADO'].unique() if pd.notna(m)])
+            mercados = catalogo.mercados
             if mercados:
                 mercado = st.selectbox('Mercado:', options=mercados, key='mercado_selector')
             else:
@@ -231,10 +822,7 @@ if st.session_state['archivo_cargado']:
         
         with col2:
             if mercado:
-                comercializadores = sorted([
-                    c for c in df_procesado[df_procesado['MERCADO']==mercado]['COMERCIALIZADOR'].unique()
-                    if pd.notna(c) and c != "RUITOQUE"
-                ])
+                comercializadores = catalogo.comercializadores(mercado)
                 if comercializadores:
                     comercializador = st.selectbox('Comercializador 1 (Obligatorio):', options=comercializadores, key='comercializador_selector')
                 else:
@@ -247,10 +835,7 @@ if st.session_state['archivo_cargado']:
         with col3:
             if mercado:
                 # Obtener niveles de tensión del mercado (no solo del comercializador)
-                niveles_tension = sorted([
-                    nt for nt in df_procesado[df_procesado['MERCADO']==mercado]['NT'].unique()
-                    if pd.notna(nt)
-                ])
+                niveles_tension = catalogo.niveles_tension(mercado)
                 if niveles_tension:
                     nt = st.selectbox('Nivel de Tensión:', options=niveles_tension, key='nt_selector')
                 else:
@@ -260,53 +845,25 @@ if st.session_state['archivo_cargado']:
                 st.info("Seleccione primero un mercado")
                 nt = None
         
-        # Inicializar variables de comercializadores opcionales
-        comercializador_2 = None
-        comercializador_3 = None
+        # Comercializadores adicionales (sin límite: se comparan en una sola pasada)
+        comercializadores_adicionales = []
         
-        # Selectores de comercializadores opcionales
         if mercado and comercializador and nt:
             st.markdown("---")
             st.subheader("📊 Comercializadores Adicionales (Opcionales)")
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if mercado:
-                    comercializadores_opcionales = sorted([
-                        c for c in df_procesado[df_procesado['MERCADO']==mercado]['COMERCIALIZADOR'].unique()
-                        if pd.notna(c) and c != "RUITOQUE" and c != comercializador
-                    ])
-                    # Agregar opción "Ninguno" al inicio
-                    opciones_com2 = ["Ninguno"] + comercializadores_opcionales
-                    comercializador_2 = st.selectbox(
-                        'Comercializador 2 (Opcional):', 
-                        options=opciones_com2, 
-                        key='comercializador_2_selector',
-                        index=0
-                    )
-                    if comercializador_2 == "Ninguno":
-                        comercializador_2 = None
-            
-            with col2:
-                if mercado:
-                    # Excluir comercializador 1 y comercializador 2 de las opciones
-                    excluir = [comercializador]
-                    if comercializador_2:
-                        excluir.append(comercializador_2)
-                    comercializadores_opcionales_3 = sorted([
-                        c for c in df_procesado[df_procesado['MERCADO']==mercado]['COMERCIALIZADOR'].unique()
-                        if pd.notna(c) and c != "RUITOQUE" and c not in excluir
-                    ])
-                    # Agregar opción "Ninguno" al inicio
-                    opciones_com3 = ["Ninguno"] + comercializadores_opcionales_3
-                    comercializador_3 = st.selectbox(
-                        'Comercializador 3 (Opcional):', 
-                        options=opciones_com3, 
-                        key='comercializador_3_selector',
-                        index=0
-                    )
-                    if comercializador_3 == "Ninguno":
-                        comercializador_3 = None
+            comercializadores_opcionales = catalogo.comercializadores(mercado, excluir=(comercializador,))
+            comparar_todos = st.checkbox(
+                f'Comparar contra todos los comercializadores del mercado ({len(comercializadores_opcionales)})',
+                key='comparar_todos_checkbox'
+            )
+            if comparar_todos:
+                comercializadores_adicionales = comercializadores_opcionales
+            else:
+                comercializadores_adicionales = st.multiselect(
+                    'Comercializadores adicionales:',
+                    options=comercializadores_opcionales,
+                    key='comercializadores_adicionales_selector'
+                )
         
         if mercado and comercializador and nt:
             # Selectores de periodos
@@ -314,13 +871,7 @@ if st.session_state['archivo_cargado']:
             
             # Obtener fechas disponibles solo del comercializador principal (obligatorio)
             # Calcular esto ANTES de las columnas para que esté disponible en ambas
-            fechas_disponibles = sorted(
-                df_procesado[
-                    (df_procesado['MERCADO'] == mercado) & 
-                    (df_procesado['COMERCIALIZADOR'] == comercializador) &
-                    (df_procesado['NT'] == nt)
-                ]['FECHA'].unique()
-            )
+            fechas_disponibles = catalogo.periodos(mercado, comercializador, nt)
             
             col1, col2 = st.columns(2)
             
@@ -370,37 +921,21 @@ if st.session_state['archivo_cargado']:
             if st.button('▶️ Ejecutar Comparación', type='primary', key='ejecutar_btn'):
                 if periodo_inicio and periodo_fin and periodo_inicio <= periodo_fin:
                     # Lista de comercializadores a comparar
-                    comercializadores_a_comparar = [comercializador]
-                    if comercializador_2:
-                        comercializadores_a_comparar.append(comercializador_2)
-                    if comercializador_3:
-                        comercializadores_a_comparar.append(comercializador_3)
+                    comercializadores_a_comparar = [comercializador] + list(comercializadores_adicionales)
                     
                     with st.spinner(f'Ejecutando comparación de tarifas con {len(comercializadores_a_comparar)} comercializador(es)...'):
-                        resultados_comparacion = {}
-                        mensajes_analisis = {}
-                        comercializadores_sin_datos = []
-                        
-                        # Ejecutar comparación para cada comercializador
-                        for com in comercializadores_a_comparar:
-                            df_resultado = comparar_cu(df_procesado, mercado, com, nt, periodo_inicio, periodo_fin)
-                            if df_resultado is not None:
-                                resultados_comparacion[com] = df_resultado
-                                # Capturar mensajes inmediatamente después de la comparación
-                                if 'mensajes_analisis' in st.session_state:
-                                    mensajes_temp = st.session_state['mensajes_analisis']
-                                    # Si es una lista (formato antiguo), guardarla directamente
-                                    if isinstance(mensajes_temp, list):
-                                        mensajes_analisis[com] = mensajes_temp.copy()
-                                    else:
-                                        # Si ya es un diccionario, tomar el valor para este comercializador
-                                        mensajes_analisis[com] = mensajes_temp.get(com, [])
-                                else:
-                                    mensajes_analisis[com] = []
-                            else:
-                                # Si es un comercializador opcional, solo registrar que no tiene datos
-                                if com != comercializador:
-                                    comercializadores_sin_datos.append(com)
+                        # RUITOQUE se agrega una sola vez para todos los comercializadores
+                        comparacion = comparar_cu_multiple(
+                            df_procesado, mercado, comercializadores_a_comparar, nt, periodo_inicio, periodo_fin,
+                            indice_grupos=st.session_state['indice_grupos'],
+                            version=st.session_state['version_datos']
+                        )
+                        resultados_comparacion = comparacion.datos or {}
+                        mensajes_analisis = comparacion.mensajes if comparacion.datos is not None else {}
+                        # Los comercializadores opcionales sin datos solo se reportan
+                        comercializadores_sin_datos = [
+                            com for com in comercializadores_adicionales if com not in resultados_comparacion
+                        ]
                     
                     # Validar que al menos el comercializador principal tenga resultados
                     if comercializador in resultados_comparacion:
@@ -408,6 +943,9 @@ if st.session_state['archivo_cargado']:
                             st.warning(f"⚠️ Los siguientes comercializadores opcionales no tienen datos en el rango seleccionado: {', '.join(comercializadores_sin_datos)}")
                         
                         st.session_state['resultados_comparacion'] = resultados_comparacion
+                        st.session_state['indices_periodos'] = {
+                            com: IndicePeriodos(df_com) for com, df_com in resultados_comparacion.items()
+                        }
                         st.session_state['mensajes_analisis'] = mensajes_analisis
                         st.session_state['comercializador_activo'] = comercializador  # Por defecto el primero
                         st.session_state['df_resultado'] = resultados_comparacion[comercializador]  # Resultado por defecto
@@ -436,300 +974,16 @@ if st.session_state['archivo_cargado']:
         with col4:
             st.info(f"📅 Periodos: {st.session_state['parametros_comparacion']['periodo_inicio']} - {st.session_state['parametros_comparacion']['periodo_fin']}")
 
-        # Selector de comercializador activo
-        if len(st.session_state['parametros_comparacion']['comercializadores']) > 1:
-            st.markdown("---")
-            st.subheader("🔀 Seleccionar Comercializador para Visualizar")
-            comercializador_activo = st.selectbox(
-                'Comercializador a visualizar:',
-                options=st.session_state['parametros_comparacion']['comercializadores'],
-                key='selector_comercializador_activo',
-                index=st.session_state['parametros_comparacion']['comercializadores'].index(
-                    st.session_state.get('comercializador_activo', st.session_state['parametros_comparacion']['comercializadores'][0])
-                ) if st.session_state.get('comercializador_activo') in st.session_state['parametros_comparacion']['comercializadores'] else 0
-            )
-            # Verificar si cambió el comercializador activo
-            comercializador_anterior = st.session_state.get('comercializador_activo')
-            st.session_state['comercializador_activo'] = comercializador_activo
-            
-            # Si cambió el comercializador, limpiar el resultado filtrado
-            if comercializador_anterior != comercializador_activo:
-                st.session_state['df_resultado_filtrado'] = None
-            
-            # Actualizar df_resultado con el comercializador activo
-            if comercializador_activo in st.session_state['resultados_comparacion']:
-                st.session_state['df_resultado'] = st.session_state['resultados_comparacion'][comercializador_activo]
-        else:
-            st.session_state['comercializador_activo'] = st.session_state['parametros_comparacion']['comercializadores'][0]
-            # Asegurar que df_resultado esté actualizado
-            if st.session_state['comercializador_activo'] in st.session_state.get('resultados_comparacion', {}):
-                st.session_state['df_resultado'] = st.session_state['resultados_comparacion'][st.session_state['comercializador_activo']]
+        fragmento_resultados()
 
-        # Mostrar mensajes del análisis para el comercializador activo
-        st.subheader("📊 Análisis Periodo a Periodo")
-        comercializador_activo = st.session_state['comercializador_activo']
-        if comercializador_activo in st.session_state.get('mensajes_analisis', {}):
-            for mensaje in st.session_state['mensajes_analisis'][comercializador_activo]:
-                st.write(mensaje)
+    # --- MATRIZ DE COMPETITIVIDAD (TODOS LOS MERCADOS) ---
+    st.markdown("---")
+    with st.expander("🗺️ Matriz de Competitividad (todos los mercados y niveles de tensión)"):
+        fragmento_matriz_competitividad()
 
-        # Mostrar resultados
-        if st.session_state['df_resultado'] is not None:
-            st.subheader("📈 Resultados Detallados")
-            st.dataframe(st.session_state['df_resultado'])
-            
-            # Obtener fechas disponibles para el slider
-            fechas_disponibles = sorted(st.session_state['df_resultado']['FECHA'].unique())
-            
-            # Verificar que tenemos fechas válidas antes de continuar
-            if not fechas_disponibles:
-                st.error("❌ No hay fechas disponibles para mostrar en el slider")
-                st.stop()
-            
-            # Inicializar valores del slider si no existen o si no están en las fechas disponibles
-            if (st.session_state['slider_periodo_inicio'] is None or 
-                st.session_state['slider_periodo_inicio'] not in fechas_disponibles):
-                st.session_state['slider_periodo_inicio'] = fechas_disponibles[0]
-            
-            if (st.session_state['slider_periodo_fin'] is None or 
-                st.session_state['slider_periodo_fin'] not in fechas_disponibles):
-                st.session_state['slider_periodo_fin'] = fechas_disponibles[-1]
-            
-            # Slider para seleccionar rango de periodos
-            st.subheader("🎛️ Ajustar Rango de Periodos")
-            
-            # Slider de rango con periodos como opciones
-            slider_range = st.select_slider(
-                'Seleccionar rango de periodos:',
-                options=fechas_disponibles,
-                value=(st.session_state['slider_periodo_inicio'], st.session_state['slider_periodo_fin']),
-                key='periodo_slider'
-            )
-            
-            # Extraer fechas del slider
-            slider_inicio = slider_range[0]
-            slider_fin = slider_range[1]
-            
-            # Mostrar información del rango seleccionado
-            st.caption(f"📅 Periodo seleccionado: {slider_inicio} a {slider_fin} ({len([f for f in fechas_disponibles if slider_inicio <= f <= slider_fin])} periodos)")
-            
-            # Actualizar valores del slider
-            st.session_state['slider_periodo_inicio'] = slider_inicio
-            st.session_state['slider_periodo_fin'] = slider_fin
-            
-            # Calcular promedios para todos los comercializadores
-            st.subheader("📊 Promedios del Periodo Seleccionado")
-            
-            # Calcular promedios para cada comercializador
-            todos_promedios = {}
-            for com in st.session_state['parametros_comparacion']['comercializadores']:
-                if com in st.session_state['resultados_comparacion']:
-                    df_com = st.session_state['resultados_comparacion'][com]
-                    promedios = calcular_promedios_periodo(
-                        df_com, 
-                        st.session_state['slider_periodo_inicio'], 
-                        st.session_state['slider_periodo_fin']
-                    )
-                    todos_promedios[com] = promedios
-            
-            # Mostrar una fila por cada comercializador
-            for idx, com in enumerate(st.session_state['parametros_comparacion']['comercializadores']):
-                if com in todos_promedios:
-                    promedios = todos_promedios[com]
-                    st.markdown(f"**{com}**")
-                    col1, col2, col3, col4 = st.columns(4)
-                    
-                    with col1:
-                        st.metric(
-                            f"Promedio RUITOQUE", 
-                            f"${promedios['promedio_rtq']:,.2f}",
-                            help="Promedio del Costo Unitario de RUITOQUE en el periodo seleccionado"
-                        )
-                    
-                    with col2:
-                        st.metric(
-                            f"Promedio {promedios['comercializador']}", 
-                            f"${promedios['promedio_competidor']:,.2f}",
-                            help=f"Promedio del Costo Unitario de {promedios['comercializador']} en el periodo seleccionado"
-                        )
-                    
-                    with col3:
-                        # Lógica de colores:
-                        # - diferencia_absoluta > 0: RUITOQUE es más barato → porcentaje positivo → verde ("normal")
-                        # - diferencia_absoluta < 0: RUITOQUE es más caro → porcentaje negativo → rojo ("normal" muestra rojo para negativos)
-                        # Streamlit: "normal" = verde para positivos, rojo para negativos
-                        #           "inverse" = rojo para positivos, verde para negativos
-                        # Como queremos: verde cuando RUITOQUE es mejor, rojo cuando es peor
-                        # y el signo del porcentaje coincide con esto, usamos "normal"
-                        diferencia_color = "normal"
-                        
-                        st.metric(
-                            "Diferencia Absoluta", 
-                            f"${promedios['diferencia_absoluta']:,.2f}",
-                            delta=f"{promedios['diferencia_porcentual']:+.2f}%",
-                            delta_color=diferencia_color,
-                            help="Diferencia absoluta y porcentual entre promedios (positivo = RUITOQUE más competitivo, negativo = RUITOQUE menos competitivo)"
-                        )
-                    
-                    with col4:
-                        st.metric(
-                            "Periodos Analizados", 
-                            f"{promedios['periodos_analizados']}",
-                            help="Número de periodos incluidos en el análisis actual"
-                        )
-                    
-                    if idx < len(st.session_state['parametros_comparacion']['comercializadores']) - 1:
-                        st.markdown("---")
-            
-            # Filtrar datos para el gráfico
-            df_filtrado = filtrar_resultados_por_periodo(
-                st.session_state['df_resultado'],
-                st.session_state['slider_periodo_inicio'],
-                st.session_state['slider_periodo_fin']
-            )
-            st.session_state['df_resultado_filtrado'] = df_filtrado
-            
-            # Crear y mostrar gráfico con todos los comercializadores
-            fig = crear_grafico_comparacion_multiple(
-                st.session_state['resultados_comparacion'],
-                st.session_state['slider_periodo_inicio'],
-                st.session_state['slider_periodo_fin']
-            )
-            if fig:
-                st.plotly_chart(fig, use_container_width=True)
-            
-            # Botones de acción (después del gráfico)
-            st.markdown("---")
-            col1, col2 = st.columns(2)
-            with col1:
-                # Descargar archivos para cada comercializador
-                st.subheader("📥 Descargar Resultados")
-                
-                for com in st.session_state['parametros_comparacion']['comercializadores']:
-                    if com in st.session_state['resultados_comparacion']:
-                        df_com = st.session_state['resultados_comparacion'][com]
-                        
-                        # Filtrar datos para el periodo seleccionado
-                        df_filtrado_com = filtrar_resultados_por_periodo(
-                            df_com,
-                            st.session_state['slider_periodo_inicio'],
-                            st.session_state['slider_periodo_fin']
-                        )
-                        
-                        # Crear archivo Excel
-                        output = io.BytesIO()
-                        df_filtrado_com.to_excel(output, index=False, sheet_name="Comparacion", engine='openpyxl')
-                        output.seek(0)
-                        
-                        # Generar nombre de archivo
-                        nombre_archivo = f"comparacion_cu_{st.session_state['parametros_comparacion']['mercado']}_{com}_{st.session_state['parametros_comparacion']['nt']}_{st.session_state['slider_periodo_inicio']}_{st.session_state['slider_periodo_fin']}.xlsx"
-                        
-                        st.download_button(
-                            label=f"📥 Descargar {com}",
-                            data=output.getvalue(),
-                            file_name=nombre_archivo,
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                            key=f'descargar_btn_{com}',
-                            help=f"Descarga los resultados de la comparación con {com} para el periodo {st.session_state['slider_periodo_inicio']} a {st.session_state['slider_periodo_fin']}"
-                        )
-            
-            with col2:
-                if st.button('🔄 Nueva Comparación', key='nueva_comparacion'):
-                    reset_comparacion()
-                    st.rerun()
-            
-            # --- SECCIÓN 3: ANÁLISIS DE AHORRO ---
-            st.markdown("---")
-            st.header("3️⃣ Análisis de Ahorro")
-            
-            st.info("""
-            **💡 ¿Qué hace esta sección?**
-            
-            Calcula el **ahorro económico real** que tendría un cliente si cambia de su comercializador actual a RUITOQUE, 
-            basándose en su consumo promedio mensual y los precios del periodo seleccionado.
-            
-            **📊 Fórmula del Ahorro:**
-            ```
-            Ahorro Total = Σ(CU_mes_n_COMERCIALIZADOR × Consumo_Promedio) - Σ(CU_mes_n_RUITOQUE × Consumo_Promedio)
-            ```
-            """)
-            
-            # Selector de comercializador y inputs para análisis de ahorro
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                # Selector de comercializador para el análisis de ahorro
-                comercializadores_disponibles = st.session_state['parametros_comparacion']['comercializadores']
-                
-                # Determinar el índice por defecto
-                if st.session_state.get('comercializador_ahorro') in comercializadores_disponibles:
-                    default_index = comercializadores_disponibles.index(st.session_state['comercializador_ahorro'])
-                else:
-                    default_index = 0
-                
-                comercializador_ahorro = st.selectbox(
-                    'Comercializador:',
-                    options=comercializadores_disponibles,
-                    key='selector_comercializador_ahorro',
-                    index=default_index,
-                    help="Seleccione el comercializador para calcular el análisis de ahorro"
-                )
-                # Guardar el comercializador seleccionado
-                comercializador_anterior = st.session_state.get('comercializador_ahorro')
-                st.session_state['comercializador_ahorro'] = comercializador_ahorro
-                
-                # Si cambió el comercializador, limpiar resultados previos
-                if comercializador_anterior and comercializador_anterior != comercializador_ahorro:
-                    st.session_state['mostrar_analisis_ahorro'] = False
-                    st.session_state['resultados_ahorro'] = None
-            
-            with col2:
-                consumo_promedio = st.number_input(
-                    'Consumo promedio mensual del cliente (kWh):',
-                    min_value=1.0,
-                    max_value=1000000.0,
-                    value=st.session_state.get('consumo_promedio_kwh', 1000.0),
-                    step=100.0,
-                    help="Ingrese el consumo promedio mensual en kilowatt-hora del cliente"
-                )
-                st.session_state['consumo_promedio_kwh'] = consumo_promedio
-            
-            with col3:
-                st.markdown("")
-                st.markdown("")
-                if st.button('💰 Calcular Ahorro', type='primary', key='calcular_ahorro_btn'):
-                    # Obtener el DataFrame del comercializador seleccionado
-                    if comercializador_ahorro in st.session_state['resultados_comparacion']:
-                        df_resultado_ahorro = st.session_state['resultados_comparacion'][comercializador_ahorro]
-                        
-                        with st.spinner('Calculando análisis de ahorro...'):
-                            resultados_ahorro = calcular_ahorro_energia(
-                                df_resultado_ahorro,
-                                st.session_state['slider_periodo_inicio'],
-                                st.session_state['slider_periodo_fin'],
-                                consumo_promedio
-                            )
-                            
-                            if resultados_ahorro:
-                                st.session_state['resultados_ahorro'] = resultados_ahorro
-                                st.session_state['mostrar_analisis_ahorro'] = True
-                                st.success("✅ Análisis de ahorro calculado exitosamente")
-                                st.rerun()
-                            else:
-                                st.error("❌ No se pudo calcular el análisis de ahorro. Verifique los datos.")
-                    else:
-                        st.error(f"❌ No hay datos disponibles para {comercializador_ahorro}")
-            
-            with col4:
-                st.markdown("")
-                st.markdown("")
-                if st.button('🔄 Reiniciar Análisis', key='reiniciar_ahorro_btn'):
-                    st.session_state['mostrar_analisis_ahorro'] = False
-                    st.session_state['resultados_ahorro'] = None
-                    st.rerun()
-            
-            # Mostrar resultados del análisis de ahorro si están disponibles
-            if st.session_state.get('mostrar_analisis_ahorro') and st.session_state.get('resultados_ahorro'):
-                mostrar_analisis_ahorro(st.session_state['resultados_ahorro'])
+    # --- AHORRO DE UNA CARTERA DE CLIENTES ---
+    with st.expander("📂 Ahorro de Cartera de Clientes"):
+        fragmento_cartera()
 
 else:
     st.info("ℹ️ Por favor, primero carga el archivo de tarifas para realizar la comparación.")
@@ -739,4 +993,7 @@ st.markdown("---")
 st.markdown(
     "<div style='text-align: left;'>Desarrollado por: <a href='https://github.com/andresbadillo' target='_blank'>andresbadillo.co</a></div>",
     unsafe_allow_html=True
-) 
\ No newline at end of file
+)
+
+registrar_latencia('app', time.perf_counter() - inicio_ejecucion)
+mostrar_latencia('app', 'Ejecución completa') 
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Módulo para obtener tokens de aplicación (client credentials) de Microsoft Graph.
+
+Permite acceder al archivo de tarifas sin una sesión de usuario, por ejemplo
+desde la precarga programada del servidor o para la descarga compartida.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import msal
+import requests
+from config.settings import AZURE_CONFIG
+
+
+class ProveedorTokenAplicacion:
+    """
+    Proveedor de tokens de aplicación con caché en memoria y en disco.
+
+    Usa un `ConfidentialClientApplication` de MSAL con un `SerializableTokenCache`
+    que se persiste en disco, de modo que un reinicio del proceso reutiliza el
+    token vigente. El token se renueva antes de vencer (ver `margen_renovacion`),
+    por lo que las descargas largas no empiezan con un token a punto de expirar.
+    """
+
+    def __init__(self, client_id=None, client_secret=None, tenant_id=None, scope=None,
+                 ruta_cache=None, margen_renovacion=None):
+        """
+        Inicializa el proveedor; la aplicación de MSAL se crea en la primera solicitud.
+
+        Args:
+            client_id (str, optional): ID de la app registrada. Por defecto usa `AZURE_CONFIG`.
+            client_secret (str, optional): Secreto de la app registrada.
+            tenant_id (str, optional): ID del tenant.
+            scope (str, optional): Scope de aplicación (p. ej. "https://graph.microsoft.com/.default").
+            ruta_cache (str, optional): Archivo del caché de tokens en disco; None para solo memoria.
+            margen_renovacion (int, optional): Segundos antes del vencimiento en que se renueva el token.
+        """
+        self.client_id = client_id or AZURE_CONFIG['client_id']
+        self.client_secret = client_secret or AZURE_CONFIG['client_secret']
+        self.tenant_id = tenant_id or AZURE_CONFIG['tenant_id']
+        self.scope = scope or AZURE_CONFIG['scope_aplicacion']
+        self.ruta_cache = Path(ruta_cache) if ruta_cache else None
+        self.margen_renovacion = (
+            margen_renovacion if margen_renovacion is not None else AZURE_CONFIG['margen_renovacion_token']
+        )
+
+        self._lock = threading.Lock()
+        self._cache = msal.SerializableTokenCache()
+        self._app = None
+        self._token = None
+        self._expira_en = 0.0
+        self.ultimo_error = None
+
+    @property
+    def configurado(self):
+        """bool: Indica si hay credenciales de aplicación configuradas."""
+        return bool(self.client_id and self.client_secret and self.tenant_id)
+
+    @property
+    def expira_en(self):
+        """float: Momento (epoch) en que vence el token vigente; 0 si no hay token."""
+        return self._expira_en
+
+    def _aplicacion(self):
+        """Crea la aplicación de MSAL y carga el caché de disco (con el lock tomado)."""
+        if self._app is None:
+            if self.ruta_cache is not None and self.ruta_cache.exists():
+                try:
+                    self._cache.deserialize(self.ruta_cache.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    # Un caché ilegible solo obliga a pedir un token nuevo
+                    pass
+            self._app = msal.ConfidentialClientApplication(
+                self.client_id,
+                client_credential=self.client_secret,
+                authority=f"https://login.microsoftonline.com/{self.tenant_id}",
+                token_cache=self._cache
+            )
+        return self._app
+
+    def _guardar_cache(self):
+        """Persiste el caché de tokens si cambió (escritura atómica, solo lectura del dueño)."""
+        if self.ruta_cache is None or not self._cache.has_state_changed:
+            return
+        try:
+            self.ruta_cache.parent.mkdir(parents=True, exist_ok=True)
+            descriptor, temporal = tempfile.mkstemp(dir=self.ruta_cache.parent, prefix=".tmp-")
+            os.chmod(temporal, 0o600)
+            with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+                f.write(self._cache.serialize())
+            os.replace(temporal, self.ruta_cache)
+            self._cache.has_state_changed = False
+        except OSError:
+            # Sin caché en disco el proveedor sigue funcionando con el de memoria
+            pass
+
+    def _descartar_tokens_en_cache(self):
+        """Elimina del caché los tokens de acceso de la app para forzar una renovación."""
+        for token in self._cache.find(msal.TokenCache.CredentialType.ACCESS_TOKEN, query={"client_id": self.client_id}):
+            self._cache.remove_at(token)
+
+    def obtener_token(self):
+        """
+        Obtiene un token de aplicación vigente, renovándolo si está por vencer.
+
+        Returns:
+            str or None: Token de acceso o None si no hay credenciales o la solicitud falla
+                         (el motivo queda en `ultimo_error`).
+        """
+        with self._lock:
+            ahora = time.time()
+            if self._token and ahora < self._expira_en - self.margen_renovacion:
+                return self._token
+            if not self.configurado:
+                self.ultimo_error = "No hay credenciales de aplicación configuradas"
+                return None
+
+            try:
+                app = self._aplicacion()
+                resultado = app.acquire_token_for_client(scopes=[self.scope])
+                if "access_token" in resultado and resultado.get("expires_in", 0) <= self.margen_renovacion:
+                    # El token del caché de MSAL está por vencer: se descarta para pedir uno nuevo
+                    self._descartar_tokens_en_cache()
+                    resultado = app.acquire_token_for_client(scopes=[self.scope])
+            except (requests.exceptions.RequestException, ValueError) as e:
+                resultado = {"error": "connection_error", "error_description": str(e)}
+
+            if "access_token" not in resultado:
+                self.ultimo_error = resultado.get("error_description") or resultado.get("error")
+                # Mientras no venza, el token anterior sigue siendo utilizable
+                return self._token if ahora < self._expira_en else None
+
+            self._token = resultado["access_token"]
+            self._expira_en = ahora + int(resultado.get("expires_in", 0))
+            self.ultimo_error = None
+            self._guardar_cache()
+            return self._token
+
+
+# Instancia única por proceso: comparte el token entre la precarga y las descargas de todas las sesiones
+proveedor_token_aplicacion = ProveedorTokenAplicacion(ruta_cache=AZURE_CONFIG['cache_token_aplicacion'])
@@ -2,10 +2,17 @@
 Módulo de autenticación con Azure AD para la aplicación de análisis de tarifas.
 """
 
+import time
+
+import msal
+import requests
 import streamlit as st
 from streamlit_oauth import OAuth2Component
 from config.settings import AZURE_CONFIG
 
+# Scopes que MSAL agrega por su cuenta y no acepta en las solicitudes de token
+SCOPES_RESERVADOS = {"openid", "profile", "offline_access"}
+
 
 class AzureAuth:
     """
@@ -19,6 +26,7 @@ class AzureAuth:
         self.tenant_id = AZURE_CONFIG['tenant_id']
         self.redirect_uri = AZURE_CONFIG['redirect_uri']
         self.scope = AZURE_CONFIG['scope']
+        self.margen_renovacion = AZURE_CONFIG['margen_renovacion_token']
         
         # Configurar endpoints
         self.authorize_endpoint = f"https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/authorize"
@@ -53,10 +61,10 @@ class AzureAuth:
             if not result:
                 return None
             elif "access_token" in result:
-                st.session_state["token"] = result["access_token"]
+                self._guardar_token(result)
                 st.rerun()
             elif "token" in result and "access_token" in result["token"]:
-                st.session_state["token"] = result["token"]["access_token"]
+                self._guardar_token(result["token"])
                 st.rerun()
             else:
                 st.error(f"Error en la autenticación: {result}")
@@ -65,14 +73,78 @@ class AzureAuth:
         
         return st.session_state.get("token")
     
+    def _guardar_token(self, respuesta):
+        """
+        Guarda en la sesión el token de acceso, el refresh token y el vencimiento.
+        
+        Solo se modifican estas claves: los datos cargados y los resultados de la
+        sesión se conservan al renovar el token.
+        
+        Args:
+            respuesta (dict): Respuesta del endpoint de tokens (streamlit-oauth o MSAL).
+        """
+        st.session_state["token"] = respuesta["access_token"]
+        # Si la respuesta no trae un refresh token nuevo, el anterior sigue siendo válido
+        if respuesta.get("refresh_token"):
+            st.session_state["refresh_token"] = respuesta["refresh_token"]
+        if respuesta.get("expires_at"):
+            st.session_state["token_expira_en"] = float(respuesta["expires_at"])
+        elif respuesta.get("expires_in"):
+            st.session_state["token_expira_en"] = time.time() + int(respuesta["expires_in"])
+    
+    def renovar_token(self):
+        """
+        Renueva en silencio el token de acceso con el refresh token de la sesión.
+        
+        Returns:
+            str or None: Nuevo token de acceso o None si no hay refresh token o la renovación falla.
+        """
+        refresh_token = st.session_state.get("refresh_token")
+        if not refresh_token:
+            return None
+        
+        app = msal.ConfidentialClientApplication(
+            self.client_id,
+            client_credential=self.client_secret,
+            authority=f"https://login.microsoftonline.com/{self.tenant_id}"
+        )
+        scopes = [scope for scope in self.scope.split() if scope not in SCOPES_RESERVADOS]
+        try:
+            resultado = app.acquire_token_by_refresh_token(refresh_token, scopes=scopes)
+        except (requests.exceptions.RequestException, ValueError):
+            return None
+        
+        if "access_token" not in resultado:
+            return None
+        self._guardar_token(resultado)
+        return resultado["access_token"]
+    
+    def _cerrar_sesion_token(self):
+        """Descarta el token vencido (y su refresh token) para volver a pedir el inicio de sesión."""
+        for clave in ("token", "refresh_token", "token_expira_en"):
+            st.session_state.pop(clave, None)
+    
     def get_token(self):
         """
-        Obtiene el token de acceso de la sesión.
+        Obtiene el token de acceso de la sesión, renovándolo si está por vencer.
         
         Returns:
-            str or None: Token de acceso si existe, None en caso contrario.
+            str or None: Token de acceso vigente, None si no hay sesión o el token
+                         venció y no se pudo renovar.
         """
-        return st.session_state.get("token")
+        token = st.session_state.get("token")
+        expira_en = st.session_state.get("token_expira_en")
+        if not token or expira_en is None or time.time() < expira_en - self.margen_renovacion:
+            return token
+        
+        token_renovado = self.renovar_token()
+        if token_renovado:
+            return token_renovado
+        if time.time() < expira_en:
+            # Aún vigente: se reintentará la renovación en la próxima ejecución
+            return token
+        self._cerrar_sesion_token()
+        return None
     
     def is_authenticated(self):
         """
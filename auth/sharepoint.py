@@ -2,28 +2,87 @@
 Módulo para interactuar con SharePoint usando Microsoft Graph API.
 """
 
+import tempfile
 import streamlit as st
 import requests
-from config.settings import SHAREPOINT_CONFIG
+from config.settings import SHAREPOINT_CONFIG, CACHE_CONFIG, DOWNLOAD_CONFIG
+from utils.file_cache import CacheArchivoLocal
+
+# Resultados posibles de una descarga condicional
+ESTADO_CACHE_HIT = "hit"                # Misma versión (eTag): se usa la copia local
+ESTADO_CACHE_REVALIDADO = "revalidado"  # Cambió el eTag pero no el contenido (cTag y tamaño)
+ESTADO_CACHE_DESCARGA = "descarga"      # Contenido nuevo o sin copia local: descarga completa
 
 
 class SharePointClient:
     """
     Clase para manejar operaciones con SharePoint.
+    
+    El motivo del último error queda en `ultimo_error` y las advertencias en
+    `advertencias`. Con `mostrar_errores=False` el cliente no usa Streamlit, por lo
+    que puede correr en un hilo de fondo: quien lo invoca muestra esos textos
+    desde la sesión.
     """
     
-    def __init__(self, token):
+    def __init__(self, token=None, proveedor_token=None, mostrar_errores=True):
         """
         Inicializa el cliente de SharePoint.
         
         Args:
-            token (str): Token de acceso de Azure AD.
+            token (str, optional): Token de acceso de Azure AD (delegado del usuario).
+            proveedor_token (ProveedorTokenAplicacion, optional): Proveedor de tokens de aplicación;
+                si se indica, cada solicitud usa su token vigente (para descargas de fondo o compartidas).
+            mostrar_errores (bool): Si True, los errores se muestran en la interfaz; usar False
+                fuera del hilo del script (las llamadas a Streamlit se perderían).
         """
         self.token = token
-        self.headers = {
-            "Authorization": f"Bearer {token}"
+        self.proveedor_token = proveedor_token
+        self.mostrar_errores = mostrar_errores
+        self.ultimo_error = None
+        self.advertencias = []
+    
+    @property
+    def headers(self):
+        """dict: Encabezados de autorización con el token vigente."""
+        if self.proveedor_token is not None:
+            self.token = self.proveedor_token.obtener_token()
+        return {
+            "Authorization": f"Bearer {self.token}"
         }
     
+    def get_file_metadata(self, site_id=None, file_path=None):
+        """
+        Obtiene los metadatos del archivo (driveItem) sin descargar su contenido.
+        
+        Args:
+            site_id (str, optional): ID del sitio de SharePoint. 
+                                   Si no se proporciona, usa el configurado por defecto.
+            file_path (str, optional): Ruta del archivo en SharePoint.
+                                     Si no se proporciona, usa el configurado por defecto.
+        
+        Returns:
+            dict or None: Metadatos del archivo (id, eTag, cTag, size, lastModifiedDateTime)
+                          o None en caso de error.
+        """
+        site_id = site_id or SHAREPOINT_CONFIG['site_id']
+        file_path = file_path or SHAREPOINT_CONFIG['file_path']
+        
+        url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{file_path}"
+        params = {"$select": "id,eTag,cTag,size,lastModifiedDateTime"}
+        
+        try:
+            response = requests.get(url, headers=self.headers, params=params)
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                self._handle_error(response, url)
+                return None
+                
+        except requests.exceptions.RequestException as e:
+            self._error_conexion(f"Error de conexión al consultar el archivo: {str(e)}")
+            return None
+    
     def download_file(self, site_id=None, file_path=None):
         """
         Descarga un archivo desde SharePoint.
@@ -63,17 +122,143 @@ class SharePointClient:
                 return None
                 
         except requests.exceptions.RequestException as e:
-            st.error(f"Error de conexión al descargar archivo: {str(e)}")
+            self._error_conexion(f"Error de conexión al descargar archivo: {str(e)}")
+            return None
+    
+    def download_file_stream(self, site_id=None, file_path=None, progreso=None, memoria_maxima=None):
+        """
+        Descarga un archivo por bloques a un archivo temporal con memoria acotada.
+        
+        El contenido se escribe en un `SpooledTemporaryFile` que permanece en memoria
+        hasta `memoria_maxima` bytes y luego pasa a disco, sin copias intermedias.
+        
+        Args:
+            site_id (str, optional): ID del sitio de SharePoint.
+            file_path (str, optional): Ruta del archivo en SharePoint.
+            progreso (callable, optional): Función `progreso(bytes_recibidos, bytes_totales)`
+                                           invocada tras cada bloque; `bytes_totales` puede ser None.
+            memoria_maxima (int, optional): Bytes máximos en memoria. Por defecto usa `DOWNLOAD_CONFIG`.
+        
+        Returns:
+            SpooledTemporaryFile or None: Archivo posicionado al inicio, o None en caso de error.
+        """
+        site_id = site_id or SHAREPOINT_CONFIG['site_id']
+        file_path = file_path or SHAREPOINT_CONFIG['file_path']
+        memoria_maxima = memoria_maxima or DOWNLOAD_CONFIG['memoria_maxima_bytes']
+        
+        url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drive/root:/{file_path}:/content"
+        
+        try:
+            with requests.get(url, headers=self.headers, stream=True) as response:
+                if response.status_code != 200:
+                    self._handle_error(response, url)
+                    return None
+                
+                longitud = response.headers.get('Content-Length')
+                bytes_totales = int(longitud) if longitud else None
+                bytes_recibidos = 0
+                
+                archivo = tempfile.SpooledTemporaryFile(max_size=memoria_maxima)
+                try:
+                    for bloque in response.iter_content(chunk_size=DOWNLOAD_CONFIG['tamano_bloque_bytes']):
+                        archivo.write(bloque)
+                        bytes_recibidos += len(bloque)
+                        if progreso:
+                            progreso(bytes_recibidos, bytes_totales)
+                    archivo.seek(0)
+                except BaseException:
+                    # Una descarga interrumpida no debe dejar el temporal (quizá ya en disco) abierto
+                    archivo.close()
+                    raise
+                return archivo
+                
+        except requests.exceptions.RequestException as e:
+            self._error_conexion(f"Error de conexión al descargar archivo: {str(e)}")
             return None
     
+    def download_file_cached(self, site_id=None, file_path=None, metadatos=None, cache=None, progreso=None):
+        """
+        Descarga un archivo solo si cambió respecto a la copia en el caché local.
+        
+        Primero consulta los metadatos del driveItem (eTag, cTag, size, lastModifiedDateTime)
+        y los compara con la entrada en disco; el contenido se transfiere únicamente
+        cuando realmente cambió.
+        
+        Args:
+            site_id (str, optional): ID del sitio de SharePoint.
+            file_path (str, optional): Ruta del archivo en SharePoint.
+            metadatos (dict, optional): Metadatos ya consultados con `get_file_metadata()`.
+            cache (CacheArchivoLocal, optional): Caché en disco. Por defecto usa `CACHE_CONFIG`.
+            progreso (callable, optional): Función de progreso de la descarga (ver `download_file_stream`).
+        
+        Returns:
+            tuple: (archivo, estado) donde archivo es un archivo binario abierto y posicionado
+                   al inicio, y estado es 'hit', 'revalidado' o 'descarga'.
+                   (None, None) si no se pudo obtener el archivo.
+        """
+        site_id = site_id or SHAREPOINT_CONFIG['site_id']
+        file_path = file_path or SHAREPOINT_CONFIG['file_path']
+        cache = cache or CacheArchivoLocal(CACHE_CONFIG['directorio'])
+        clave = f"{site_id}/{file_path}"
+        
+        metadatos = metadatos or self.get_file_metadata(site_id, file_path)
+        if not metadatos:
+            return None, None
+        
+        entrada = cache.abrir(clave)
+        if entrada is not None:
+            archivo, metadatos_locales = entrada
+            if metadatos_locales.get('eTag') == metadatos.get('eTag'):
+                return archivo, ESTADO_CACHE_HIT
+            # El cTag solo cambia cuando cambia el contenido (no con renombres o permisos)
+            if (metadatos.get('cTag') and metadatos_locales.get('cTag') == metadatos.get('cTag')
+                    and metadatos_locales.get('size') == metadatos.get('size')):
+                cache.actualizar_metadatos(clave, metadatos)
+                return archivo, ESTADO_CACHE_REVALIDADO
+            archivo.close()
+        
+        archivo = self.download_file_stream(site_id, file_path, progreso=progreso)
+        if archivo is None:
+            return None, None
+        
+        try:
+            cache.guardar(clave, archivo, metadatos)
+        except OSError as e:
+            # Un fallo del caché no debe impedir el uso del archivo descargado
+            advertencia = f"⚠️ No se pudo guardar el archivo en el caché local: {str(e)}"
+            self.advertencias.append(advertencia)
+            if self.mostrar_errores:
+                st.warning(advertencia)
+        
+        return archivo, ESTADO_CACHE_DESCARGA
+    
+    def _error_conexion(self, mensaje):
+        """Registra un error de conexión y lo muestra si el cliente corre en el hilo del script."""
+        self.ultimo_error = f"❌ {mensaje}"
+        if self.mostrar_errores:
+            st.error(mensaje)
+    
     def _handle_error(self, response, url):
         """
         Maneja errores de la API de SharePoint.
         
+        Registra siempre el motivo en `ultimo_error`; el detalle con Streamlit solo
+        se muestra si `mostrar_errores` es True.
+        
         Args:
             response: Objeto de respuesta de requests.
             url (str): URL que se intentó consultar.
         """
+        if response.status_code == 403:
+            self.ultimo_error = (
+                "🚫 No hay permisos para acceder al archivo de tarifas (403). "
+                "Contacte al Analista de Ventas para que autorice el acceso."
+            )
+        else:
+            self.ultimo_error = f"❌ No se pudo descargar el archivo de SharePoint (código de error {response.status_code})."
+        if not self.mostrar_errores:
+            return
+        
         # Manejo específico para error de permisos (403)
         if response.status_code == 403:
             st.error("🚫 **Error de Permisos**")
@@ -106,7 +291,6 @@ class SharePointClient:
                 except Exception:
                     st.write("**Respuesta de error (texto):**", response.text)
                 st.write("**URL consultada:**", url)
-                st.write("**Token (primeros 50 caracteres):**", self.token[:50] + "...")
         
         # Manejo para otros errores
         else:
@@ -135,7 +319,6 @@ class SharePointClient:
                 except Exception:
                     st.write("**Respuesta de error (texto):**", response.text)
                 st.write("**URL consultada:**", url)
-                st.write("**Token (primeros 50 caracteres):**", self.token[:50] + "...")
     
     def test_connection(self):
         """
@@ -0,0 +1,22 @@
+"""
+Script para comparar los motores de lectura del archivo de tarifas sobre un archivo local.
+
+Uso:
+    python comparar_motores_excel.py "Tarifas comparativas.xlsm"
+"""
+
+import sys
+
+from core.data_processing import comparar_motores_lectura
+
+if len(sys.argv) != 2:
+    print(__doc__)
+    sys.exit(1)
+
+resultados = comparar_motores_lectura(sys.argv[1])
+
+print(f"Filas procesadas:     {resultados['filas']:,}")
+print(f"Lector rápido:        {resultados['segundos_rapido']:.3f} s")
+print(f"openpyxl:             {resultados['segundos_openpyxl']:.3f} s")
+print(f"Aceleración:          {resultados['segundos_openpyxl'] / resultados['segundos_rapido']:.1f}x")
+print(f"Resultados idénticos: {'Sí' if resultados['resultados_iguales'] else 'No'}")
@@ -13,9 +13,14 @@ PAGE_CONFIG = {
 INITIAL_SESSION_STATE = {
     'archivo_cargado': False,
     'df_tarifas': None,
+    'version_datos': None,  # Versión (eTag) del dataset compartido en uso
+    'indice_grupos': None,  # Índice (MERCADO, NT, COMERCIALIZADOR) del dataset en uso
+    'catalogo': None,  # Opciones precalculadas de los selectores del dataset en uso
+    'matriz_competitividad': None,  # Pivote mensual contra RUITOQUE del dataset en uso
     'mostrar_resultados': False,
     'df_resultado': None,
     'resultados_comparacion': {},  # Diccionario con resultados por comercializador
+    'indices_periodos': {},  # IndicePeriodos por comercializador (consultas por rango del slider)
     'comercializador_activo': None,  # Comercializador actualmente visualizado
     'parametros_comparacion': {},
     'mensajes_analisis': {},
@@ -27,9 +32,15 @@ INITIAL_SESSION_STATE = {
     'resultados_ahorro': None,
     'consumo_promedio_kwh': None,
     'comercializador_ahorro': None,
+    'cubo_ahorro': None,  # CuboAhorro (comercializador × consumo × ventana) de la tabla de ahorro
+    'resultado_cartera': None,  # Análisis de ahorro de la cartera subida (resumen y archivo temporal del detalle en CSV)
     'comercializador_ahorro_anterior': None
 }
 
+# Versión del esquema de la instantánea procesada de df_tarifas.
+# Incrementar cuando cambien las columnas o tipos que produce el procesamiento.
+SNAPSHOT_SCHEMA_VERSION = 1
+
 # Columnas necesarias para el análisis
 REQUIRED_COLUMNS = {'MERCADO', 'AÑO', 'FECHA', 'COMERCIALIZADOR', 'NT', 'G', 'C', 'CU'}
 
@@ -14,11 +14,80 @@ AZURE_CONFIG = {
     'client_secret': os.getenv("AZURE_CLIENT_SECRET"),
     'tenant_id': os.getenv("AZURE_TENANT_ID"),
     'redirect_uri': os.getenv("AZURE_REDIRECT_URI"),
-    'scope': "User.Read Sites.Read.All Files.Read.All offline_access"
+    'scope': "User.Read Sites.Read.All Files.Read.All offline_access",
+    # Permisos de aplicación (client credentials) para el acceso del servidor sin sesión de usuario
+    'scope_aplicacion': "https://graph.microsoft.com/.default",
+    # Caché en disco del token de aplicación (vacío para mantenerlo solo en memoria)
+    'cache_token_aplicacion': os.getenv(
+        "AZURE_CACHE_TOKEN_APLICACION",
+        os.path.join(os.getenv("TARIFAS_CACHE_DIR", ".cache/tarifas"), "token_aplicacion.json")
+    ),
+    # Segundos antes del vencimiento en que se renuevan los tokens
+    'margen_renovacion_token': int(os.getenv("AZURE_MARGEN_RENOVACION_TOKEN", 300)),
+    # Descarga compartida del archivo con el token de aplicación; el inicio de sesión
+    # del usuario queda solo para el control de acceso
+    'descarga_con_token_aplicacion': os.getenv("TARIFAS_DESCARGA_TOKEN_APLICACION", "0") == "1"
 }
 
 # SharePoint Configuration
 SHAREPOINT_CONFIG = {
     'site_id': "ruitoqueesp1.sharepoint.com,5336acc1-e942-418c-8982-91cfacd4ae9a,01a12f77-e104-450c-87d2-db9c56ad451e",
     'file_path': "Tarifas Reguladas/Tarifas comparativas.xlsm"
-} 
\ No newline at end of file
+}
+
+# Caché local de archivos descargados
+CACHE_CONFIG = {
+    'directorio': os.getenv("TARIFAS_CACHE_DIR", ".cache/tarifas"),
+    # Tamaño máximo del caché en memoria de resultados de comparación (compartido entre sesiones)
+    'resultados_max_bytes': int(os.getenv("TARIFAS_CACHE_RESULTADOS_MAX", 64 * 1024 * 1024)),
+    # Tamaño máximo del caché en memoria de archivos Excel exportados (compartido entre sesiones)
+    'exportaciones_max_bytes': int(os.getenv("TARIFAS_CACHE_EXPORTACIONES_MAX", 32 * 1024 * 1024)),
+    # Tamaño máximo del caché en memoria de figuras ya construidas (compartido entre sesiones)
+    'graficos_max_bytes': int(os.getenv("TARIFAS_CACHE_GRAFICOS_MAX", 32 * 1024 * 1024))
+}
+
+# Descarga en streaming del archivo de tarifas
+DOWNLOAD_CONFIG = {
+    # Por encima de este tamaño el archivo temporal pasa de memoria a disco
+    'memoria_maxima_bytes': int(os.getenv("TARIFAS_DESCARGA_MEMORIA_MAX", 32 * 1024 * 1024)),
+    'tamano_bloque_bytes': 1024 * 1024
+}
+
+# Lectura y procesamiento del archivo de tarifas
+DATA_CONFIG = {
+    # 'rapido': lectura directa del XML de la tabla; 'openpyxl': carga del libro completo
+    'motor_excel': os.getenv("TARIFAS_MOTOR_EXCEL", "rapido"),
+    # 'completo': carga toda la tabla y luego la procesa; 'bloques': ingesta con memoria acotada
+    'modo_ingesta': os.getenv("TARIFAS_MODO_INGESTA", "completo"),
+    'tamano_bloque': int(os.getenv("TARIFAS_TAMANO_BLOQUE", 50000)),
+    # Clientes por bloque al leer el archivo de cartera del análisis de ahorro
+    'tamano_bloque_cartera': int(os.getenv("TARIFAS_TAMANO_BLOQUE_CARTERA", 5000)),
+    # Por encima de este tamaño el detalle por cliente de la cartera pasa de memoria a disco
+    'memoria_maxima_detalle_cartera': int(os.getenv("TARIFAS_CARTERA_MEMORIA_MAX", 4 * 1024 * 1024)),
+    # Representación compacta de df_tarifas (categóricas, FECHA entera y medidas opcionalmente en float32)
+    'esquema_compacto': os.getenv("TARIFAS_ESQUEMA_COMPACTO", "0") == "1",
+    'medidas_float32': os.getenv("TARIFAS_MEDIDAS_FLOAT32", "0") == "1",
+    # Segundos entre consultas de la interfaz al progreso de la carga en segundo plano
+    'intervalo_sondeo_carga': float(os.getenv("TARIFAS_INTERVALO_SONDEO_CARGA", 0.5))
+}
+
+# Renderizado de gráficos
+GRAFICOS_CONFIG = {
+    # Por encima de este total de puntos en la figura se usan trazas WebGL (Scattergl)
+    'umbral_webgl': int(os.getenv("TARIFAS_GRAFICO_UMBRAL_WEBGL", 1000)),
+    # Puntos máximos por serie (reducción LTTB); 0 para graficar todos los puntos
+    'max_puntos_serie': int(os.getenv("TARIFAS_GRAFICO_MAX_PUNTOS", 0))
+}
+
+# Precarga programada del archivo de tarifas (con credencial de aplicación)
+PRECARGA_CONFIG = {
+    # Carga el dataset al iniciar el proceso y revisa periódicamente si cambió en SharePoint
+    'activa': os.getenv("TARIFAS_PRECARGA_ACTIVA", "0") == "1",
+    'intervalo_minutos': float(os.getenv("TARIFAS_PRECARGA_INTERVALO_MIN", 15))
+}
+
+# Monitoreo de la interfaz
+MONITOREO_CONFIG = {
+    # Muestra la latencia de cada ejecución completa y de cada fragmento
+    'mostrar_latencias': os.getenv("TARIFAS_MOSTRAR_LATENCIAS", "0") == "1"
+}
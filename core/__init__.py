@@ -0,0 +1,8 @@
+"""
+Núcleo de cálculo de la aplicación de análisis de tarifas.
+No depende de Streamlit: puede usarse desde scripts, procesos en lote y pools de procesos.
+"""
+
+from .resultado import ResultadoCalculo
+
+__all__ = ['ResultadoCalculo']
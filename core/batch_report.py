@@ -0,0 +1,219 @@
+"""Módulo para el reporte por lotes de todas las combinaciones (mercado, NT, comercializador)."""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from core.comparison import COMERCIALIZADOR_BASE, comparar_cu_multiple
+from core.group_index import IndiceGrupos
+
+NOMBRE_HOJA_RESUMEN = "Resumen"
+NOMBRE_ARCHIVO_RESUMEN = "resumen.xlsx"
+LONGITUD_MAXIMA_HOJA = 31  # Límite de Excel para nombres de hoja
+CARACTERES_INVALIDOS = re.compile(r'[\[\]:*?/\\]')
+
+
+def enumerar_combinaciones(indice_grupos: IndiceGrupos) -> Dict[Any, Dict[Any, List[Any]]]:
+    """
+    Enumera las combinaciones comparables del dataset.
+
+    Una combinación (mercado, NT, comercializador) es comparable si RUITOQUE
+    tiene datos en el mismo mercado y NT.
+
+    Args:
+        indice_grupos: Índice del dataset (ver `IndiceGrupos`).
+
+    Returns:
+        Diccionario {mercado: {nt: [comercializadores]}} ordenado.
+    """
+    claves = sorted(indice_grupos.claves(), key=lambda clave: tuple(str(v) for v in clave))
+    combinaciones: Dict[Any, Dict[Any, List[Any]]] = {}
+    for mercado, nt, comercializador in claves:
+        if comercializador == COMERCIALIZADOR_BASE or (mercado, nt, COMERCIALIZADOR_BASE) not in indice_grupos:
+            continue
+        combinaciones.setdefault(mercado, {}).setdefault(nt, []).append(comercializador)
+    return combinaciones
+
+
+def _nombre_hoja(nt: Any, comercializador: str, usados: set) -> str:
+    """Nombre de hoja válido y único para una combinación."""
+    base = CARACTERES_INVALIDOS.sub('_', f"NT{nt}_{comercializador}")[:LONGITUD_MAXIMA_HOJA]
+    nombre, n = base, 2
+    while nombre.lower() in usados:
+        sufijo = f"_{n}"
+        nombre = base[:LONGITUD_MAXIMA_HOJA - len(sufijo)] + sufijo
+        n += 1
+    usados.add(nombre.lower())
+    return nombre
+
+
+def _nombre_archivo(mercado: Any) -> str:
+    """Nombre de archivo seguro para el libro de un mercado."""
+    return re.sub(r'[^\w\-]+', '_', str(mercado)).strip('_') + ".xlsx"
+
+
+def _fila_resumen(mercado: Any, nt: Any, comercializador: str, df_resultado: pd.DataFrame, hoja: str) -> Dict[str, Any]:
+    """Fila del resumen a partir del resultado de una comparación."""
+    suf = comercializador.replace(' ', '_')
+    primera = df_resultado.iloc[0]
+    return {
+        'MERCADO': mercado,
+        'NT': nt,
+        'COMERCIALIZADOR': comercializador,
+        'PERIODOS': len(df_resultado),
+        'PERIODOS_EXITOSOS': int((df_resultado['ESTADO'] == '✅ Exitoso').sum()),
+        'PROM_CU_RTQ': primera['PROM_CU_RTQ'],
+        'PROM_CU_COM': primera[f'PROM_CU_{suf}'],
+        'DIF_PROM_CU_$': primera['DIF_PROM_CU_$'],
+        'DIF_PROM_CU_%': primera['DIF_PROM_CU_%'],
+        'HOJA': hoja
+    }
+
+
+def procesar_mercado(
+    mercado: Any,
+    df_mercado: pd.DataFrame,
+    niveles: Dict[Any, List[Any]],
+    directorio_salida: str,
+    periodo_inicio: Optional[str] = None,
+    periodo_fin: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Compara todas las combinaciones de un mercado y escribe su libro de resultados.
+
+    Se ejecuta en un proceso del pool: recibe solo las filas del mercado.
+
+    Args:
+        mercado: Mercado a procesar.
+        df_mercado: Filas del mercado (deduplicadas, ver `IndiceGrupos.df`).
+        niveles: Comercializadores por nivel de tensión ({nt: [comercializadores]}).
+        directorio_salida: Carpeta donde se escribe el libro del mercado.
+        periodo_inicio: Periodo de inicio (formato: YYYY-MM).
+        periodo_fin: Periodo final (formato: YYYY-MM).
+
+    Returns:
+        Diccionario con las filas del resumen, el número de combinaciones con datos,
+        los errores de comparación, la ruta del libro y los segundos de comparación y escritura.
+    """
+    inicio = time.perf_counter()
+    indice = IndiceGrupos(df_mercado)
+    resultados: List[Tuple[Any, str, pd.DataFrame]] = []
+    errores: List[str] = []
+    for nt, comercializadores in niveles.items():
+        comparacion = comparar_cu_multiple(
+            df_mercado, mercado, comercializadores, nt, periodo_inicio, periodo_fin, indice_grupos=indice
+        )
+        if comparacion.error:
+            errores.append(f"NT {nt}: {comparacion.error}")
+        por_comercializador = comparacion.datos or {}
+        resultados.extend((nt, com, df) for com, df in por_comercializador.items())
+    segundos_comparacion = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    filas_resumen = []
+    ruta = None
+    if resultados:
+        ruta = Path(directorio_salida) / _nombre_archivo(mercado)
+        usados = {NOMBRE_HOJA_RESUMEN.lower()}
+        hojas = []
+        for nt, com, df_resultado in resultados:
+            hoja = _nombre_hoja(nt, com, usados)
+            hojas.append((hoja, df_resultado))
+            filas_resumen.append(_fila_resumen(mercado, nt, com, df_resultado, hoja))
+        with pd.ExcelWriter(ruta, engine='openpyxl') as writer:
+            pd.DataFrame(filas_resumen).to_excel(writer, index=False, sheet_name=NOMBRE_HOJA_RESUMEN)
+            for hoja, df_resultado in hojas:
+                df_resultado.to_excel(writer, index=False, sheet_name=hoja)
+    segundos_escritura = time.perf_counter() - inicio
+
+    return {
+        'mercado': mercado,
+        'filas_resumen': filas_resumen,
+        'combinaciones': len(resultados),
+        'errores': errores,
+        'archivo': str(ruta) if ruta else None,
+        'segundos_comparacion': segundos_comparacion,
+        'segundos_escritura': segundos_escritura
+    }
+
+
+def generar_reporte_lote(
+    df_tarifas: pd.DataFrame,
+    directorio_salida: str,
+    periodo_inicio: Optional[str] = None,
+    periodo_fin: Optional[str] = None,
+    procesos: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Genera el reporte de todas las combinaciones en un pool de procesos.
+
+    Escribe un libro por mercado (hoja de resumen más una hoja por NT y
+    comercializador) y un libro de resumen general en `directorio_salida`.
+
+    Args:
+        df_tarifas: DataFrame procesado de tarifas.
+        directorio_salida: Carpeta de salida (se crea si no existe).
+        periodo_inicio: Periodo de inicio (formato: YYYY-MM); None para todos.
+        periodo_fin: Periodo final (formato: YYYY-MM); None para todos.
+        procesos: Número de procesos del pool (por defecto, los núcleos disponibles).
+
+    Returns:
+        Diccionario con el número de combinaciones, errores, archivos generados, segundos por
+        etapa (índice, comparación, resumen, total) y combinaciones por segundo.
+    """
+    tiempos = {}
+    inicio_total = time.perf_counter()
+    Path(directorio_salida).mkdir(parents=True, exist_ok=True)
+
+    inicio = time.perf_counter()
+    indice = IndiceGrupos(df_tarifas)
+    combinaciones = enumerar_combinaciones(indice)
+    # Cada proceso recibe solo las filas de su mercado
+    df_indice = indice.df
+    por_mercado = {mercado: grupo for mercado, grupo in df_indice.groupby('MERCADO', observed=True, sort=False)}
+    tiempos['indice'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultados = []
+    procesos = procesos or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = [
+            pool.submit(
+                procesar_mercado, mercado, por_mercado[mercado], niveles,
+                directorio_salida, periodo_inicio, periodo_fin
+            )
+            for mercado, niveles in combinaciones.items()
+        ]
+        for futuro in as_completed(futuros):
+            resultados.append(futuro.result())
+    tiempos['comparacion'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    filas_resumen = [fila for resultado in resultados for fila in resultado['filas_resumen']]
+    archivos = sorted(r['archivo'] for r in resultados if r['archivo'])
+    if filas_resumen:
+        df_resumen = pd.DataFrame(filas_resumen).sort_values(['MERCADO', 'NT', 'COMERCIALIZADOR'], key=lambda s: s.astype(str))
+        ruta_resumen = Path(directorio_salida) / NOMBRE_ARCHIVO_RESUMEN
+        df_resumen.to_excel(ruta_resumen, index=False, sheet_name=NOMBRE_HOJA_RESUMEN, engine='openpyxl')
+        archivos.append(str(ruta_resumen))
+    tiempos['resumen'] = time.perf_counter() - inicio
+    tiempos['total'] = time.perf_counter() - inicio_total
+
+    total_combinaciones = sum(r['combinaciones'] for r in resultados)
+    return {
+        'combinaciones': total_combinaciones,
+        'errores': [f"{r['mercado']} - {error}" for r in resultados for error in r['errores']],
+        'combinaciones_enumeradas': sum(len(coms) for niveles in combinaciones.values() for coms in niveles.values()),
+        'mercados': len(combinaciones),
+        'procesos': procesos,
+        'archivos': archivos,
+        'segundos': tiempos,
+        'segundos_comparacion_procesos': sum(r['segundos_comparacion'] for r in resultados),
+        'segundos_escritura_procesos': sum(r['segundos_escritura'] for r in resultados),
+        'combinaciones_por_segundo': total_combinaciones / tiempos['comparacion'] if tiempos['comparacion'] > 0 else 0.0
+    }
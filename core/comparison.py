@@ -0,0 +1,459 @@
+"""Módulo para la comparación de tarifas entre comercializadores."""
+
+import numpy as np
+import pandas as pd
+from collections.abc import Sequence
+from typing import Optional, Any, List, Tuple
+
+from core.data_processing import normalizar_periodo, vista_fechas
+from core.group_index import IndiceGrupos
+from core.period_index import IndicePeriodos
+from core.resultado import ResultadoCalculo
+
+class MensajesAnalisis(Sequence):
+    """
+    Mensajes del análisis periodo a periodo, generados solo cuando se recorren.
+    
+    Guarda los mensajes de cabecera ya construidos y, para el análisis acumulado,
+    solo los arreglos de fechas y promedios; el texto de cada periodo se formatea
+    al iterar (por ejemplo, al mostrarlos en la interfaz).
+    """
+
+    def __init__(self, cabecera: List[str], fechas: np.ndarray, prom_rtq: np.ndarray, prom_sel: np.ndarray, suf: str):
+        self._cabecera = list(cabecera)
+        self._fechas = fechas
+        self._prom_rtq = prom_rtq
+        self._prom_sel = prom_sel
+        self._suf = suf
+
+    def __len__(self) -> int:
+        return len(self._cabecera) + len(self._fechas)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return [self[i] for i in range(*indice.indices(len(self)))]
+        if indice < 0:
+            indice += len(self)
+        if not 0 <= indice < len(self):
+            raise IndexError(indice)
+        if indice < len(self._cabecera):
+            return self._cabecera[indice]
+        i = indice - len(self._cabecera)
+        fecha, prom_rtq, prom_sel, suf = self._fechas[i], self._prom_rtq[i], self._prom_sel[i], self._suf
+        if prom_rtq < prom_sel:
+            return f"✅ {fecha} -> Exitoso (per. #{i + 1}: PROM_RTQ={prom_rtq:.2f} < PROM_{suf}={prom_sel:.2f})"
+        return f"❌ {fecha} -> Atención! (per. #{i + 1}: PROM_RTQ={prom_rtq:.2f} > PROM_{suf}={prom_sel:.2f})"
+
+
+COMERCIALIZADOR_BASE = "RUITOQUE"
+COLUMNAS_DEDUPLICACION = ["FECHA", "COMERCIALIZADOR", "MERCADO", "NT", "CU", "G", "C"]
+COLUMNAS_REQUERIDAS = ["FECHA", "CU", "G", "C"]
+AGREGACION_PERIODO = {
+    'G': 'mean',
+    'C': 'mean',
+    'CU': 'mean',
+    'MERCADO': 'first',
+    'NT': 'first'
+}
+
+
+def _filas_mercado_nt(df_tarifas: pd.DataFrame, mercado: str, nt: str) -> pd.DataFrame:
+    """Filas deduplicadas y completas de un mercado y nivel de tensión (camino sin índice)."""
+    df = (
+        df_tarifas
+        .drop_duplicates(subset=COLUMNAS_DEDUPLICACION)
+        .dropna(subset=COLUMNAS_REQUERIDAS)
+    )
+    return df[(df["MERCADO"] == mercado) & (df["NT"] == nt)]
+
+
+def _agregar_por_periodo(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Agrupa por FECHA tomando el promedio si hay múltiples registros para el mismo periodo.
+    
+    Esto asegura que no se pierdan periodos por duplicados. Con el esquema compacto FECHA
+    es un índice mensual entero: la serie agregada (pocas filas) pasa a 'YYYY-MM' para que
+    el resultado se muestre igual que siempre.
+    """
+    df_agg = df.groupby('FECHA').agg(AGREGACION_PERIODO).reset_index()
+    df_agg['FECHA'] = vista_fechas(df_agg['FECHA'])
+    return df_agg
+
+
+def _construir_comparacion(
+    df_rtq_agg: pd.DataFrame,
+    df_sel_agg: pd.DataFrame,
+    comercializador_seleccionado: str,
+    nt_seleccionado: str,
+    periodo_inicio: Any = None,
+    periodo_fin: Any = None
+) -> Tuple[Optional[pd.DataFrame], Sequence]:
+    """
+    Construye el resultado de la comparación a partir de las series ya agregadas por periodo.
+    
+    Args:
+        df_rtq_agg: Serie mensual de RUITOQUE (ver `_agregar_por_periodo()`).
+        df_sel_agg: Serie mensual del comercializador comparado.
+        comercializador_seleccionado: Comercializador comparado.
+        nt_seleccionado: Nivel de tensión.
+        periodo_inicio: Periodo de inicio (formato: YYYY-MM o índice mensual).
+        periodo_fin: Periodo final (formato: YYYY-MM o índice mensual).
+    
+    Returns:
+        Tupla (DataFrame con la comparación o None si no hay periodos, mensajes del análisis).
+    """
+    mensajes_analisis = []
+    periodo_inicio = normalizar_periodo(periodo_inicio, df_rtq_agg['FECHA'])
+    periodo_fin = normalizar_periodo(periodo_fin, df_rtq_agg['FECHA'])
+
+    # Información de depuración: mostrar periodos disponibles en cada comercializador
+    fechas_rtq = set(df_rtq_agg['FECHA'].unique())
+    fechas_sel = set(df_sel_agg['FECHA'].unique())
+    fechas_solo_rtq = fechas_rtq - fechas_sel
+    fechas_solo_sel = fechas_sel - fechas_rtq
+    
+    if fechas_solo_rtq:
+        mensajes_analisis.append(f"ℹ️ Periodos solo en RUITOQUE (no se incluirán): {sorted(fechas_solo_rtq)}")
+    if fechas_solo_sel:
+        mensajes_analisis.append(f"ℹ️ Periodos solo en {comercializador_seleccionado} (no se incluirán): {sorted(fechas_solo_sel)}")
+
+    suf = comercializador_seleccionado.replace(' ', '_')
+    df_cmp = pd.merge(
+        df_rtq_agg,
+        df_sel_agg,
+        on='FECHA',
+        suffixes=('_RTQ', f'_{suf}'),
+        how='inner'  # Solo periodos donde ambos tienen datos
+    ).sort_values('FECHA', ascending=False).reset_index(drop=True)
+
+    # Filtrar por rango de periodos si se especifica
+    if periodo_inicio and periodo_fin:
+        df_cmp = df_cmp[
+            (df_cmp['FECHA'] >= periodo_inicio) & 
+            (df_cmp['FECHA'] <= periodo_fin)
+        ].sort_values('FECHA', ascending=False).reset_index(drop=True)
+        
+        if df_cmp.empty:
+            mensajes_analisis.append(f"⚠️ No hay datos en el rango especificado ({periodo_inicio} a {periodo_fin})")
+            return None, mensajes_analisis
+        
+        mensajes_analisis.append(
+            f"📅 Analizando periodos desde {periodo_inicio} hasta {periodo_fin} ({len(df_cmp)} periodos selecionados)"
+        )
+    else:
+        mensajes_analisis.append(
+            f"📅 Analizando todos los periodos disponibles ({len(df_cmp)} periodos)"
+        )
+
+    if df_cmp.empty:
+        mensajes_analisis.append("⚠️ No hay periodos disponibles para analizar")
+        return None, mensajes_analisis
+
+    mensajes_analisis.append(
+        f"🔄 Iniciando análisis desde {df_cmp['FECHA'].iloc[0]} hacia atrás"
+    )
+
+    # Promedios acumulados desde el periodo más reciente hacia atrás (sumas acumuladas
+    # en lugar de recalcular la media en cada periodo); los mensajes se formatean al mostrarlos
+    conteo = np.arange(1, len(df_cmp) + 1)
+    mensajes_analisis = MensajesAnalisis(
+        mensajes_analisis,
+        fechas=df_cmp['FECHA'].to_numpy(),
+        prom_rtq=df_cmp['CU_RTQ'].to_numpy(dtype=np.float64).cumsum() / conteo,
+        prom_sel=df_cmp[f'CU_{suf}'].to_numpy(dtype=np.float64).cumsum() / conteo,
+        suf=suf
+    )
+
+    df_resultado = df_cmp.copy()
+    df_resultado['NT'] = nt_seleccionado
+
+    prom_rtq_final = df_resultado['CU_RTQ'].mean()
+    prom_sel_final = df_resultado[f'CU_{suf}'].mean()
+
+    # Agregar columna de estado (exitoso o no)
+    df_resultado['ESTADO'] = np.where(
+        df_resultado['CU_RTQ'] < df_resultado[f'CU_{suf}'], '✅ Exitoso', '❌ Atención'
+    )
+    
+    metrics = {
+        'DIF_CU_$': df_resultado[f'CU_{suf}'] - df_resultado['CU_RTQ'],
+        'DIF_CU_%': (df_resultado[f'CU_{suf}'] - df_resultado['CU_RTQ']) / df_resultado['CU_RTQ'] * 100,
+        'DIF_G_$': df_resultado[f'G_{suf}'] - df_resultado['G_RTQ'],
+        'DIF_G_%': (df_resultado[f'G_{suf}'] - df_resultado['G_RTQ']) / df_resultado['G_RTQ'] * 100,
+        'DIF_C_$': df_resultado[f'C_{suf}'] - df_resultado['C_RTQ'],
+        'DIF_C_%': (df_resultado[f'C_{suf}'] - df_resultado['C_RTQ']) / df_resultado['C_RTQ'] * 100,
+        'PROM_CU_RTQ': prom_rtq_final,
+        f'PROM_CU_{suf}': prom_sel_final,
+        'DIF_PROM_CU_$': prom_sel_final - prom_rtq_final,
+        'DIF_PROM_CU_%': (prom_sel_final - prom_rtq_final) / prom_rtq_final * 100
+    }
+    df_resultado = df_resultado.assign(**metrics)
+
+    cols = [
+        'FECHA',
+        'NT',
+        'ESTADO',
+        'CU_RTQ',
+        f'CU_{suf}',
+        'DIF_CU_$',
+        'DIF_CU_%',
+        'G_RTQ',
+        f'G_{suf}',
+        'DIF_G_$',
+        'DIF_G_%',
+        'C_RTQ',
+        f'C_{suf}',
+        'DIF_C_$',
+        'DIF_C_%',
+        'PROM_CU_RTQ',
+        f'PROM_CU_{suf}',
+        'DIF_PROM_CU_$',
+        'DIF_PROM_CU_%'
+    ]
+    df_resultado = df_resultado[cols]
+    df_resultado = df_resultado.round(2)
+
+    return df_resultado, mensajes_analisis
+
+
+def comparar_cu(
+    df_tarifas: pd.DataFrame,
+    mercado_seleccionado: str,
+    comercializador_seleccionado: str,
+    nt_seleccionado: str,
+    periodo_inicio: str = None,
+    periodo_fin: str = None,
+    indice_grupos: Optional[IndiceGrupos] = None
+) -> ResultadoCalculo:
+    """
+    Compara el CU de RUITOQUE frente a otro comercializador en un rango de periodos específico.
+    
+    Args:
+        df_tarifas: DataFrame con los datos de tarifas.
+        mercado_seleccionado: Mercado a analizar.
+        comercializador_seleccionado: Comercializador para comparar.
+        nt_seleccionado: Nivel de tensión.
+        periodo_inicio: Periodo de inicio para la comparación (formato: YYYY-MM).
+        periodo_fin: Periodo final para la comparación (formato: YYYY-MM).
+        indice_grupos: Índice del dataset (ver `IndiceGrupos`). Si se proporciona, solo se
+                       leen las filas del mercado, NT y comercializadores comparados.
+    
+    El DataFrame de tarifas puede estar en el esquema compacto (ver `compactar_df_tarifas()`);
+    el resultado siempre tiene FECHA en formato YYYY-MM.
+    
+    Returns:
+        ResultadoCalculo con el DataFrame de la comparación en `datos` (None si no hay
+        periodos para comparar o hay error) y los mensajes del análisis en `mensajes`.
+    """
+    try:
+        if indice_grupos is not None:
+            # Porciones ya deduplicadas del índice: costo proporcional a su tamaño
+            df_rtq_full = indice_grupos.obtener(mercado_seleccionado, nt_seleccionado, COMERCIALIZADOR_BASE)
+            df_sel_full = indice_grupos.obtener(mercado_seleccionado, nt_seleccionado, comercializador_seleccionado)
+        else:
+            df = _filas_mercado_nt(df_tarifas, mercado_seleccionado, nt_seleccionado)
+            df_rtq_full = df[df["COMERCIALIZADOR"] == COMERCIALIZADOR_BASE].copy()
+            df_sel_full = df[df["COMERCIALIZADOR"] == comercializador_seleccionado].copy()
+
+        if df_rtq_full.empty or df_sel_full.empty:
+            return ResultadoCalculo(mensajes=["⚠️ No hay datos suficientes para comparar"])
+
+        df_resultado, mensajes_analisis = _construir_comparacion(
+            _agregar_por_periodo(df_rtq_full),
+            _agregar_por_periodo(df_sel_full),
+            comercializador_seleccionado,
+            nt_seleccionado,
+            periodo_inicio,
+            periodo_fin
+        )
+        return ResultadoCalculo(datos=df_resultado, mensajes=mensajes_analisis)
+
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error en la comparación: {str(e)}")
+
+
+def comparar_cu_multiple(
+    df_tarifas: pd.DataFrame,
+    mercado_seleccionado: str,
+    comercializadores: List[str],
+    nt_seleccionado: str,
+    periodo_inicio: str = None,
+    periodo_fin: str = None,
+    indice_grupos: Optional[IndiceGrupos] = None
+) -> ResultadoCalculo:
+    """
+    Compara el CU de RUITOQUE frente a varios comercializadores en una sola pasada.
+    
+    La serie de RUITOQUE se agrega una sola vez y las de todos los comercializadores
+    en una única agrupación por (COMERCIALIZADOR, FECHA); cada resultado es idéntico
+    al que retornaría `comparar_cu()` para ese comercializador.
+    
+    Args:
+        df_tarifas: DataFrame con los datos de tarifas.
+        mercado_seleccionado: Mercado a analizar.
+        comercializadores: Comercializadores para comparar.
+        nt_seleccionado: Nivel de tensión.
+        periodo_inicio: Periodo de inicio para la comparación (formato: YYYY-MM).
+        periodo_fin: Periodo final para la comparación (formato: YYYY-MM).
+        indice_grupos: Índice del dataset (ver `IndiceGrupos`).
+    
+    Returns:
+        ResultadoCalculo con `datos` = {comercializador: DataFrame con la comparación},
+        solo con los comercializadores que tienen datos en el rango (None si hay error),
+        y `mensajes` = {comercializador: mensajes del análisis}.
+    """
+    try:
+        comercializadores = [c for c in dict.fromkeys(comercializadores) if c != COMERCIALIZADOR_BASE]
+
+        if indice_grupos is not None:
+            df_rtq_full = indice_grupos.obtener(mercado_seleccionado, nt_seleccionado, COMERCIALIZADOR_BASE)
+            porciones = [indice_grupos.obtener(mercado_seleccionado, nt_seleccionado, c) for c in comercializadores]
+            porciones = [p for p in porciones if not p.empty]
+            df_sel_full = pd.concat(porciones) if porciones else df_rtq_full.iloc[0:0]
+        else:
+            df = _filas_mercado_nt(df_tarifas, mercado_seleccionado, nt_seleccionado)
+            df_rtq_full = df[df["COMERCIALIZADOR"] == COMERCIALIZADOR_BASE]
+            df_sel_full = df[df["COMERCIALIZADOR"].isin(comercializadores)]
+
+        resultados = {}
+        mensajes_analisis = {}
+        if df_rtq_full.empty or df_sel_full.empty:
+            return ResultadoCalculo(datos=resultados, mensajes=mensajes_analisis)
+
+        df_rtq_agg = _agregar_por_periodo(df_rtq_full)
+
+        # Una sola agrupación para todos los comercializadores; luego se separa por grupo
+        df_sel_agg = (
+            df_sel_full
+            .groupby(['COMERCIALIZADOR', 'FECHA'], observed=True)
+            .agg(AGREGACION_PERIODO)
+            .reset_index()
+        )
+        df_sel_agg['FECHA'] = vista_fechas(df_sel_agg['FECHA'])
+        series = {
+            com: grupo.drop(columns='COMERCIALIZADOR').reset_index(drop=True)
+            for com, grupo in df_sel_agg.groupby('COMERCIALIZADOR', observed=True, sort=False)
+        }
+
+        for com in comercializadores:
+            if com not in series:
+                continue
+            df_resultado, mensajes = _construir_comparacion(
+                df_rtq_agg, series[com], com, nt_seleccionado, periodo_inicio, periodo_fin
+            )
+            if df_resultado is not None:
+                resultados[com] = df_resultado
+                mensajes_analisis[com] = mensajes
+
+        return ResultadoCalculo(datos=resultados, mensajes=mensajes_analisis)
+
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error en la comparación: {str(e)}")
+
+
+def calcular_promedios_periodo(
+    df_resultado: pd.DataFrame,
+    periodo_inicio: str = None,
+    periodo_fin: str = None,
+    indice_periodos: Optional[IndicePeriodos] = None
+) -> dict:
+    """
+    Calcula los promedios de CU para RUITOQUE y el competidor en un rango de periodos específico.
+    
+    Args:
+        df_resultado: DataFrame con los resultados de la comparación
+        periodo_inicio: Periodo de inicio para filtrar (formato: YYYY-MM)
+        periodo_fin: Periodo final para filtrar (formato: YYYY-MM)
+        indice_periodos: Índice del resultado (ver `IndicePeriodos`). Si se proporciona,
+                         los promedios salen de sus sumas acumuladas sin filtrar el DataFrame.
+    
+    Returns:
+        Diccionario con los promedios calculados
+    """
+    try:
+        if indice_periodos is not None:
+            return indice_periodos.promedios(periodo_inicio, periodo_fin)
+        
+        # Filtrar por rango de periodos si se especifica
+        df_filtrado = df_resultado.copy()
+        if periodo_inicio and periodo_fin:
+            df_filtrado = df_filtrado[
+                (df_filtrado['FECHA'] >= periodo_inicio) & 
+                (df_filtrado['FECHA'] <= periodo_fin)
+            ]
+        
+        if df_filtrado.empty:
+            return {
+                'promedio_rtq': 0,
+                'promedio_competidor': 0,
+                'diferencia_absoluta': 0,
+                'diferencia_porcentual': 0,
+                'periodos_analizados': 0
+            }
+        
+        # Identificar la columna del competidor
+        col_competidor = [col for col in df_filtrado.columns if col.startswith('CU_') and col != 'CU_RTQ'][0]
+        comercializador = col_competidor.replace('CU_', '')
+        
+        # Calcular promedios
+        promedio_rtq = df_filtrado['CU_RTQ'].mean()
+        promedio_competidor = df_filtrado[col_competidor].mean()
+        diferencia_absoluta = promedio_competidor - promedio_rtq
+        diferencia_porcentual = (diferencia_absoluta / promedio_rtq * 100) if promedio_rtq > 0 else 0
+        
+        return {
+            'promedio_rtq': round(promedio_rtq, 2),
+            'promedio_competidor': round(promedio_competidor, 2),
+            'diferencia_absoluta': round(diferencia_absoluta, 2),
+            'diferencia_porcentual': round(diferencia_porcentual, 2),
+            'periodos_analizados': len(df_filtrado),
+            'comercializador': comercializador
+        }
+        
+    except Exception as e:
+        print(f"Error al calcular promedios: {str(e)}")
+        return {
+            'promedio_rtq': 0,
+            'promedio_competidor': 0,
+            'diferencia_absoluta': 0,
+            'diferencia_porcentual': 0,
+            'periodos_analizados': 0
+        }
+
+
+def filtrar_resultados_por_periodo(
+    df_resultado: pd.DataFrame,
+    periodo_inicio: str = None,
+    periodo_fin: str = None,
+    indice_periodos: Optional[IndicePeriodos] = None
+) -> pd.DataFrame:
+    """
+    Filtra los resultados de comparación por un rango de periodos específico.
+    
+    Args:
+        df_resultado: DataFrame con los resultados de la comparación
+        periodo_inicio: Periodo de inicio para filtrar (formato: YYYY-MM)
+        periodo_fin: Periodo final para filtrar (formato: YYYY-MM)
+        indice_periodos: Índice del resultado (ver `IndicePeriodos`). Si se proporciona,
+                         se retorna una porción del DataFrame sin copia (de solo lectura).
+    
+    Returns:
+        DataFrame filtrado por el rango de periodos
+    """
+    try:
+        if indice_periodos is not None:
+            return indice_periodos.filtrar(periodo_inicio, periodo_fin)
+        
+        df_filtrado = df_resultado.copy()
+        
+        if periodo_inicio and periodo_fin:
+            df_filtrado = df_filtrado[
+                (df_filtrado['FECHA'] >= periodo_inicio) & 
+                (df_filtrado['FECHA'] <= periodo_fin)
+            ]
+        
+        return df_filtrado
+        
+    except Exception as e:
+        print(f"Error al filtrar resultados: {str(e)}")
+        return df_resultado 
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""Módulo para la matriz de competitividad de RUITOQUE en todos los mercados."""
+
+from typing import Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from core.data_processing import normalizar_periodo, vista_fechas
+from core.comparison import COMERCIALIZADOR_BASE, COLUMNAS_DEDUPLICACION, COLUMNAS_REQUERIDAS
+from core.resultado import ResultadoCalculo
+
+COLUMNAS_CLAVE = ['MERCADO', 'NT', 'COMERCIALIZADOR']
+MEDIDAS = ['CU', 'G', 'C']
+
+
+class MatrizCompetitividad:
+    """
+    Promedios mensuales de CU, G y C de todo el dataset, alineados contra RUITOQUE.
+
+    El pivote se construye una sola vez por versión del dataset: una fila por
+    (MERCADO, NT, COMERCIALIZADOR, FECHA) con los valores del comercializador y
+    los de RUITOQUE en el mismo mercado, NT y periodo. Calcular la matriz para una
+    ventana de periodos solo filtra y agrupa esa tabla, sin volver a recorrer el dataset.
+
+    Los valores mensuales se guardan redondeados a 2 decimales, como las filas que
+    retorna `comparar_cu()`: los promedios y diferencias de una ventana coinciden con
+    los de la vista de una comparación individual (`calcular_promedios_periodo()`),
+    salvo el último decimal cuando el promedio cae justo en medio centavo (el orden
+    de la suma cambia el redondeo).
+    El periodo exitoso se decide, igual que su ESTADO, con los valores sin redondear.
+    """
+
+    def __init__(self, df_tarifas: pd.DataFrame):
+        """
+        Construye el pivote mensual.
+
+        Args:
+            df_tarifas: DataFrame procesado de tarifas (esquema normal o compacto).
+        """
+        df = (
+            df_tarifas
+            .drop_duplicates(subset=COLUMNAS_DEDUPLICACION)
+            .dropna(subset=COLUMNAS_REQUERIDAS + COLUMNAS_CLAVE)
+        )
+        # Mismo promedio por periodo que `comparar_cu()`
+        mensual = (
+            df.groupby(COLUMNAS_CLAVE + ['FECHA'], observed=True)[MEDIDAS]
+            .mean()
+            .reset_index()
+        )
+
+        es_base = mensual['COMERCIALIZADOR'] == COMERCIALIZADOR_BASE
+        base = mensual[es_base].drop(columns='COMERCIALIZADOR')
+        # Solo periodos en los que ambos tienen datos (igual que la comparación individual)
+        pivote = mensual[~es_base].merge(
+            base, on=['MERCADO', 'NT', 'FECHA'], suffixes=('', '_RTQ'), how='inner'
+        )
+        pivote['EXITOSO'] = pivote['CU_RTQ'] < pivote['CU']
+        columnas_medidas = MEDIDAS + [f'{medida}_RTQ' for medida in MEDIDAS]
+        pivote[columnas_medidas] = pivote[columnas_medidas].round(2)
+        self._pivote = pivote
+        self.periodos: List[str] = sorted(vista_fechas(pd.Series(self._pivote['FECHA'].unique())).dropna())
+
+    def __len__(self) -> int:
+        return len(self._pivote)
+
+    @property
+    def pivote(self) -> pd.DataFrame:
+        """Pivote mensual (de solo lectura): valores del comercializador, columnas *_RTQ y EXITOSO por periodo."""
+        return self._pivote
+
+    def calcular(self, periodo_inicio: Any = None, periodo_fin: Any = None) -> pd.DataFrame:
+        """
+        Compara RUITOQUE contra cada comercializador de cada mercado y NT en una ventana.
+
+        Args:
+            periodo_inicio: Periodo de inicio (formato: YYYY-MM); None para no acotar.
+            periodo_fin: Periodo final (formato: YYYY-MM); None para no acotar.
+
+        Returns:
+            DataFrame con una fila por (MERCADO, NT, COMERCIALIZADOR): promedios de CU,
+            diferencias promedio ($ y %) de CU, G y C, y periodos exitosos para RUITOQUE.
+            Las diferencias son positivas cuando RUITOQUE es más barato.
+        """
+        pivote = self._pivote
+        fechas = pivote['FECHA']
+        mascara = np.ones(len(pivote), dtype=bool)
+        if periodo_inicio is not None:
+            mascara &= (fechas >= normalizar_periodo(periodo_inicio, fechas)).to_numpy()
+        if periodo_fin is not None:
+            mascara &= (fechas <= normalizar_periodo(periodo_fin, fechas)).to_numpy()
+        ventana = pivote[mascara]
+
+        columnas = {}
+        for medida in MEDIDAS:
+            columnas[f'DIF_{medida}'] = ventana[medida] - ventana[f'{medida}_RTQ']
+        ventana = ventana.assign(**columnas)
+
+        promedios = {
+            'PERIODOS': ('FECHA', 'size'),
+            'PERIODOS_EXITOSOS': ('EXITOSO', 'sum'),
+            'PROM_CU_RTQ': ('CU_RTQ', 'mean'),
+            'PROM_CU_COM': ('CU', 'mean')
+        }
+        for medida in MEDIDAS:
+            promedios[f'_PROM_{medida}_RTQ'] = (f'{medida}_RTQ', 'mean')
+            promedios[f'DIF_PROM_{medida}_$'] = (f'DIF_{medida}', 'mean')
+        matriz = ventana.groupby(COLUMNAS_CLAVE, observed=True, sort=True).agg(**promedios).reset_index()
+
+        # El promedio de las diferencias es la diferencia de los promedios (mismos periodos)
+        for medida in MEDIDAS:
+            matriz[f'DIF_PROM_{medida}_%'] = matriz[f'DIF_PROM_{medida}_$'] / matriz[f'_PROM_{medida}_RTQ'] * 100
+        matriz['PCT_EXITOSOS'] = matriz['PERIODOS_EXITOSOS'] / matriz['PERIODOS'] * 100
+
+        cols = [
+            'MERCADO',
+            'NT',
+            'COMERCIALIZADOR',
+            'PERIODOS',
+            'PERIODOS_EXITOSOS',
+            'PCT_EXITOSOS',
+            'PROM_CU_RTQ',
+            'PROM_CU_COM',
+            'DIF_PROM_CU_$',
+            'DIF_PROM_CU_%',
+            'DIF_PROM_G_$',
+            'DIF_PROM_G_%',
+            'DIF_PROM_C_$',
+            'DIF_PROM_C_%'
+        ]
+        return matriz[cols].round(2)
+
+
+def calcular_matriz_competitividad(
+    df_tarifas: pd.DataFrame,
+    periodo_inicio: str = None,
+    periodo_fin: str = None,
+    matriz: Optional[MatrizCompetitividad] = None
+) -> ResultadoCalculo:
+    """
+    Calcula la matriz de competitividad de RUITOQUE para un rango de periodos.
+
+    Args:
+        df_tarifas: DataFrame con los datos de tarifas.
+        periodo_inicio: Periodo de inicio (formato: YYYY-MM).
+        periodo_fin: Periodo final (formato: YYYY-MM).
+        matriz: Pivote ya construido para el dataset (ver `MatrizCompetitividad`); si no
+                se proporciona, se construye a partir de `df_tarifas`.
+
+    Returns:
+        ResultadoCalculo con la matriz en `datos` (None si hay error).
+    """
+    try:
+        if matriz is None:
+            matriz = MatrizCompetitividad(df_tarifas)
+        return ResultadoCalculo(datos=matriz.calcular(periodo_inicio, periodo_fin))
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error al calcular la matriz de competitividad: {str(e)}")
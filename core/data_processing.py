@@ -0,0 +1,367 @@
+"""Módulo para el procesamiento de datos de tarifas."""
+
+import pandas as pd
+from openpyxl import load_workbook
+import io
+import os
+import time
+from typing import Optional, Dict, Any, Callable, Iterator, List
+import numpy as np
+
+from config.settings import DATA_CONFIG
+from core.resultado import ResultadoCalculo
+from core.excel_reader import LectorTablaExcel, construir_columnas, leer_tabla_rapida
+
+MOTOR_RAPIDO = 'rapido'
+MOTOR_OPENPYXL = 'openpyxl'
+
+MODO_INGESTA_COMPLETA = 'completo'
+MODO_INGESTA_BLOQUES = 'bloques'
+
+MENSAJE_TABLA_CARGADA = "✅ Tabla 'TablaDatos' encontrada y cargada desde la hoja 'Hojadedatos'"
+
+def _abrir_origen_excel(file_content: Any) -> Any:
+    """
+    Normaliza el origen del archivo Excel sin duplicar su contenido en memoria.
+    
+    Args:
+        file_content: Bytes, ruta en disco o archivo binario abierto (BytesIO, SpooledTemporaryFile...).
+    
+    Returns:
+        Ruta o archivo que puede pasarse directamente a openpyxl.
+    """
+    if isinstance(file_content, (bytes, bytearray)):
+        return io.BytesIO(file_content)
+    if isinstance(file_content, (str, os.PathLike)):
+        return file_content
+    file_content.seek(0)
+    return file_content
+
+def cargar_tabla_desde_excel(
+    file_content: Any,
+    motor: Optional[str] = None,
+    progreso: Optional[Callable[[int, int], None]] = None
+) -> ResultadoCalculo:
+    """
+    Carga específicamente la tabla 'TablaDatos' desde la hoja 'Hojadedatos' del archivo Excel.
+    
+    Args:
+        file_content: Contenido del archivo Excel: bytes, ruta o archivo binario abierto.
+                      Los archivos se leen directamente, sin copiarlos a memoria.
+        motor: 'rapido' (lectura directa del XML) u 'openpyxl'. Por defecto usa `DATA_CONFIG`.
+               Si el lector rápido falla, se usa openpyxl como respaldo.
+        progreso: Función `progreso(filas_leidas, filas_totales)` (solo con el lector rápido).
+    
+    Returns:
+        ResultadoCalculo con el DataFrame cargado en `datos` (None si hay error).
+    """
+    motor = motor or DATA_CONFIG['motor_excel']
+    file = _abrir_origen_excel(file_content)
+    advertencias = []
+    
+    if motor == MOTOR_RAPIDO:
+        try:
+            df = leer_tabla_rapida(file, progreso=progreso)
+            return ResultadoCalculo(datos=df, mensajes=[MENSAJE_TABLA_CARGADA])
+        except Exception as e:
+            advertencias.append(f"⚠️ No se pudo usar el lector rápido ({str(e)}); se usará openpyxl")
+            file = _abrir_origen_excel(file_content)
+    
+    resultado = _cargar_tabla_openpyxl(file)
+    resultado.advertencias = advertencias + resultado.advertencias
+    return resultado
+
+def _cargar_tabla_openpyxl(file: Any) -> ResultadoCalculo:
+    """
+    Carga la tabla 'TablaDatos' abriendo el libro completo con openpyxl.
+    
+    Args:
+        file: Ruta o archivo binario abierto del libro.
+    
+    Returns:
+        ResultadoCalculo con el DataFrame cargado en `datos` (None si hay error).
+    """
+    try:
+        wb = load_workbook(file, data_only=True)
+        
+        if "Hojadedatos" not in wb.sheetnames:
+            return ResultadoCalculo(error="❌ No se encontró la hoja 'Hojadedatos' en el archivo")
+        
+        sheet = wb["Hojadedatos"]
+        
+        if "TablaDatos" not in sheet.tables:
+            return ResultadoCalculo(error="❌ No se encontró la tabla 'TablaDatos' en la hoja 'Hojadedatos'")
+        
+        table = sheet.tables["TablaDatos"]
+        table_range = table.ref
+        data = sheet[table_range]
+        rows = [[cell.value for cell in row] for row in data]
+        
+        if len(rows) < 2:
+            return ResultadoCalculo(error="❌ La tabla 'TablaDatos' está vacía")
+        
+        df = pd.DataFrame(rows[1:], columns=rows[0])
+        
+        return ResultadoCalculo(datos=df, mensajes=[MENSAJE_TABLA_CARGADA])
+        
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error al cargar la tabla: {str(e)}")
+
+def procesar_df_tarifas(df: pd.DataFrame) -> ResultadoCalculo:
+    """
+    Procesa el DataFrame de tarifas para obtener las columnas necesarias y realizar las transformaciones.
+    
+    Args:
+        df: DataFrame con los datos crudos.
+    
+    Returns:
+        ResultadoCalculo con el DataFrame procesado en `datos` (None si hay error).
+    """
+    try:
+        columnas_necesarias = {'MERCADO', 'FECHA', 'COMERCIALIZADOR', 'NT', 'G', 'C', 'CU'}
+        if not columnas_necesarias.issubset(df.columns):
+            return ResultadoCalculo(
+                mensajes=["ℹ️ Las columnas requeridas son: MERCADO, FECHA, COMERCIALIZADOR, NT, G, C, CU"],
+                error="❌ La tabla no contiene todas las columnas necesarias."
+            )
+
+        df['FECHA'] = pd.to_datetime(df['FECHA'])
+
+        columnas_numericas = ['G', 'C', 'CU']
+        for col in columnas_numericas:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+        columnas_orden = ['FECHA', 'MERCADO', 'COMERCIALIZADOR', 'NT', 'G', 'C', 'CU']
+        df = df[columnas_orden]
+        df['FECHA'] = df['FECHA'].dt.strftime('%Y-%m')
+
+        return ResultadoCalculo(datos=df)
+
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error al procesar los datos: {str(e)}")
+
+def periodo_a_indice(periodo: str) -> int:
+    """
+    Convierte un periodo 'YYYY-MM' en su índice mensual entero (año*12 + mes).
+    
+    Args:
+        periodo: Periodo en formato YYYY-MM.
+    
+    Returns:
+        Índice mensual del periodo.
+    """
+    anio, mes = str(periodo)[:7].split('-')
+    return int(anio) * 12 + int(mes)
+
+def indice_a_periodo(indice: int) -> str:
+    """
+    Convierte un índice mensual (año*12 + mes) en el periodo 'YYYY-MM' para visualización.
+    
+    Args:
+        indice: Índice mensual.
+    
+    Returns:
+        Periodo en formato YYYY-MM.
+    """
+    anio, mes = divmod(int(indice) - 1, 12)
+    return f"{anio:04d}-{mes + 1:02d}"
+
+def es_fecha_compacta(fechas: pd.Series) -> bool:
+    """Indica si la columna FECHA está en la forma compacta (índice mensual entero)."""
+    return pd.api.types.is_integer_dtype(fechas)
+
+def normalizar_periodo(periodo: Any, fechas: pd.Series) -> Any:
+    """
+    Expresa un periodo en la misma representación que la columna FECHA.
+    
+    Args:
+        periodo: Periodo como 'YYYY-MM' o índice mensual (o None).
+        fechas: Columna FECHA contra la que se va a comparar.
+    
+    Returns:
+        Índice mensual si FECHA es compacta, 'YYYY-MM' en caso contrario.
+    """
+    if periodo is None:
+        return None
+    if es_fecha_compacta(fechas):
+        return periodo if isinstance(periodo, (int, np.integer)) else periodo_a_indice(periodo)
+    return indice_a_periodo(periodo) if isinstance(periodo, (int, np.integer)) else periodo
+
+def vista_fechas(fechas: pd.Series) -> pd.Series:
+    """
+    Vista 'YYYY-MM' de la columna FECHA, solo para visualización.
+    
+    Args:
+        fechas: Columna FECHA en forma compacta o de texto.
+    
+    Returns:
+        Serie con los periodos como texto.
+    """
+    if not es_fecha_compacta(fechas):
+        return fechas
+    anio, mes = np.divmod(fechas.to_numpy(dtype=np.int64, na_value=0) - 1, 12)
+    texto = pd.Series(anio, index=fechas.index).astype(str).str.zfill(4) + '-' + pd.Series(mes + 1, index=fechas.index).astype(str).str.zfill(2)
+    return texto.where(fechas.notna())
+
+def compactar_df_tarifas(df: pd.DataFrame, medidas_float32: bool = False) -> pd.DataFrame:
+    """
+    Convierte el DataFrame procesado a una representación compacta en memoria.
+    
+    - MERCADO, COMERCIALIZADOR y NT como categóricas.
+    - FECHA como índice mensual entero (año*12 + mes); usar `vista_fechas()` para mostrarla.
+    - G, C y CU opcionalmente en float32.
+    
+    Args:
+        df: DataFrame procesado por `procesar_df_tarifas()`.
+        medidas_float32: Si True, las medidas se almacenan en float32.
+    
+    Returns:
+        Nuevo DataFrame compacto con las mismas columnas.
+    """
+    compacto = {}
+    for col in df.columns:
+        serie = df[col]
+        if col == 'FECHA' and not es_fecha_compacta(serie):
+            anio = pd.to_numeric(serie.str[:4], errors='coerce')
+            mes = pd.to_numeric(serie.str[5:7], errors='coerce')
+            indice = anio * 12 + mes
+            compacto[col] = indice.astype('Int32') if indice.isna().any() else indice.astype(np.int32)
+        elif col in ('MERCADO', 'COMERCIALIZADOR', 'NT'):
+            compacto[col] = serie.astype('category')
+        elif col in ('G', 'C', 'CU') and medidas_float32:
+            compacto[col] = serie.astype(np.float32)
+        else:
+            compacto[col] = serie
+    return pd.DataFrame(compacto, index=df.index)
+
+def reporte_memoria(df_original: pd.DataFrame, df_compacto: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Calcula el ahorro de memoria de la representación compacta.
+    
+    Args:
+        df_original: DataFrame procesado original.
+        df_compacto: DataFrame compacto.
+    
+    Returns:
+        Diccionario con bytes antes, después, ahorro en bytes y porcentaje.
+    """
+    bytes_original = int(df_original.memory_usage(deep=True).sum())
+    bytes_compacto = int(df_compacto.memory_usage(deep=True).sum())
+    ahorro = bytes_original - bytes_compacto
+    return {
+        'bytes_original': bytes_original,
+        'bytes_compacto': bytes_compacto,
+        'ahorro_bytes': ahorro,
+        'ahorro_porcentual': (ahorro / bytes_original * 100) if bytes_original else 0
+    }
+
+def iterar_bloques_tarifas(file_content: Any, tamano_bloque: Optional[int] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Lee la tabla 'TablaDatos' en bloques de tamaño fijo, ya con los tipos de `procesar_df_tarifas()`.
+    
+    Solo se mantiene en memoria un bloque de filas a la vez.
+    
+    Args:
+        file_content: Contenido del archivo Excel: bytes, ruta o archivo binario abierto.
+        tamano_bloque: Filas por bloque. Por defecto usa `DATA_CONFIG`.
+    
+    Yields:
+        Diccionario {columna: arreglo} con FECHA como 'YYYY-MM' y G, C, CU numéricos.
+    """
+    tamano_bloque = tamano_bloque or DATA_CONFIG['tamano_bloque']
+    with LectorTablaExcel(_abrir_origen_excel(file_content)) as lector:
+        bloque = []
+        for fila in lector.filas():
+            bloque.append(fila)
+            if len(bloque) == tamano_bloque:
+                yield _coercionar_bloque(lector, bloque)
+                bloque = []
+        if bloque:
+            yield _coercionar_bloque(lector, bloque)
+
+def _coercionar_bloque(lector: LectorTablaExcel, filas: List[tuple]) -> Dict[str, np.ndarray]:
+    """Convierte un bloque de filas en columnas con las transformaciones de `procesar_df_tarifas()`."""
+    columnas = construir_columnas(lector, [list(valores) for valores in zip(*filas)])
+    columnas['FECHA'] = pd.to_datetime(columnas['FECHA']).strftime('%Y-%m').to_numpy(dtype=object)
+    return columnas
+
+def cargar_tabla_por_bloques(
+    file_content: Any,
+    tamano_bloque: Optional[int] = None,
+    progreso: Optional[Callable[[int, int], None]] = None
+) -> ResultadoCalculo:
+    """
+    Carga y procesa la tabla de tarifas por bloques con memoria acotada.
+    
+    Cada bloque se convierte a sus tipos finales y se copia en buffers columnares
+    preasignados según el rango de la tabla, de modo que el pico de memoria es
+    proporcional al tamaño del bloque y no al de la tabla. El resultado es
+    equivalente a `procesar_df_tarifas(cargar_tabla_desde_excel(...))`.
+    
+    Args:
+        file_content: Contenido del archivo Excel: bytes, ruta o archivo binario abierto.
+        tamano_bloque: Filas por bloque. Por defecto usa `DATA_CONFIG`.
+        progreso: Función `progreso(filas_leidas, filas_totales)` invocada tras cada bloque.
+    
+    Returns:
+        ResultadoCalculo con el DataFrame procesado en `datos` (None si hay error).
+    """
+    try:
+        with LectorTablaExcel(_abrir_origen_excel(file_content)) as lector:
+            total_filas = lector.num_filas
+        
+        columnas_orden = ['FECHA', 'MERCADO', 'COMERCIALIZADOR', 'NT', 'G', 'C', 'CU']
+        buffers = {
+            col: np.empty(total_filas, dtype=np.float64 if col in ('G', 'C', 'CU') else object)
+            for col in columnas_orden
+        }
+        
+        posicion = 0
+        for bloque in iterar_bloques_tarifas(file_content, tamano_bloque):
+            n = len(bloque['FECHA'])
+            for col in columnas_orden:
+                buffers[col][posicion:posicion + n] = bloque[col]
+            posicion += n
+            if progreso:
+                progreso(posicion, total_filas)
+        
+        df = pd.DataFrame({col: buffers[col][:posicion] for col in columnas_orden})
+        # Recuperar tipos específicos en columnas de dimensión (p. ej. NT numérico)
+        df = df.infer_objects()
+        return ResultadoCalculo(
+            datos=df,
+            mensajes=["✅ Tabla 'TablaDatos' encontrada y cargada por bloques desde la hoja 'Hojadedatos'"]
+        )
+    
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error al cargar la tabla por bloques: {str(e)}")
+
+def comparar_motores_lectura(file_content: Any) -> Dict[str, Any]:
+    """
+    Compara los motores de lectura (rápido y openpyxl) sobre el mismo archivo.
+    
+    Args:
+        file_content: Contenido del archivo Excel: bytes, ruta o archivo binario abierto.
+    
+    Returns:
+        Diccionario con el tiempo de cada motor (segundos), el número de filas
+        y si ambos producen el mismo DataFrame procesado.
+    """
+    resultados = {}
+    procesados = {}
+    for motor in (MOTOR_RAPIDO, MOTOR_OPENPYXL):
+        inicio = time.perf_counter()
+        if motor == MOTOR_RAPIDO:
+            df = leer_tabla_rapida(_abrir_origen_excel(file_content))
+        else:
+            df = _cargar_tabla_openpyxl(_abrir_origen_excel(file_content)).datos
+        resultados[f'segundos_{motor}'] = time.perf_counter() - inicio
+        procesados[motor] = procesar_df_tarifas(df).datos if df is not None else None
+    
+    df_rapido, df_openpyxl = procesados[MOTOR_RAPIDO], procesados[MOTOR_OPENPYXL]
+    resultados['filas'] = len(df_rapido) if df_rapido is not None else 0
+    resultados['resultados_iguales'] = (
+        df_rapido is not None and df_openpyxl is not None
+        and df_rapido.reset_index(drop=True).equals(df_openpyxl.reset_index(drop=True))
+    )
+    return resultados
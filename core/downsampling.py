@@ -0,0 +1,52 @@
+"""Módulo para reducir el número de puntos de una serie antes de graficarla."""
+
+from typing import Optional
+
+import numpy as np
+
+
+def indices_lttb(y: np.ndarray, n_salida: int, x: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Índices de los puntos que conserva Largest-Triangle-Three-Buckets (LTTB).
+
+    Conserva el primer y el último punto y, en cada uno de los n_salida - 2 grupos
+    intermedios, el punto que forma el triángulo de mayor área con el punto elegido
+    en el grupo anterior y el promedio del grupo siguiente. Así se mantienen los picos
+    y valles que determinan la forma de la serie.
+
+    Args:
+        y: Valores de la serie.
+        n_salida: Número de puntos a conservar.
+        x: Posiciones de los puntos (por defecto, equiespaciadas).
+
+    Returns:
+        Arreglo ordenado de índices (todos si la serie ya tiene n_salida puntos o menos).
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_salida >= n or n_salida < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=np.float64) if x is None else np.asarray(x, dtype=np.float64)
+
+    # Límites de los grupos intermedios sobre los puntos 1 .. n-2
+    limites = np.linspace(1, n - 1, n_salida - 1).astype(np.int64)
+    indices = np.empty(n_salida, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_salida - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        if i + 2 < len(limites):
+            promedio_x = np.nanmean(x[fin:limites[i + 2]])
+            promedio_y = np.nanmean(y[fin:limites[i + 2]])
+        else:
+            promedio_x, promedio_y = x[-1], y[-1]
+
+        area = np.abs(
+            (x[a] - promedio_x) * (y[inicio:fin] - y[a])
+            - (x[a] - x[inicio:fin]) * (promedio_y - y[a])
+        )
+        a = inicio + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        indices[i + 1] = a
+
+    return indices
@@ -0,0 +1,145 @@
+"""Módulo para exportar los resultados de la comparación a Excel con un escritor en streaming."""
+
+import io
+import re
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import pandas as pd
+from openpyxl import Workbook
+
+from core.resultado import ResultadoCalculo
+
+HOJA_COMPARACION = 'Comparacion'
+HOJA_RESUMEN = 'Resumen'
+LONGITUD_MAXIMA_HOJA = 31
+
+# Bloque de una hoja: título opcional y tabla
+Bloque = Tuple[Optional[str], pd.DataFrame]
+
+
+def _nombre_hoja(nombre: str, usados: Set[str]) -> str:
+    """Nombre de hoja válido para Excel (sin []:*?/\\, máximo 31 caracteres) y único en el libro."""
+    base = re.sub(r'[\[\]:*?/\\]', '_', str(nombre)).strip("'") or 'Hoja'
+    base = base[:LONGITUD_MAXIMA_HOJA]
+    candidato, n = base, 2
+    while candidato.lower() in usados:
+        sufijo = f" ({n})"
+        candidato = base[:LONGITUD_MAXIMA_HOJA - len(sufijo)] + sufijo
+        n += 1
+    usados.add(candidato.lower())
+    return candidato
+
+
+def _filas(df: pd.DataFrame) -> List[List[Any]]:
+    """Filas del DataFrame como listas de Python, con celdas vacías en lugar de NaN."""
+    return df.astype(object).where(df.notna(), None).to_numpy().tolist()
+
+
+def escribir_libro(hojas: Sequence[Tuple[str, Sequence[Bloque]]], destino: Any) -> None:
+    """
+    Escribe un libro con openpyxl en modo write_only (memoria constante).
+
+    Las filas se escriben en orden y no se mantienen en memoria: cada hoja es una
+    secuencia de bloques (título opcional, encabezado y filas) separados por una fila vacía.
+
+    Args:
+        hojas: Lista de (nombre de hoja, [(título, DataFrame), ...]) en el orden del libro.
+        destino: Ruta o archivo binario donde se guarda el libro.
+    """
+    libro = Workbook(write_only=True)
+    usados: Set[str] = set()
+    for nombre, bloques in hojas:
+        hoja = libro.create_sheet(_nombre_hoja(nombre, usados))
+        for i, (titulo, df) in enumerate(bloques):
+            if i > 0:
+                hoja.append([])
+            if titulo:
+                hoja.append([titulo])
+            hoja.append([str(col) for col in df.columns])
+            for fila in _filas(df):
+                hoja.append(fila)
+    libro.save(destino)
+
+
+def generar_excel_comparacion(df_resultado: pd.DataFrame) -> ResultadoCalculo:
+    """
+    Genera el Excel de una comparación (una hoja, igual que la descarga individual).
+
+    Args:
+        df_resultado: DataFrame de la comparación ya filtrado al rango de periodos.
+
+    Returns:
+        ResultadoCalculo con el contenido del archivo (bytes) en `datos`.
+    """
+    try:
+        salida = io.BytesIO()
+        escribir_libro([(HOJA_COMPARACION, [(None, df_resultado)])], salida)
+        return ResultadoCalculo(datos=salida.getvalue())
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error al generar el archivo Excel: {str(e)}")
+
+
+def tabla_promedios(
+    promedios: Dict[str, Dict[str, Any]],
+    mercado: Any,
+    nt: Any,
+    periodo_inicio: str,
+    periodo_fin: str
+) -> pd.DataFrame:
+    """
+    Tabla de promedios por comercializador para la hoja de resumen.
+
+    Args:
+        promedios: Diccionario {comercializador: resultado de `calcular_promedios_periodo()`}.
+        mercado: Mercado de la comparación.
+        nt: Nivel de tensión de la comparación.
+        periodo_inicio: Periodo inicial del rango (formato: YYYY-MM).
+        periodo_fin: Periodo final del rango (formato: YYYY-MM).
+
+    Returns:
+        DataFrame con una fila por comercializador.
+    """
+    return pd.DataFrame([
+        {
+            'MERCADO': mercado,
+            'NT': nt,
+            'PERIODO_INICIO': periodo_inicio,
+            'PERIODO_FIN': periodo_fin,
+            'COMERCIALIZADOR': com,
+            'PERIODOS': valores['periodos_analizados'],
+            'PROMEDIO_CU_RTQ': valores['promedio_rtq'],
+            'PROMEDIO_CU_COM': valores['promedio_competidor'],
+            'DIFERENCIA_$': valores['diferencia_absoluta'],
+            'DIFERENCIA_%': valores['diferencia_porcentual']
+        }
+        for com, valores in promedios.items()
+    ])
+
+
+def generar_excel_consolidado(
+    resultados: Dict[str, pd.DataFrame],
+    promedios: pd.DataFrame,
+    tabla_ahorro: Optional[pd.DataFrame] = None
+) -> ResultadoCalculo:
+    """
+    Genera un solo libro con una hoja de resumen y una hoja por comercializador.
+
+    Args:
+        resultados: Diccionario {comercializador: DataFrame ya filtrado al rango de periodos}.
+        promedios: Tabla de promedios (ver `tabla_promedios()`).
+        tabla_ahorro: Tabla de ahorro por consumo en formato largo (opcional, ver `CuboAhorro.tabla_larga()`).
+
+    Returns:
+        ResultadoCalculo con el contenido del archivo (bytes) en `datos`.
+    """
+    try:
+        resumen: List[Bloque] = [('Promedios del periodo seleccionado', promedios)]
+        if tabla_ahorro is not None:
+            resumen.append(('Tabla de ahorro por consumo', tabla_ahorro))
+        hojas = [(HOJA_RESUMEN, resumen)] + [(com, [(None, df)]) for com, df in resultados.items()]
+
+        salida = io.BytesIO()
+        escribir_libro(hojas, salida)
+        return ResultadoCalculo(datos=salida.getvalue())
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error al generar el archivo Excel: {str(e)}")
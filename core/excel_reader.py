@@ -0,0 +1,356 @@
+"""
+Lector rápido de la tabla 'TablaDatos' directamente desde el XML del archivo Excel.
+
+Evita cargar el libro completo con openpyxl (macros, estilos y demás hojas):
+abre el .xlsm como zip, resuelve la definición de la tabla y su rango (`ref`),
+y recorre con `iterparse` solo la hoja que la contiene y solo las columnas
+necesarias, construyendo columnas de NumPy directamente.
+"""
+
+import posixpath
+import re
+import zipfile
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+NS_REL_DOC = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_REL_PKG = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+HOJA_DATOS = "Hojadedatos"
+TABLA_DATOS = "TablaDatos"
+COLUMNAS_TARIFAS = ['MERCADO', 'FECHA', 'COMERCIALIZADOR', 'NT', 'G', 'C', 'CU']
+COLUMNAS_NUMERICAS = {'G', 'C', 'CU'}
+COLUMNAS_FECHA = {'FECHA'}
+
+# Filas leídas entre dos avisos de progreso
+FILAS_POR_AVISO = 10000
+
+_PATRON_CELDA = re.compile(r"([A-Z]+)(\d+)")
+
+
+class ErrorLecturaExcel(ValueError):
+    """Error de estructura del archivo que impide la lectura rápida de la tabla."""
+
+
+def _indice_columna(letras: str) -> int:
+    """Convierte letras de columna de Excel (A, B, ..., AA) en índice base 1."""
+    indice = 0
+    for letra in letras:
+        indice = indice * 26 + (ord(letra) - 64)
+    return indice
+
+
+def _parsear_ref(ref: str) -> Tuple[int, int, int, int]:
+    """Convierte un rango 'B3:K2053' en (columna_min, fila_min, columna_max, fila_max)."""
+    inicio, _, fin = ref.replace("$", "").partition(":")
+    fin = fin or inicio
+    m_ini, m_fin = _PATRON_CELDA.fullmatch(inicio), _PATRON_CELDA.fullmatch(fin)
+    if not m_ini or not m_fin:
+        raise ErrorLecturaExcel(f"Rango de tabla inválido: {ref}")
+    return (_indice_columna(m_ini.group(1)), int(m_ini.group(2)),
+            _indice_columna(m_fin.group(1)), int(m_fin.group(2)))
+
+
+def _resolver_destino(base: str, destino: str) -> str:
+    """Resuelve la ruta de una relación dentro del zip."""
+    if destino.startswith("/"):
+        return destino.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base), destino))
+
+
+def _leer_relaciones(zf: zipfile.ZipFile, ruta_parte: str) -> Dict[str, Tuple[str, str]]:
+    """Lee el archivo .rels de una parte y retorna {Id: (Type, ruta destino)}."""
+    ruta_rels = posixpath.join(posixpath.dirname(ruta_parte), "_rels", posixpath.basename(ruta_parte) + ".rels")
+    if ruta_rels not in zf.namelist():
+        return {}
+    raiz = ET.fromstring(zf.read(ruta_rels))
+    return {
+        rel.get("Id"): (rel.get("Type", ""), _resolver_destino(ruta_parte, rel.get("Target", "")))
+        for rel in raiz.iter(f"{NS_REL_PKG}Relationship")
+    }
+
+
+def _texto_si(si: ET.Element) -> str:
+    """Texto de un elemento de cadena compartida (simple o con formato enriquecido)."""
+    t = si.find(f"{NS_MAIN}t")
+    if t is not None:
+        return t.text or ""
+    return "".join(r.findtext(f"{NS_MAIN}t", default="") for r in si.iter(f"{NS_MAIN}r"))
+
+
+def _leer_cadenas_compartidas(zf: zipfile.ZipFile, ruta: Optional[str]) -> List[str]:
+    """Lee la tabla de cadenas compartidas en streaming."""
+    if not ruta or ruta not in zf.namelist():
+        return []
+    cadenas = []
+    with zf.open(ruta) as f:
+        for _, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag == f"{NS_MAIN}si":
+                cadenas.append(_texto_si(elem))
+                elem.clear()
+    return cadenas
+
+
+def _convertir_numero(texto: str) -> Any:
+    """Convierte el texto de una celda numérica igual que openpyxl (int si no tiene decimales)."""
+    if "." in texto or "E" in texto or "e" in texto:
+        return float(texto)
+    return int(texto)
+
+
+class LectorTablaExcel:
+    """
+    Lector en streaming de una tabla de Excel a partir del XML del archivo.
+
+    Uso:
+        with LectorTablaExcel(archivo) as lector:
+            for fila in lector.filas():
+                ...
+    """
+
+    def __init__(self, origen: Any, hoja: str = HOJA_DATOS, tabla: str = TABLA_DATOS,
+                 columnas: Sequence[str] = COLUMNAS_TARIFAS):
+        """
+        Abre el archivo y resuelve la tabla, su hoja y su rango.
+
+        Args:
+            origen: Ruta o archivo binario abierto del .xlsx/.xlsm.
+            hoja: Nombre de la hoja que contiene la tabla.
+            tabla: Nombre de la tabla de Excel.
+            columnas: Encabezados de las columnas a extraer.
+
+        Raises:
+            ErrorLecturaExcel: Si el archivo no tiene la estructura esperada.
+        """
+        if hasattr(origen, "seek"):
+            origen.seek(0)
+        try:
+            self._zip = zipfile.ZipFile(origen)
+        except zipfile.BadZipFile as e:
+            raise ErrorLecturaExcel(f"El archivo no es un libro de Excel válido: {e}") from e
+        try:
+            self.columnas = list(columnas)
+            self._resolver(hoja, tabla)
+        except Exception:
+            self._zip.close()
+            raise
+
+    def __enter__(self) -> "LectorTablaExcel":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.cerrar()
+
+    def cerrar(self) -> None:
+        """Cierra el archivo zip subyacente."""
+        self._zip.close()
+
+    @property
+    def num_filas(self) -> int:
+        """Número de filas de datos de la tabla según su rango (sin encabezado)."""
+        return self._fila_max - self._fila_min
+
+    def _resolver(self, hoja: str, tabla: str) -> None:
+        """Ubica la hoja, la definición de la tabla, su rango y las cadenas compartidas."""
+        ruta_libro = "xl/workbook.xml"
+        libro = ET.fromstring(self._zip.read(ruta_libro))
+        rels_libro = _leer_relaciones(self._zip, ruta_libro)
+
+        pr = libro.find(f"{NS_MAIN}workbookPr")
+        self._fecha_1904 = pr is not None and pr.get("date1904") in ("1", "true")
+
+        id_hoja = None
+        for sheet in libro.iter(f"{NS_MAIN}sheet"):
+            if sheet.get("name") == hoja:
+                id_hoja = sheet.get(f"{NS_REL_DOC}id")
+                break
+        if id_hoja is None or id_hoja not in rels_libro:
+            raise ErrorLecturaExcel(f"No se encontró la hoja '{hoja}' en el archivo")
+        self._ruta_hoja = rels_libro[id_hoja][1]
+
+        ruta_sst = next((destino for tipo, destino in rels_libro.values() if tipo.endswith("/sharedStrings")), None)
+
+        ref = None
+        for tipo, destino in _leer_relaciones(self._zip, self._ruta_hoja).values():
+            if not tipo.endswith("/table"):
+                continue
+            definicion = ET.fromstring(self._zip.read(destino))
+            if tabla in (definicion.get("name"), definicion.get("displayName")):
+                ref = definicion.get("ref")
+                break
+        if ref is None:
+            raise ErrorLecturaExcel(f"No se encontró la tabla '{tabla}' en la hoja '{hoja}'")
+
+        self._col_min, self._fila_min, self._col_max, self._fila_max = _parsear_ref(ref)
+        if self._fila_max <= self._fila_min:
+            raise ErrorLecturaExcel(f"La tabla '{tabla}' está vacía")
+
+        self._cadenas = _leer_cadenas_compartidas(self._zip, ruta_sst)
+
+    def _valor_celda(self, celda: ET.Element) -> Any:
+        """Valor de una celda con los mismos tipos que retorna openpyxl (data_only=True)."""
+        tipo = celda.get("t", "n")
+        if tipo == "inlineStr":
+            nodo = celda.find(f"{NS_MAIN}is")
+            return _texto_si(nodo) if nodo is not None else None
+        valor = celda.findtext(f"{NS_MAIN}v")
+        if valor is None:
+            return None
+        if tipo == "s":
+            return self._cadenas[int(valor)]
+        if tipo == "n":
+            return _convertir_numero(valor)
+        if tipo == "b":
+            return valor == "1"
+        if tipo == "d":
+            return datetime.fromisoformat(valor)
+        # 'str' (resultado de fórmula) y 'e' (error, p. ej. '#N/A')
+        return valor
+
+    def _iterar_filas_crudas(self) -> Iterator[List[Any]]:
+        """Recorre las filas del rango de la tabla (incluido el encabezado) en streaming."""
+        ancho = self._col_max - self._col_min + 1
+        siguiente_fila = self._fila_min
+        with self._zip.open(self._ruta_hoja) as f:
+            datos_hoja = None
+            numero_fila = 0
+            for evento, elem in ET.iterparse(f, events=("start", "end")):
+                if evento == "start":
+                    if elem.tag == f"{NS_MAIN}sheetData":
+                        datos_hoja = elem
+                    continue
+                if elem.tag != f"{NS_MAIN}row":
+                    continue
+
+                numero_fila = int(elem.get("r", numero_fila + 1))
+                if numero_fila >= self._fila_min:
+                    # Filas ausentes en el XML equivalen a filas vacías
+                    while siguiente_fila < numero_fila and siguiente_fila <= self._fila_max:
+                        yield [None] * ancho
+                        siguiente_fila += 1
+                    if numero_fila > self._fila_max:
+                        break
+
+                    valores = [None] * ancho
+                    numero_col = 0
+                    for celda in elem.iter(f"{NS_MAIN}c"):
+                        ref = celda.get("r")
+                        numero_col = _indice_columna(_PATRON_CELDA.match(ref).group(1)) if ref else numero_col + 1
+                        if self._col_min <= numero_col <= self._col_max:
+                            valores[numero_col - self._col_min] = self._valor_celda(celda)
+                    yield valores
+                    siguiente_fila = numero_fila + 1
+
+                # Liberar las filas ya procesadas para mantener la memoria acotada
+                if datos_hoja is not None:
+                    datos_hoja.clear()
+
+        while siguiente_fila <= self._fila_max:
+            yield [None] * ancho
+            siguiente_fila += 1
+
+    def filas(self) -> Iterator[Tuple[Any, ...]]:
+        """
+        Itera las filas de datos de la tabla con solo las columnas solicitadas.
+
+        Yields:
+            Tupla de valores en el orden de `self.columnas`.
+
+        Raises:
+            ErrorLecturaExcel: Si faltan columnas en el encabezado de la tabla.
+        """
+        filas = self._iterar_filas_crudas()
+        encabezado = next(filas)
+        posiciones = []
+        for columna in self.columnas:
+            if columna not in encabezado:
+                raise ErrorLecturaExcel(f"La tabla no contiene la columna '{columna}'")
+            posiciones.append(encabezado.index(columna))
+        for valores in filas:
+            yield tuple(valores[p] for p in posiciones)
+
+    def serial_a_fecha(self, serial: np.ndarray) -> pd.DatetimeIndex:
+        """Convierte números de serie de Excel en fechas según el sistema del libro (1900/1904)."""
+        origen = "1904-01-01" if self._fecha_1904 else "1899-12-30"
+        return pd.to_datetime(serial, unit="D", origin=origen).round("us")
+
+
+def _es_serial(valor: Any) -> bool:
+    """Indica si un valor de celda es un número de serie de fecha (o una celda vacía)."""
+    return valor is None or (isinstance(valor, (int, float)) and not isinstance(valor, bool))
+
+
+def _a_float(valor: Any) -> float:
+    """Convierte un valor de celda en float como `pd.to_numeric(errors='coerce')`."""
+    if valor is None:
+        return np.nan
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def construir_columnas(lector: LectorTablaExcel, valores_por_columna: Sequence[List[Any]]) -> Dict[str, np.ndarray]:
+    """
+    Construye columnas de NumPy a partir de los valores leídos de cada columna.
+
+    Las medidas (G, C, CU) quedan en float64 con NaN para valores no numéricos
+    y FECHA en datetime64 cuando sus celdas son números de serie.
+
+    Args:
+        lector: Lector que produjo los valores (define columnas y sistema de fechas).
+        valores_por_columna: Una lista de valores por columna, en el orden de `lector.columnas`.
+
+    Returns:
+        Diccionario {columna: arreglo de NumPy}.
+    """
+    columnas = {}
+    for nombre, valores in zip(lector.columnas, valores_por_columna):
+        if nombre in COLUMNAS_NUMERICAS:
+            columnas[nombre] = np.fromiter((_a_float(v) for v in valores), dtype=np.float64, count=len(valores))
+        elif nombre in COLUMNAS_FECHA and all(_es_serial(v) for v in valores):
+            seriales = np.fromiter((_a_float(v) for v in valores), dtype=np.float64, count=len(valores))
+            columnas[nombre] = lector.serial_a_fecha(seriales).to_numpy()
+        else:
+            # Misma inferencia de tipos que al construir el DataFrame desde filas de openpyxl
+            columnas[nombre] = pd.Series(valores, dtype=None if valores else object).to_numpy()
+    return columnas
+
+
+def leer_tabla_rapida(origen: Any, hoja: str = HOJA_DATOS, tabla: str = TABLA_DATOS,
+                      columnas: Sequence[str] = COLUMNAS_TARIFAS,
+                      progreso: Optional[Callable[[int, int], None]] = None) -> pd.DataFrame:
+    """
+    Lee la tabla de datos con el lector rápido.
+
+    Args:
+        origen: Ruta o archivo binario abierto del .xlsx/.xlsm.
+        hoja: Nombre de la hoja que contiene la tabla.
+        tabla: Nombre de la tabla de Excel.
+        columnas: Encabezados de las columnas a extraer.
+        progreso: Función `progreso(filas_leidas, filas_totales)` invocada cada
+                  `FILAS_POR_AVISO` filas y al terminar.
+
+    Returns:
+        DataFrame con las columnas solicitadas.
+
+    Raises:
+        ErrorLecturaExcel: Si el archivo no tiene la estructura esperada.
+    """
+    with LectorTablaExcel(origen, hoja, tabla, columnas) as lector:
+        valores_por_columna = [[] for _ in lector.columnas]
+        filas_leidas = 0
+        for fila in lector.filas():
+            for valores, valor in zip(valores_por_columna, fila):
+                valores.append(valor)
+            filas_leidas += 1
+            if progreso and filas_leidas % FILAS_POR_AVISO == 0:
+                progreso(filas_leidas, lector.num_filas)
+        if progreso:
+            progreso(filas_leidas, lector.num_filas)
+        return pd.DataFrame(construir_columnas(lector, valores_por_columna), columns=lector.columnas)
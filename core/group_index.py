@@ -0,0 +1,73 @@
+"""Módulo para el índice de grupos (MERCADO, NT, COMERCIALIZADOR) del dataset de tarifas."""
+
+from typing import Any, Dict, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+COLUMNAS_CLAVE = ['MERCADO', 'NT', 'COMERCIALIZADOR']
+COLUMNAS_DEDUPLICACION = ["FECHA", "COMERCIALIZADOR", "MERCADO", "NT", "CU", "G", "C"]
+COLUMNAS_REQUERIDAS = ["FECHA", "CU", "G", "C"]
+
+
+class IndiceGrupos:
+    """
+    Índice del dataset por (MERCADO, NT, COMERCIALIZADOR).
+
+    Se construye una sola vez al cargar el dataset: elimina duplicados y filas
+    incompletas (igual que `comparar_cu()`), ordena por clave y FECHA, y guarda
+    para cada clave el rango contiguo de filas que le corresponde. Las consultas
+    retornan ese rango sin recorrer la tabla completa.
+    """
+
+    def __init__(self, df_tarifas: pd.DataFrame):
+        """
+        Construye el índice.
+
+        Args:
+            df_tarifas: DataFrame procesado de tarifas (esquema normal o compacto).
+        """
+        df = (
+            df_tarifas
+            .drop_duplicates(subset=COLUMNAS_DEDUPLICACION)
+            .dropna(subset=COLUMNAS_REQUERIDAS)
+        )
+        # Orden estable: dentro de cada grupo se conserva el orden original de las filas
+        df = df.sort_values(COLUMNAS_CLAVE + ['FECHA'], kind='stable').reset_index(drop=True)
+
+        codigos = df.groupby(COLUMNAS_CLAVE, sort=False, observed=True, dropna=True).ngroup().to_numpy()
+        inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]]) if len(codigos) else np.array([], dtype=int)
+        fines = np.r_[inicios[1:], len(codigos)]
+
+        self.df = df
+        self._rangos: Dict[Tuple[Any, Any, Any], Tuple[int, int]] = {}
+        claves = df[COLUMNAS_CLAVE].iloc[inicios].itertuples(index=False, name=None)
+        for clave, inicio, fin in zip(claves, inicios, fines):
+            if codigos[inicio] < 0:
+                continue  # Filas con alguna clave vacía
+            self._rangos[clave] = (int(inicio), int(fin))
+
+    def __len__(self) -> int:
+        return len(self._rangos)
+
+    def __contains__(self, clave: Tuple[Any, Any, Any]) -> bool:
+        return clave in self._rangos
+
+    def claves(self) -> Iterator[Tuple[Any, Any, Any]]:
+        """Itera las claves (MERCADO, NT, COMERCIALIZADOR) presentes en el dataset."""
+        return iter(self._rangos)
+
+    def obtener(self, mercado: Any, nt: Any, comercializador: Any) -> pd.DataFrame:
+        """
+        Obtiene las filas de una combinación, ya deduplicadas y ordenadas por FECHA.
+
+        Args:
+            mercado: Mercado.
+            nt: Nivel de tensión.
+            comercializador: Comercializador.
+
+        Returns:
+            Porción contigua del índice (vacía si la combinación no existe).
+        """
+        inicio, fin = self._rangos.get((mercado, nt, comercializador), (0, 0))
+        return self.df.iloc[inicio:fin]
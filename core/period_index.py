@@ -0,0 +1,170 @@
+"""Módulo para consultas por rango de periodos sobre un resultado de comparación."""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+MEDIDAS = ['CU', 'G', 'C']
+
+
+class IndicePeriodos:
+    """
+    Periodos ordenados y sumas acumuladas de un resultado de `comparar_cu()`.
+
+    Se construye una vez por resultado. Los promedios, diferencias y conteos de
+    cualquier rango [inicio, fin] salen de dos búsquedas binarias y una resta de
+    sumas acumuladas, y las vistas filtradas son porciones del DataFrame (sin copia).
+    """
+
+    def __init__(self, df_resultado: pd.DataFrame):
+        """
+        Construye el índice.
+
+        Args:
+            df_resultado: DataFrame de la comparación (FECHA en formato YYYY-MM, un periodo por fila).
+        """
+        # `comparar_cu()` ordena del periodo más reciente al más antiguo; otros órdenes se reordenan
+        periodos = pd.Index(df_resultado['FECHA'])
+        if not (periodos.is_monotonic_decreasing or periodos.is_monotonic_increasing):
+            df_resultado = df_resultado.sort_values('FECHA', ascending=False)
+        fechas = df_resultado['FECHA'].to_numpy()
+        self._descendente = len(fechas) > 1 and fechas[0] > fechas[-1]
+
+        self.df = df_resultado
+        self.col_competidor = [col for col in df_resultado.columns if col.startswith('CU_') and col != 'CU_RTQ'][0]
+        self.comercializador = self.col_competidor.replace('CU_', '')
+        suf = self.comercializador
+
+        orden = slice(None, None, -1) if self._descendente else slice(None)
+        self.fechas: np.ndarray = fechas[orden]
+        self._acumulados: Dict[str, np.ndarray] = {}
+        for medida in MEDIDAS:
+            for lado, col in (('RTQ', f'{medida}_RTQ'), ('COM', f'{medida}_{suf}')):
+                valores = df_resultado[col].to_numpy(dtype=np.float64)[orden]
+                self._acumulados[f'{medida}_{lado}'] = np.concatenate(([0.0], np.cumsum(valores)))
+        exitosos = (df_resultado['CU_RTQ'].to_numpy() < df_resultado[self.col_competidor].to_numpy())[orden]
+        self._acumulados['EXITOSOS'] = np.concatenate(([0], np.cumsum(exitosos)))
+
+    def __len__(self) -> int:
+        return len(self.fechas)
+
+    @property
+    def periodos(self) -> List[str]:
+        """Periodos disponibles en orden ascendente."""
+        return self.fechas.tolist()
+
+    def rango(self, periodo_inicio: Any = None, periodo_fin: Any = None) -> Tuple[int, int]:
+        """
+        Posiciones [a, b) del rango en el orden ascendente de periodos.
+
+        Igual que `filtrar_resultados_por_periodo()`, el rango solo se aplica si se
+        indican ambos extremos.
+
+        Args:
+            periodo_inicio: Periodo de inicio (formato: YYYY-MM).
+            periodo_fin: Periodo final (formato: YYYY-MM).
+
+        Returns:
+            Tupla (a, b) con a <= b.
+        """
+        if not (periodo_inicio and periodo_fin):
+            return 0, len(self.fechas)
+        a = int(np.searchsorted(self.fechas, periodo_inicio, side='left'))
+        b = int(np.searchsorted(self.fechas, periodo_fin, side='right'))
+        return a, max(a, b)
+
+    def contar(self, periodo_inicio: Any = None, periodo_fin: Any = None) -> int:
+        """Número de periodos en el rango."""
+        a, b = self.rango(periodo_inicio, periodo_fin)
+        return b - a
+
+    def suma(self, serie: str, periodo_inicio: Any = None, periodo_fin: Any = None) -> float:
+        """
+        Suma de una serie en el rango.
+
+        Args:
+            serie: 'CU_RTQ', 'CU_COM', 'G_RTQ', 'G_COM', 'C_RTQ', 'C_COM' o 'EXITOSOS'.
+            periodo_inicio: Periodo de inicio (formato: YYYY-MM).
+            periodo_fin: Periodo final (formato: YYYY-MM).
+
+        Returns:
+            Suma de la serie en el rango.
+        """
+        a, b = self.rango(periodo_inicio, periodo_fin)
+        acumulado = self._acumulados[serie]
+        return acumulado[b] - acumulado[a]
+
+    def sumas_ventanas(self, serie: str, periodos_inicio: Sequence[str], periodo_fin: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Sumas y número de periodos de una serie en varias ventanas que terminan en el mismo periodo.
+
+        Args:
+            serie: Nombre de la serie (ver `suma()`).
+            periodos_inicio: Periodo de inicio de cada ventana (formato: YYYY-MM).
+            periodo_fin: Periodo final común (formato: YYYY-MM).
+
+        Returns:
+            Tupla (sumas, conteos) con un elemento por ventana.
+        """
+        a = np.searchsorted(self.fechas, np.asarray(periodos_inicio, dtype=self.fechas.dtype), side='left')
+        b = np.maximum(a, np.searchsorted(self.fechas, periodo_fin, side='right'))
+        acumulado = self._acumulados[serie]
+        return acumulado[b] - acumulado[a], b - a
+
+    def promedio(self, serie: str, periodo_inicio: Any = None, periodo_fin: Any = None) -> Optional[float]:
+        """Promedio de una serie en el rango (None si el rango está vacío)."""
+        n = self.contar(periodo_inicio, periodo_fin)
+        return self.suma(serie, periodo_inicio, periodo_fin) / n if n else None
+
+    def promedios(self, periodo_inicio: Any = None, periodo_fin: Any = None) -> Dict[str, Any]:
+        """
+        Promedios de CU en el rango, con la misma estructura que `calcular_promedios_periodo()`.
+
+        Args:
+            periodo_inicio: Periodo de inicio (formato: YYYY-MM).
+            periodo_fin: Periodo final (formato: YYYY-MM).
+
+        Returns:
+            Diccionario con los promedios calculados.
+        """
+        n = self.contar(periodo_inicio, periodo_fin)
+        if n == 0:
+            return {
+                'promedio_rtq': 0,
+                'promedio_competidor': 0,
+                'diferencia_absoluta': 0,
+                'diferencia_porcentual': 0,
+                'periodos_analizados': 0
+            }
+
+        promedio_rtq = self.promedio('CU_RTQ', periodo_inicio, periodo_fin)
+        promedio_competidor = self.promedio('CU_COM', periodo_inicio, periodo_fin)
+        diferencia_absoluta = promedio_competidor - promedio_rtq
+        diferencia_porcentual = (diferencia_absoluta / promedio_rtq * 100) if promedio_rtq > 0 else 0
+
+        return {
+            'promedio_rtq': round(promedio_rtq, 2),
+            'promedio_competidor': round(promedio_competidor, 2),
+            'diferencia_absoluta': round(diferencia_absoluta, 2),
+            'diferencia_porcentual': round(diferencia_porcentual, 2),
+            'periodos_analizados': n,
+            'comercializador': self.comercializador
+        }
+
+    def filtrar(self, periodo_inicio: Any = None, periodo_fin: Any = None) -> pd.DataFrame:
+        """
+        Filas del rango como porción del DataFrame (sin copia, de solo lectura).
+
+        Args:
+            periodo_inicio: Periodo de inicio (formato: YYYY-MM).
+            periodo_fin: Periodo final (formato: YYYY-MM).
+
+        Returns:
+            Porción del DataFrame en su orden original.
+        """
+        a, b = self.rango(periodo_inicio, periodo_fin)
+        if self._descendente:
+            n = len(self.fechas)
+            return self.df.iloc[n - b:n - a]
+        return self.df.iloc[a:b]
@@ -0,0 +1,336 @@
+"""Módulo para el análisis de ahorro de una cartera de clientes con consumos mensuales."""
+
+import contextlib
+import csv
+import io
+import os
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config.settings import DATA_CONFIG
+from core.comparison import COMERCIALIZADOR_BASE
+from core.competitiveness import MatrizCompetitividad
+from core.data_processing import vista_fechas
+from core.resultado import ResultadoCalculo
+
+COLUMNA_CLIENTE = 'CLIENTE'
+COLUMNAS_GRUPO = ['MERCADO', 'NT', 'COMERCIALIZADOR']
+# Filas del detalle por cliente que se conservan en memoria para la vista previa
+FILAS_VISTA_PREVIA = 1000
+
+COLUMNAS_RESULTADO = [
+    COLUMNA_CLIENTE,
+    'MERCADO',
+    'NT',
+    'COMERCIALIZADOR',
+    'PERIODOS',
+    'PERIODOS_SIN_TARIFA',
+    'KWH',
+    'COSTO_COMERCIALIZADOR',
+    'COSTO_RUITOQUE',
+    'AHORRO',
+    'AHORRO_%'
+]
+
+
+def _normalizar_claves(mercado: pd.Series, nt: pd.Series, comercializador: pd.Series) -> pd.MultiIndex:
+    """
+    Representación común de (MERCADO, NT, COMERCIALIZADOR) para cruzar la cartera con las tarifas.
+
+    Los nombres se comparan sin espacios extremos y en mayúsculas; el NT numérico
+    (1, '1', 1.0) se expresa como entero.
+    """
+    def texto(serie: pd.Series) -> np.ndarray:
+        return serie.astype(str).str.strip().str.upper().to_numpy(dtype=object)
+
+    nt_numerico = pd.to_numeric(pd.Series(np.asarray(nt, dtype=object)), errors='coerce')
+    nt_texto = np.where(
+        nt_numerico.notna(),
+        nt_numerico.fillna(0).round().astype(np.int64).astype(str),
+        texto(pd.Series(np.asarray(nt, dtype=object)))
+    )
+    return pd.MultiIndex.from_arrays([texto(pd.Series(np.asarray(mercado, dtype=object))), nt_texto,
+                                      texto(pd.Series(np.asarray(comercializador, dtype=object)))])
+
+
+def _normalizar_periodos(columnas: List[Any]) -> List[Optional[str]]:
+    """Convierte los encabezados de periodo ('2024-01', '2024/01', fechas) a 'YYYY-MM'; None si no lo son."""
+    periodos = []
+    for columna in columnas:
+        if isinstance(columna, str):
+            texto = columna.strip().replace('/', '-')
+            fecha = pd.to_datetime(texto, format='%Y-%m', errors='coerce')
+            if pd.isna(fecha):
+                fecha = pd.to_datetime(texto[:10], format='%Y-%m-%d', errors='coerce')
+        else:
+            fecha = pd.to_datetime(columna, errors='coerce') if hasattr(columna, 'year') else pd.NaT
+        periodos.append(None if pd.isna(fecha) else fecha.strftime('%Y-%m'))
+    return periodos
+
+
+class TarifasCartera:
+    """
+    CU mensual de cada (MERCADO, NT, COMERCIALIZADOR) y de RUITOQUE, en matrices densas.
+
+    Filas: grupos (MERCADO, NT, COMERCIALIZADOR); columnas: periodos. Cruzar un bloque
+    de clientes es indexar las matrices con los códigos de grupo de cada cliente y los
+    códigos de periodo de cada columna de consumo, sin ningún merge por fila.
+    """
+
+    def __init__(self, matriz: MatrizCompetitividad):
+        """
+        Construye las matrices a partir del pivote de la matriz de competitividad.
+
+        Args:
+            matriz: MatrizCompetitividad del dataset (solo periodos con datos de ambos comercializadores).
+        """
+        pivote = matriz.pivote
+        claves = _normalizar_claves(pivote['MERCADO'], pivote['NT'], pivote['COMERCIALIZADOR'])
+        codigos_grupo, self.grupos = claves.factorize()
+        codigos_periodo, periodos = pd.factorize(vista_fechas(pivote['FECHA']).to_numpy(dtype=object), sort=True)
+        self.periodos = pd.Index(periodos)
+
+        forma = (len(self.grupos), len(self.periodos))
+        self.cu_comercializador = np.full(forma, np.nan)
+        self.cu_ruitoque = np.full(forma, np.nan)
+        # Redondeado como en `comparar_cu()`, para que coincida con el análisis de ahorro individual
+        self.cu_comercializador[codigos_grupo, codigos_periodo] = pivote['CU'].to_numpy(dtype=np.float64).round(2)
+        self.cu_ruitoque[codigos_grupo, codigos_periodo] = pivote['CU_RTQ'].to_numpy(dtype=np.float64).round(2)
+
+    def cruzar(self, claves: pd.MultiIndex, periodos: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        CU del comercializador y de RUITOQUE para cada cliente y periodo.
+
+        Args:
+            claves: Claves normalizadas de los clientes (ver `_normalizar_claves`).
+            periodos: Periodos 'YYYY-MM' de las columnas de consumo.
+
+        Returns:
+            Tupla de matrices (clientes × periodos) con NaN donde no hay tarifa.
+        """
+        g = self.grupos.get_indexer(claves)
+        t = self.periodos.get_indexer(periodos)
+        cu_com = self.cu_comercializador[np.ix_(g, t)]
+        cu_rtq = self.cu_ruitoque[np.ix_(g, t)]
+        # get_indexer marca con -1 lo que no existe: esa fila/columna no tiene tarifa
+        sin_tarifa = (g < 0)[:, np.newaxis] | (t < 0)[np.newaxis, :]
+        cu_com[sin_tarifa] = np.nan
+        cu_rtq[sin_tarifa] = np.nan
+        return cu_com, cu_rtq
+
+
+def _detectar_separador(origen: BinaryIO) -> str:
+    """Separador de un CSV (',' o ';') según su primera línea."""
+    primera = origen.readline().decode('utf-8-sig', errors='ignore')
+    origen.seek(0)
+    return ';' if primera.count(';') > primera.count(',') else ','
+
+
+def iterar_bloques_cartera(origen: Any, nombre_archivo: str, tamano_bloque: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lee el archivo de cartera (CSV o Excel) en bloques de clientes.
+
+    Formato: una fila por cliente con MERCADO, NT, COMERCIALIZADOR, opcionalmente
+    CLIENTE, y una columna por periodo ('YYYY-MM') con el consumo en kWh.
+    Solo se mantiene en memoria un bloque a la vez.
+
+    Args:
+        origen: Bytes, ruta o archivo binario abierto.
+        nombre_archivo: Nombre del archivo (la extensión decide el formato).
+        tamano_bloque: Clientes por bloque. Por defecto usa `DATA_CONFIG`.
+
+    Yields:
+        DataFrame con los encabezados originales (en mayúsculas los de texto).
+    """
+    tamano_bloque = tamano_bloque or DATA_CONFIG['tamano_bloque_cartera']
+    if isinstance(origen, (bytes, bytearray)):
+        origen = io.BytesIO(origen)
+    elif hasattr(origen, 'seek'):
+        origen.seek(0)
+
+    def encabezado(columna: Any) -> Any:
+        return columna.strip().upper() if isinstance(columna, str) else columna
+
+    if nombre_archivo.lower().endswith('.csv'):
+        with contextlib.ExitStack() as pila:
+            if isinstance(origen, (str, os.PathLike)):
+                origen = pila.enter_context(open(origen, 'rb'))
+            lector = pila.enter_context(pd.read_csv(
+                origen, sep=_detectar_separador(origen), chunksize=tamano_bloque,
+                encoding='utf-8-sig', dtype={COLUMNA_CLIENTE: str}
+            ))
+            for bloque in lector:
+                yield bloque.rename(columns=encabezado)
+        return
+
+    from openpyxl import load_workbook
+
+    libro = load_workbook(origen, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        columnas = [encabezado(c) for c in next(filas, ())]
+        bloque = []
+        for fila in filas:
+            if any(valor is not None for valor in fila):
+                bloque.append(fila)
+            if len(bloque) == tamano_bloque:
+                yield pd.DataFrame(bloque, columns=columnas)
+                bloque = []
+        if bloque:
+            yield pd.DataFrame(bloque, columns=columnas)
+    finally:
+        libro.close()
+
+
+def calcular_ahorro_bloque(bloque: pd.DataFrame, tarifas: TarifasCartera, primer_cliente: int = 1) -> pd.DataFrame:
+    """
+    Ahorro de cada cliente de un bloque si se cambia a RUITOQUE.
+
+    Para cada cliente: Σ(CU_COM × kWh) - Σ(CU_RTQ × kWh) sobre los periodos con consumo
+    y tarifa de ambos comercializadores (la misma fórmula de `calcular_ahorro_energia()`
+    con el consumo real de cada mes).
+
+    Args:
+        bloque: Bloque de `iterar_bloques_cartera()`.
+        tarifas: TarifasCartera del dataset.
+        primer_cliente: Número del primer cliente del bloque (si el archivo no trae CLIENTE).
+
+    Returns:
+        DataFrame con una fila por cliente y las columnas de `COLUMNAS_RESULTADO`.
+    """
+    faltantes = [col for col in COLUMNAS_GRUPO if col not in bloque.columns]
+    if faltantes:
+        raise ValueError(f"Faltan las columnas {', '.join(faltantes)} en el archivo de cartera")
+
+    periodos = _normalizar_periodos(list(bloque.columns))
+    columnas_consumo = [i for i, periodo in enumerate(periodos) if periodo is not None]
+    if not columnas_consumo:
+        raise ValueError("El archivo de cartera no tiene columnas de periodo (YYYY-MM)")
+
+    kwh = bloque.iloc[:, columnas_consumo].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64)
+    claves = _normalizar_claves(bloque['MERCADO'], bloque['NT'], bloque['COMERCIALIZADOR'])
+    cu_com, cu_rtq = tarifas.cruzar(claves, [periodos[i] for i in columnas_consumo])
+
+    # Multiplicar y reducir por fila, solo donde hay consumo y tarifa
+    con_consumo = ~np.isnan(kwh)
+    con_tarifa = ~np.isnan(cu_com) & ~np.isnan(cu_rtq)
+    usar = con_consumo & con_tarifa
+    kwh_usado = np.where(usar, kwh, 0.0)
+    costo_com = (np.where(usar, cu_com, 0.0) * kwh_usado).sum(axis=1)
+    costo_rtq = (np.where(usar, cu_rtq, 0.0) * kwh_usado).sum(axis=1)
+    ahorro = costo_com - costo_rtq
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ahorro_porcentual = np.where(costo_com > 0, ahorro / costo_com * 100, np.nan)
+
+    if COLUMNA_CLIENTE in bloque.columns:
+        clientes = bloque[COLUMNA_CLIENTE].to_numpy()
+    else:
+        clientes = np.arange(primer_cliente, primer_cliente + len(bloque))
+
+    return pd.DataFrame({
+        COLUMNA_CLIENTE: clientes,
+        'MERCADO': bloque['MERCADO'].to_numpy(),
+        'NT': bloque['NT'].to_numpy(),
+        'COMERCIALIZADOR': bloque['COMERCIALIZADOR'].to_numpy(),
+        'PERIODOS': usar.sum(axis=1),
+        'PERIODOS_SIN_TARIFA': (con_consumo & ~con_tarifa).sum(axis=1),
+        'KWH': kwh_usado.sum(axis=1),
+        'COSTO_COMERCIALIZADOR': costo_com,
+        'COSTO_RUITOQUE': costo_rtq,
+        'AHORRO': ahorro,
+        'AHORRO_%': ahorro_porcentual
+    })
+
+
+def analizar_cartera(
+    origen: Any,
+    nombre_archivo: str,
+    matriz: MatrizCompetitividad,
+    destino: BinaryIO,
+    tamano_bloque: Optional[int] = None,
+    tarifas: Optional[TarifasCartera] = None
+) -> ResultadoCalculo:
+    """
+    Calcula el ahorro de toda una cartera y escribe el detalle por cliente en `destino` como CSV.
+
+    El archivo se procesa bloque a bloque: el detalle de cada bloque se escribe en
+    cuanto se calcula y en memoria solo quedan el resumen por (MERCADO, NT,
+    COMERCIALIZADOR) y las primeras filas para la vista previa.
+
+    Args:
+        origen: Archivo de cartera (bytes, ruta o archivo binario abierto).
+        nombre_archivo: Nombre del archivo (.csv, .xlsx).
+        matriz: MatrizCompetitividad del dataset.
+        destino: Archivo binario donde se escribe el detalle por cliente.
+        tamano_bloque: Clientes por bloque. Por defecto usa `DATA_CONFIG`.
+        tarifas: TarifasCartera ya construidas para el dataset (opcional).
+
+    Returns:
+        ResultadoCalculo con un diccionario en `datos`: clientes, clientes_con_ahorro,
+        ahorro_total, resumen (DataFrame por grupo) y vista_previa (DataFrame).
+    """
+    try:
+        tarifas = tarifas or TarifasCartera(matriz)
+        texto = io.TextIOWrapper(destino, encoding='utf-8', newline='', write_through=True)
+        resumenes = []
+        vista_previa = []
+        clientes = 0
+        clientes_con_ahorro = 0
+        sin_tarifa = 0
+        clientes_base = 0
+        try:
+            for bloque in iterar_bloques_cartera(origen, nombre_archivo, tamano_bloque):
+                detalle = calcular_ahorro_bloque(bloque, tarifas, primer_cliente=clientes + 1)
+                detalle.to_csv(texto, index=False, header=clientes == 0, quoting=csv.QUOTE_MINIMAL)
+                if clientes < FILAS_VISTA_PREVIA:
+                    vista_previa.append(detalle.head(FILAS_VISTA_PREVIA - clientes))
+
+                clientes += len(detalle)
+                clientes_con_ahorro += int((detalle['AHORRO'] > 0).sum())
+                sin_tarifa += int((detalle['PERIODOS'] == 0).sum())
+                clientes_base += int(
+                    (detalle['COMERCIALIZADOR'].astype(str).str.strip().str.upper() == COMERCIALIZADOR_BASE).sum()
+                )
+                resumenes.append(
+                    detalle.assign(CLIENTES=1, CON_AHORRO=detalle['AHORRO'] > 0)
+                    .groupby(COLUMNAS_GRUPO, sort=False, dropna=False)[['CLIENTES', 'CON_AHORRO', 'KWH', 'COSTO_COMERCIALIZADOR', 'COSTO_RUITOQUE', 'AHORRO']]
+                    .sum()
+                )
+        finally:
+            # Entregar el destino al llamador sin cerrarlo
+            texto.detach()
+
+        if clientes == 0:
+            return ResultadoCalculo(error="❌ El archivo de cartera no tiene clientes")
+
+        resumen = pd.concat(resumenes).groupby(level=COLUMNAS_GRUPO, sort=True, dropna=False).sum().reset_index()
+        resumen['AHORRO_%'] = np.where(
+            resumen['COSTO_COMERCIALIZADOR'] > 0,
+            resumen['AHORRO'] / resumen['COSTO_COMERCIALIZADOR'] * 100,
+            np.nan
+        )
+
+        advertencias = []
+        if clientes_base:
+            advertencias.append(f"⚠️ {clientes_base:,} clientes ya están con {COMERCIALIZADOR_BASE}: no tienen ahorro que calcular")
+        if sin_tarifa > clientes_base:
+            advertencias.append(
+                f"⚠️ {sin_tarifa - clientes_base:,} clientes no tienen periodos con tarifa del comercializador y de "
+                f"{COMERCIALIZADOR_BASE} (revise MERCADO, NT, COMERCIALIZADOR y los periodos)"
+            )
+
+        return ResultadoCalculo(
+            datos={
+                'clientes': clientes,
+                'clientes_con_ahorro': clientes_con_ahorro,
+                'ahorro_total': float(resumen['AHORRO'].sum()),
+                'resumen': resumen,
+                'vista_previa': pd.concat(vista_previa, ignore_index=True)
+            },
+            advertencias=advertencias
+        )
+
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error al analizar la cartera: {str(e)}")
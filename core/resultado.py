@@ -0,0 +1,29 @@
+"""Módulo con el objeto de resultado que retornan los cálculos del núcleo."""
+
+from dataclasses import dataclass, field
+from typing import Any, List, Optional
+
+
+@dataclass
+class ResultadoCalculo:
+    """
+    Resultado de un cálculo del núcleo: datos, mensajes, advertencias y error.
+
+    El núcleo no muestra nada; la capa de Streamlit (o un script) decide cómo
+    presentar los mensajes, las advertencias y el error.
+
+    Attributes:
+        datos: Resultado del cálculo (DataFrame, diccionario...) o None si falló.
+        mensajes: Mensajes informativos (lista, secuencia o diccionario por comercializador).
+        advertencias: Avisos que no impiden obtener el resultado.
+        error: Descripción del error o None si el cálculo terminó bien.
+    """
+    datos: Any = None
+    mensajes: Any = field(default_factory=list)
+    advertencias: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def exitoso(self) -> bool:
+        """Indica si el cálculo terminó sin error y con datos."""
+        return self.error is None and self.datos is not None
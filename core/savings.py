@@ -0,0 +1,247 @@
+"""Módulo para el cálculo del ahorro en tarifas de energía."""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from core.data_processing import indice_a_periodo, periodo_a_indice
+from core.period_index import IndicePeriodos
+from core.resultado import ResultadoCalculo
+
+# Ventanas por defecto de la tabla de ahorro (últimos N meses)
+VENTANAS_AHORRO_MESES = [6, 12, 24]
+
+def calcular_ahorro_energia(
+    df_resultado: pd.DataFrame,
+    periodo_inicio: str,
+    periodo_fin: str,
+    consumo_promedio_kwh: float
+) -> ResultadoCalculo:
+    """
+    Calcula el ahorro total en energía comparando RUITOQUE vs otro comercializador.
+    
+    Args:
+        df_resultado: DataFrame con los resultados de la comparación
+        periodo_inicio: Periodo inicial del análisis (formato: YYYY-MM)
+        periodo_fin: Periodo final del análisis (formato: YYYY-MM)
+        consumo_promedio_kwh: Consumo promedio mensual del cliente en kWh
+    
+    Returns:
+        ResultadoCalculo con el diccionario del análisis de ahorro en `datos` (None si hay error)
+    """
+    try:
+        # Filtrar datos por el rango de periodos seleccionado
+        df_filtrado = df_resultado[
+            (df_resultado['FECHA'] >= periodo_inicio) & 
+            (df_resultado['FECHA'] <= periodo_fin)
+        ].copy()
+        
+        if df_filtrado.empty:
+            return ResultadoCalculo(error="❌ No hay datos disponibles para el rango de periodos seleccionado")
+        
+        # Verificar que el DataFrame tiene la estructura esperada (columnas con sufijos)
+        if 'CU_RTQ' not in df_filtrado.columns:
+            return ResultadoCalculo(error="❌ El DataFrame no tiene la estructura esperada. Falta la columna 'CU_RTQ'")
+        
+        # Identificar la columna del competidor
+        columnas_cu = [col for col in df_filtrado.columns if col.startswith('CU_') and col != 'CU_RTQ']
+        if not columnas_cu:
+            return ResultadoCalculo(error="❌ No se encontró la columna del competidor en los datos")
+        
+        col_competidor = columnas_cu[0]
+        competidor = col_competidor.replace('CU_', '')
+        
+        # Calcular costos totales por comercializador (sumatoria de todos los periodos)
+        # Fórmula: Σ(CU_mes_n × Consumo_Promedio) para cada comercializador
+        costo_total_ruitoque = (df_filtrado['CU_RTQ'] * consumo_promedio_kwh).sum()
+        costo_total_competidor = (df_filtrado[col_competidor] * consumo_promedio_kwh).sum()
+        
+        # Calcular ahorro total
+        # Ahorro = Σ(CU_mes_n × Consumo_Promedio)_Competidor - Σ(CU_mes_n × Consumo_Promedio)_RUITOQUE
+        ahorro_absoluto = costo_total_competidor - costo_total_ruitoque
+        ahorro_porcentual = (ahorro_absoluto / costo_total_competidor) * 100 if costo_total_competidor > 0 else 0
+        
+        # Calcular costos promedio por kWh (para referencia)
+        cu_promedio_ruitoque = df_filtrado['CU_RTQ'].mean()
+        cu_promedio_competidor = df_filtrado[col_competidor].mean()
+        
+        # Calcular ahorro por kWh (diferencia promedio)
+        ahorro_por_kwh = cu_promedio_competidor - cu_promedio_ruitoque
+        
+        # Calcular ahorro mensual promedio basado en la diferencia promedio
+        ahorro_mensual_promedio = ahorro_por_kwh * consumo_promedio_kwh
+        
+        # Calcular número total de periodos analizados
+        total_periodos = len(df_filtrado)
+        
+        # Preparar resultados
+        resultados = {
+            'periodo_inicio': periodo_inicio,
+            'periodo_fin': periodo_fin,
+            'periodos_analizados': len(df_filtrado['FECHA'].unique()),
+            'total_periodos': total_periodos,
+            'consumo_promedio_kwh': consumo_promedio_kwh,
+            'competidor': competidor,
+            'costo_total_ruitoque': costo_total_ruitoque,
+            'costo_total_competidor': costo_total_competidor,
+            'ahorro_absoluto': ahorro_absoluto,
+            'ahorro_porcentual': ahorro_porcentual,
+            'cu_promedio_ruitoque': cu_promedio_ruitoque,
+            'cu_promedio_competidor': cu_promedio_competidor,
+            'ahorro_por_kwh': ahorro_por_kwh,
+            'ahorro_mensual_promedio': ahorro_mensual_promedio,
+            'hay_ahorro': ahorro_absoluto > 0,
+            'df_detalle': df_filtrado,
+            'col_competidor': col_competidor
+        }
+        
+        return ResultadoCalculo(datos=resultados)
+        
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error al calcular el ahorro: {str(e)}")
+
+
+@dataclass
+class CuboAhorro:
+    """
+    Ahorro de RUITOQUE frente a varios comercializadores, consumos y ventanas.
+
+    Attributes:
+        comercializadores: Comercializadores comparados (eje 0).
+        consumos_kwh: Consumos promedio mensuales en kWh (eje 1).
+        ventanas_meses: Tamaño de cada ventana en meses (eje 2).
+        periodo_fin: Último periodo de todas las ventanas (formato: YYYY-MM).
+        ahorro: Arreglo (comercializador, consumo, ventana) con el ahorro total
+                Σ(CU_COM × consumo) - Σ(CU_RTQ × consumo); NaN si la ventana no tiene periodos.
+        ahorro_porcentual: Arreglo (comercializador, ventana) con el ahorro sobre el costo del
+                           competidor (%); no depende del consumo.
+        periodos: Arreglo (comercializador, ventana) con los periodos con datos de cada ventana.
+    """
+    comercializadores: List[str]
+    consumos_kwh: np.ndarray
+    ventanas_meses: List[int]
+    periodo_fin: str
+    ahorro: np.ndarray
+    ahorro_porcentual: np.ndarray
+    periodos: np.ndarray
+
+    def tabla(self, ventana_meses: int) -> pd.DataFrame:
+        """
+        Tabla de ahorro de una ventana: una fila por consumo y una columna por comercializador.
+
+        Args:
+            ventana_meses: Tamaño de la ventana (uno de `ventanas_meses`).
+
+        Returns:
+            DataFrame con el ahorro total de la ventana.
+        """
+        k = self.ventanas_meses.index(ventana_meses)
+        return pd.DataFrame(
+            self.ahorro[:, :, k].T,
+            index=pd.Index(self.consumos_kwh, name='CONSUMO_KWH'),
+            columns=self.comercializadores
+        )
+
+    def tabla_larga(self) -> pd.DataFrame:
+        """
+        Todo el cubo en formato largo (una fila por comercializador, consumo y ventana).
+
+        Returns:
+            DataFrame con COMERCIALIZADOR, VENTANA_MESES, PERIODOS, CONSUMO_KWH, AHORRO y AHORRO_%.
+        """
+        n_com, n_consumos, n_ventanas = self.ahorro.shape
+        # Orden de los ejes: comercializador, ventana, consumo
+        ahorro = self.ahorro.transpose(0, 2, 1)
+        return pd.DataFrame({
+            'COMERCIALIZADOR': np.repeat(self.comercializadores, n_ventanas * n_consumos),
+            'VENTANA_MESES': np.tile(np.repeat(self.ventanas_meses, n_consumos), n_com),
+            'PERIODOS': np.repeat(self.periodos.ravel(), n_consumos),
+            'CONSUMO_KWH': np.tile(self.consumos_kwh, n_com * n_ventanas),
+            'AHORRO': ahorro.ravel(),
+            'AHORRO_%': np.repeat(self.ahorro_porcentual.ravel(), n_consumos)
+        })
+
+
+def calcular_cubo_ahorro(
+    resultados: Dict[str, pd.DataFrame],
+    consumos_kwh: Sequence[float],
+    ventanas_meses: Sequence[int] = VENTANAS_AHORRO_MESES,
+    periodo_fin: Optional[str] = None,
+    indices_periodos: Optional[Dict[str, IndicePeriodos]] = None
+) -> ResultadoCalculo:
+    """
+    Calcula el ahorro de todos los comercializadores comparados para muchos consumos y ventanas.
+
+    El ahorro es lineal en el consumo: para cada comercializador y ventana basta la
+    diferencia Σ(CU_COM) - Σ(CU_RTQ), que sale de las sumas acumuladas del resultado,
+    y el cubo completo se obtiene con un producto por difusión (broadcasting) contra
+    el vector de consumos. Para una sola combinación coincide con `calcular_ahorro_energia()`.
+
+    Args:
+        resultados: Diccionario {comercializador: DataFrame de `comparar_cu()`}.
+        consumos_kwh: Consumos promedio mensuales del cliente en kWh.
+        ventanas_meses: Tamaños de ventana en meses; cada ventana son los últimos N meses hasta `periodo_fin`.
+        periodo_fin: Último periodo de las ventanas (formato: YYYY-MM); por defecto, el más reciente de los resultados.
+        indices_periodos: IndicePeriodos ya construidos por comercializador (opcional).
+
+    Returns:
+        ResultadoCalculo con el CuboAhorro en `datos` (None si hay error)
+    """
+    try:
+        comercializadores = [com for com, df in resultados.items() if df is not None and not df.empty]
+        if not comercializadores:
+            return ResultadoCalculo(error="❌ No hay resultados de comparación para calcular el ahorro")
+
+        consumos = np.asarray(consumos_kwh, dtype=np.float64).ravel()
+        if consumos.size == 0 or (consumos <= 0).any():
+            return ResultadoCalculo(error="❌ Los consumos deben ser valores positivos")
+        ventanas = sorted({int(v) for v in ventanas_meses})
+        if not ventanas or ventanas[0] <= 0:
+            return ResultadoCalculo(error="❌ Las ventanas deben tener al menos un mes")
+
+        indices_periodos = indices_periodos or {}
+        indices = [indices_periodos.get(com) or IndicePeriodos(resultados[com]) for com in comercializadores]
+        if periodo_fin is None:
+            periodo_fin = max(indice.fechas[-1] for indice in indices)
+        periodo_fin = str(periodo_fin)[:7]
+
+        # Inicio de cada ventana: N-1 meses antes del periodo final
+        fin = periodo_a_indice(periodo_fin)
+        inicios = [indice_a_periodo(fin - v + 1) for v in ventanas]
+
+        # Sumas por (comercializador, ventana)
+        diferencias = np.empty((len(indices), len(ventanas)))
+        costos_competidor = np.empty_like(diferencias)
+        periodos = np.empty(diferencias.shape, dtype=np.int64)
+        for i, indice in enumerate(indices):
+            suma_rtq, periodos[i] = indice.sumas_ventanas('CU_RTQ', inicios, periodo_fin)
+            costos_competidor[i], _ = indice.sumas_ventanas('CU_COM', inicios, periodo_fin)
+            diferencias[i] = costos_competidor[i] - suma_rtq
+
+        sin_datos = periodos == 0
+        diferencias[sin_datos] = np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ahorro_porcentual = np.where(costos_competidor > 0, diferencias / costos_competidor * 100, 0.0)
+        ahorro_porcentual[sin_datos] = np.nan
+
+        # (comercializador, 1, ventana) × (1, consumo, 1) -> (comercializador, consumo, ventana)
+        ahorro = diferencias[:, np.newaxis, :] * consumos[np.newaxis, :, np.newaxis]
+
+        cubo = CuboAhorro(
+            comercializadores=comercializadores,
+            consumos_kwh=consumos,
+            ventanas_meses=ventanas,
+            periodo_fin=periodo_fin,
+            ahorro=ahorro,
+            ahorro_porcentual=ahorro_porcentual,
+            periodos=periodos
+        )
+        advertencias = []
+        if sin_datos.any():
+            advertencias.append("⚠️ Algunas ventanas no tienen periodos con datos para todos los comercializadores")
+        return ResultadoCalculo(datos=cubo, advertencias=advertencias)
+
+    except Exception as e:
+        return ResultadoCalculo(error=f"❌ Error al calcular la tabla de ahorro: {str(e)}")
@@ -0,0 +1,66 @@
+"""
+Script para generar el reporte por lotes de todas las combinaciones (mercado, NT, comercializador).
+
+Compara RUITOQUE contra cada comercializador de cada mercado y nivel de tensión
+en un pool de procesos y escribe un libro por mercado más un libro de resumen.
+No requiere Streamlit ni navegador.
+
+Uso:
+    python generar_reporte_lote.py "Tarifas comparativas.xlsm" reportes/
+    python generar_reporte_lote.py "Tarifas comparativas.xlsm" reportes/ --inicio 2024-01 --fin 2024-12 --procesos 4
+"""
+
+import argparse
+import sys
+import time
+
+from core.batch_report import generar_reporte_lote
+from core.data_processing import cargar_tabla_desde_excel, procesar_df_tarifas
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Reporte por lotes de comparación de tarifas")
+    parser.add_argument("archivo", help="Archivo Excel de tarifas (hoja 'Hojadedatos', tabla 'TablaDatos')")
+    parser.add_argument("salida", help="Carpeta donde se escriben los libros")
+    parser.add_argument("--inicio", help="Periodo inicial (YYYY-MM)")
+    parser.add_argument("--fin", help="Periodo final (YYYY-MM)")
+    parser.add_argument("--procesos", type=int, help="Número de procesos (por defecto, los núcleos disponibles)")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resultado = cargar_tabla_desde_excel(args.archivo)
+    if resultado.exitoso:
+        resultado = procesar_df_tarifas(resultado.datos)
+    segundos_carga = time.perf_counter() - inicio
+    for advertencia in resultado.advertencias:
+        print(advertencia)
+    if not resultado.exitoso:
+        print(resultado.error or "No se pudo cargar la tabla de tarifas")
+        return 1
+    df_tarifas = resultado.datos
+
+    resultados = generar_reporte_lote(
+        df_tarifas, args.salida, args.inicio, args.fin, args.procesos
+    )
+    segundos = resultados['segundos']
+
+    print(f"Filas cargadas:          {len(df_tarifas):,}")
+    print(f"Mercados:                {resultados['mercados']}")
+    print(f"Combinaciones:           {resultados['combinaciones']:,} con datos de {resultados['combinaciones_enumeradas']:,}")
+    print(f"Procesos:                {resultados['procesos']}")
+    print(f"Carga:                   {segundos_carga:.3f} s")
+    print(f"Índice:                  {segundos['indice']:.3f} s")
+    print(f"Comparación y escritura: {segundos['comparacion']:.3f} s "
+          f"(procesos: {resultados['segundos_comparacion_procesos']:.3f} s comparando, "
+          f"{resultados['segundos_escritura_procesos']:.3f} s escribiendo)")
+    print(f"Resumen:                 {segundos['resumen']:.3f} s")
+    print(f"Total:                   {segundos_carga + segundos['total']:.3f} s")
+    print(f"Rendimiento:             {resultados['combinaciones_por_segundo']:.1f} combinaciones/s")
+    print(f"Archivos generados:      {len(resultados['archivos'])}")
+    for error in resultados['errores']:
+        print(f"Error: {error}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
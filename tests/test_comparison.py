@@ -0,0 +1,189 @@
+"""Equivalencia de `core.comparison.comparar_cu` con la implementación original fila por fila."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.comparison import comparar_cu
+from core.data_processing import normalizar_periodo, vista_fechas
+from core.group_index import IndiceGrupos
+
+MERCADOS = ['BOGOTA', 'CALI']
+NIVELES_TENSION = [1, 2]
+COMERCIALIZADORES = ['RUITOQUE', 'ENEL', 'EPM S.A.', 'VATIA']
+PERIODOS = [f"{anio}-{mes:02d}" for anio in (2023, 2024) for mes in range(1, 13)]
+
+
+def comparar_cu_referencia(df_tarifas, mercado_seleccionado, comercializador_seleccionado, nt_seleccionado,
+                           periodo_inicio=None, periodo_fin=None):
+    """
+    Implementación original de `comparar_cu()` (promedio acumulado fila por fila con iterrows).
+
+    Returns:
+        Tupla (DataFrame o None, mensajes); (None, None) si la original terminaba en excepción.
+    """
+    try:
+        mensajes_analisis = []
+
+        df = (
+            df_tarifas
+            .drop_duplicates(subset=["FECHA", "COMERCIALIZADOR", "MERCADO", "NT", "CU", "G", "C"])
+            .dropna(subset=["FECHA", "CU", "G", "C"])
+        )
+
+        df = df[(df["MERCADO"] == mercado_seleccionado) & (df["NT"] == nt_seleccionado)]
+        df_rtq_full = df[df["COMERCIALIZADOR"] == "RUITOQUE"].copy()
+        df_sel_full = df[df["COMERCIALIZADOR"] == comercializador_seleccionado].copy()
+
+        if df_rtq_full.empty or df_sel_full.empty:
+            mensajes_analisis.append("⚠️ No hay datos suficientes para comparar")
+            return None, mensajes_analisis
+
+        agregacion = {'G': 'mean', 'C': 'mean', 'CU': 'mean', 'MERCADO': 'first', 'NT': 'first'}
+        df_rtq_agg = df_rtq_full.groupby('FECHA').agg(agregacion).reset_index()
+        df_sel_agg = df_sel_full.groupby('FECHA').agg(agregacion).reset_index()
+
+        df_rtq_agg['FECHA'] = vista_fechas(df_rtq_agg['FECHA'])
+        df_sel_agg['FECHA'] = vista_fechas(df_sel_agg['FECHA'])
+        periodo_inicio = normalizar_periodo(periodo_inicio, df_rtq_agg['FECHA'])
+        periodo_fin = normalizar_periodo(periodo_fin, df_rtq_agg['FECHA'])
+
+        fechas_rtq = set(df_rtq_agg['FECHA'].unique())
+        fechas_sel = set(df_sel_agg['FECHA'].unique())
+        fechas_solo_rtq = fechas_rtq - fechas_sel
+        fechas_solo_sel = fechas_sel - fechas_rtq
+
+        if fechas_solo_rtq:
+            mensajes_analisis.append(f"ℹ️ Periodos solo en RUITOQUE (no se incluirán): {sorted(fechas_solo_rtq)}")
+        if fechas_solo_sel:
+            mensajes_analisis.append(f"ℹ️ Periodos solo en {comercializador_seleccionado} (no se incluirán): {sorted(fechas_solo_sel)}")
+
+        suf = comercializador_seleccionado.replace(' ', '_')
+        df_cmp = pd.merge(
+            df_rtq_agg, df_sel_agg, on='FECHA', suffixes=('_RTQ', f'_{suf}'), how='inner'
+        ).sort_values('FECHA', ascending=False).reset_index(drop=True)
+
+        if periodo_inicio and periodo_fin:
+            df_cmp = df_cmp[
+                (df_cmp['FECHA'] >= periodo_inicio) &
+                (df_cmp['FECHA'] <= periodo_fin)
+            ].sort_values('FECHA', ascending=False).reset_index(drop=True)
+
+            if df_cmp.empty:
+                mensajes_analisis.append(f"⚠️ No hay datos en el rango especificado ({periodo_inicio} a {periodo_fin})")
+                return None, mensajes_analisis
+
+            mensajes_analisis.append(
+                f"📅 Analizando periodos desde {periodo_inicio} hasta {periodo_fin} ({len(df_cmp)} periodos selecionados)"
+            )
+        else:
+            mensajes_analisis.append(f"📅 Analizando todos los periodos disponibles ({len(df_cmp)} periodos)")
+
+        todos_periodos = []
+        mensajes_analisis.append(f"🔄 Iniciando análisis desde {df_cmp['FECHA'].iloc[0]} hacia atrás")
+
+        for _, row in df_cmp.iterrows():
+            temp = pd.DataFrame(todos_periodos + [row])
+            prom_rtq = temp['CU_RTQ'].mean()
+            prom_sel = temp[f'CU_{suf}'].mean()
+            todos_periodos.append(row)
+            if prom_rtq < prom_sel:
+                mensajes_analisis.append(
+                    f"✅ {row['FECHA']} -> Exitoso (per. #{len(todos_periodos)}: PROM_RTQ={prom_rtq:.2f} < PROM_{suf}={prom_sel:.2f})"
+                )
+            else:
+                mensajes_analisis.append(
+                    f"❌ {row['FECHA']} -> Atención! (per. #{len(todos_periodos)}: PROM_RTQ={prom_rtq:.2f} > PROM_{suf}={prom_sel:.2f})"
+                )
+
+        df_resultado = pd.DataFrame(todos_periodos).copy()
+        df_resultado['NT'] = nt_seleccionado
+
+        prom_rtq_final = df_resultado['CU_RTQ'].mean()
+        prom_sel_final = df_resultado[f'CU_{suf}'].mean()
+
+        df_resultado['ESTADO'] = df_resultado.apply(
+            lambda row: '✅ Exitoso' if row['CU_RTQ'] < row[f'CU_{suf}'] else '❌ Atención',
+            axis=1
+        )
+
+        metrics = {
+            'DIF_CU_$': df_resultado[f'CU_{suf}'] - df_resultado['CU_RTQ'],
+            'DIF_CU_%': (df_resultado[f'CU_{suf}'] - df_resultado['CU_RTQ']) / df_resultado['CU_RTQ'] * 100,
+            'DIF_G_$': df_resultado[f'G_{suf}'] - df_resultado['G_RTQ'],
+            'DIF_G_%': (df_resultado[f'G_{suf}'] - df_resultado['G_RTQ']) / df_resultado['G_RTQ'] * 100,
+            'DIF_C_$': df_resultado[f'C_{suf}'] - df_resultado['C_RTQ'],
+            'DIF_C_%': (df_resultado[f'C_{suf}'] - df_resultado['C_RTQ']) / df_resultado['C_RTQ'] * 100,
+            'PROM_CU_RTQ': prom_rtq_final,
+            f'PROM_CU_{suf}': prom_sel_final,
+            'DIF_PROM_CU_$': prom_sel_final - prom_rtq_final,
+            'DIF_PROM_CU_%': (prom_sel_final - prom_rtq_final) / prom_rtq_final * 100
+        }
+        df_resultado = df_resultado.assign(**metrics)
+
+        cols = [
+            'FECHA', 'NT', 'ESTADO', 'CU_RTQ', f'CU_{suf}', 'DIF_CU_$', 'DIF_CU_%',
+            'G_RTQ', f'G_{suf}', 'DIF_G_$', 'DIF_G_%', 'C_RTQ', f'C_{suf}', 'DIF_C_$', 'DIF_C_%',
+            'PROM_CU_RTQ', f'PROM_CU_{suf}', 'DIF_PROM_CU_$', 'DIF_PROM_CU_%'
+        ]
+        return df_resultado[cols].round(2), mensajes_analisis
+
+    except Exception:
+        return None, None
+
+
+def tarifas_aleatorias(semilla):
+    """Tabla de tarifas procesada con periodos faltantes, CU nulos y filas duplicadas."""
+    rng = np.random.default_rng(semilla)
+    filas = []
+    for mercado in MERCADOS:
+        for nt in NIVELES_TENSION:
+            for comercializador in COMERCIALIZADORES:
+                periodos = [p for p in PERIODOS if rng.random() < 0.8]
+                for periodo in periodos:
+                    g, c = rng.uniform(200, 400), rng.uniform(20, 80)
+                    filas.append((periodo, mercado, comercializador, nt, g, c, g + c + rng.uniform(100, 300)))
+                    if rng.random() < 0.1:
+                        # Segundo registro del mismo periodo (se promedia)
+                        filas.append((periodo, mercado, comercializador, nt, g, c, g + c + rng.uniform(100, 300)))
+    df = pd.DataFrame(filas, columns=['FECHA', 'MERCADO', 'COMERCIALIZADOR', 'NT', 'G', 'C', 'CU'])
+    df.loc[rng.random(len(df)) < 0.05, 'CU'] = np.nan
+    duplicadas = df.sample(frac=0.1, random_state=semilla)
+    return pd.concat([df, duplicadas], ignore_index=True).sample(frac=1, random_state=semilla).reset_index(drop=True)
+
+
+def casos():
+    """Combinaciones de semilla, mercado, NT, comercializador y rango de periodos."""
+    rangos = [(None, None), ('2023-06', '2024-05'), ('2024-01', '2024-12'), ('2023-01', '2023-01')]
+    for semilla in range(3):
+        for mercado in MERCADOS:
+            for nt in NIVELES_TENSION:
+                for comercializador in COMERCIALIZADORES[1:]:
+                    for inicio, fin in rangos:
+                        yield semilla, mercado, nt, comercializador, inicio, fin
+
+
+@pytest.fixture(scope="module")
+def tablas():
+    return {semilla: tarifas_aleatorias(semilla) for semilla in range(3)}
+
+
+@pytest.mark.parametrize("con_indice", [False, True], ids=["sin_indice", "con_indice"])
+@pytest.mark.parametrize("semilla,mercado,nt,comercializador,inicio,fin", list(casos()))
+def test_comparar_cu_equivale_a_la_referencia(tablas, con_indice, semilla, mercado, nt, comercializador, inicio, fin):
+    df_tarifas = tablas[semilla]
+    esperado, mensajes_esperados = comparar_cu_referencia(df_tarifas, mercado, comercializador, nt, inicio, fin)
+
+    resultado = comparar_cu(
+        df_tarifas, mercado, comercializador, nt, inicio, fin,
+        indice_grupos=IndiceGrupos(df_tarifas) if con_indice else None
+    )
+
+    assert resultado.error is None
+    if esperado is None:
+        assert resultado.datos is None
+    else:
+        pd.testing.assert_frame_equal(resultado.datos, esperado)
+        assert list(resultado.datos['ESTADO']) == list(esperado['ESTADO'])
+    if mensajes_esperados is not None:
+        assert list(resultado.mensajes) == mensajes_esperados
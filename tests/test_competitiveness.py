@@ -0,0 +1,38 @@
+"""La matriz de competitividad coincide con la vista de una comparación individual."""
+
+import pytest
+
+# Un promedio que cae justo en medio centavo puede redondearse distinto según el orden de la suma
+TOLERANCIA = 0.01 + 1e-9
+
+from core.comparison import calcular_promedios_periodo, comparar_cu
+from core.competitiveness import MatrizCompetitividad
+from test_comparison import MERCADOS, NIVELES_TENSION, COMERCIALIZADORES, tarifas_aleatorias
+
+VENTANAS = [(None, None), ('2023-06', '2024-05'), ('2024-01', '2024-12')]
+
+
+@pytest.mark.parametrize("semilla", range(3))
+def test_matriz_coincide_con_comparar_cu(semilla):
+    df_tarifas = tarifas_aleatorias(semilla)
+    matriz = MatrizCompetitividad(df_tarifas)
+
+    for inicio, fin in VENTANAS:
+        filas = matriz.calcular(inicio, fin).set_index(['MERCADO', 'NT', 'COMERCIALIZADOR'])
+        for mercado in MERCADOS:
+            for nt in NIVELES_TENSION:
+                for comercializador in COMERCIALIZADORES[1:]:
+                    resultado = comparar_cu(df_tarifas, mercado, comercializador, nt, inicio, fin)
+                    clave = (mercado, nt, comercializador)
+                    if resultado.datos is None:
+                        assert clave not in filas.index
+                        continue
+
+                    fila = filas.loc[clave]
+                    promedios = calcular_promedios_periodo(resultado.datos)
+                    assert fila['PERIODOS'] == promedios['periodos_analizados']
+                    assert fila['PROM_CU_RTQ'] == pytest.approx(promedios['promedio_rtq'], abs=TOLERANCIA)
+                    assert fila['PROM_CU_COM'] == pytest.approx(promedios['promedio_competidor'], abs=TOLERANCIA)
+                    assert fila['DIF_PROM_CU_$'] == pytest.approx(promedios['diferencia_absoluta'], abs=TOLERANCIA)
+                    assert fila['DIF_PROM_CU_%'] == pytest.approx(promedios['diferencia_porcentual'], abs=TOLERANCIA)
+                    assert fila['PERIODOS_EXITOSOS'] == (resultado.datos['ESTADO'] == '✅ Exitoso').sum()
@@ -0,0 +1,23 @@
+"""El paquete `core` debe poder importarse sin Streamlit (lo usan scripts y trabajos por lotes)."""
+
+import subprocess
+import sys
+from pathlib import Path
+
+MODULOS_CORE = [
+    "core.batch_report", "core.comparison", "core.competitiveness", "core.data_processing",
+    "core.downsampling", "core.excel_export", "core.excel_reader", "core.group_index",
+    "core.period_index", "core.portfolio", "core.resultado", "core.savings",
+]
+
+
+def test_core_no_importa_streamlit():
+    codigo = (
+        f"import {', '.join(MODULOS_CORE)}; import sys; "
+        "assert 'streamlit' not in sys.modules, 'core importó streamlit'"
+    )
+    proceso = subprocess.run(
+        [sys.executable, "-c", codigo],
+        cwd=Path(__file__).resolve().parent.parent, capture_output=True, text=True
+    )
+    assert proceso.returncode == 0, proceso.stderr
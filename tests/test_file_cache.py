@@ -0,0 +1,44 @@
+"""Pruebas del caché en disco de archivos descargados."""
+
+import io
+import os
+from unittest import mock
+
+from utils import file_cache
+from utils.file_cache import CacheArchivoLocal
+
+CLAVE = "sitio/Tarifas.xlsm"
+
+
+def test_acierto_no_recalcula_el_hash(tmp_path):
+    cache = CacheArchivoLocal(str(tmp_path))
+    cache.guardar(CLAVE, io.BytesIO(b"contenido"), {"eTag": "e1"})
+
+    with mock.patch.object(file_cache, "calcular_hash_archivo", wraps=file_cache.calcular_hash_archivo) as hash_:
+        archivo, metadatos = cache.abrir(CLAVE)
+    with archivo:
+        assert archivo.read() == b"contenido"
+    assert metadatos["eTag"] == "e1"
+    hash_.assert_not_called()
+
+
+def test_contenido_modificado_se_detecta_por_el_hash(tmp_path):
+    cache = CacheArchivoLocal(str(tmp_path))
+    cache.guardar(CLAVE, io.BytesIO(b"contenido"), {"eTag": "e1"})
+    ruta_bin, _ = cache._rutas(CLAVE)
+    ruta_bin.write_bytes(b"alterado!")
+    os.utime(ruta_bin, ns=(0, 0))
+
+    assert cache.abrir(CLAVE) is None
+
+
+def test_sello_distinto_con_contenido_integro_se_actualiza(tmp_path):
+    cache = CacheArchivoLocal(str(tmp_path))
+    cache.guardar(CLAVE, io.BytesIO(b"contenido"), {"eTag": "e1"})
+    ruta_bin, _ = cache._rutas(CLAVE)
+    os.utime(ruta_bin, ns=(0, 0))
+
+    archivo, metadatos = cache.abrir(CLAVE)
+    archivo.close()
+    assert metadatos["mtime_local_ns"] == 0
+    assert cache.leer_metadatos(CLAVE)["mtime_local_ns"] == 0
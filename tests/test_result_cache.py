@@ -0,0 +1,31 @@
+"""Pruebas del caché compartido de resultados."""
+
+from utils.result_cache import CacheResultados, ClaveResultado
+
+
+def _clave(version, mercado='BOGOTA'):
+    return ClaveResultado(version, mercado, 1, ('ENEL',), '2024-01', '2024-12')
+
+
+def test_versiones_distintas_conviven():
+    cache = CacheResultados(max_bytes=1000)
+    cache.guardar(_clave('v1'), b'a' * 10, [])
+    cache.guardar(_clave('v2'), b'b' * 10, [])
+
+    # Una sesión con la versión anterior no descarta los resultados de la nueva (ni al revés)
+    assert cache.obtener(_clave('v1')).datos == b'a' * 10
+    assert cache.obtener(_clave('v2')).datos == b'b' * 10
+    assert cache.contiene(_clave('v1')) and cache.contiene(_clave('v2'))
+
+
+def test_version_sin_uso_sale_por_lru():
+    cache = CacheResultados(max_bytes=30)
+    cache.guardar(_clave('v1'), b'a' * 10, [])
+    cache.guardar(_clave('v2'), b'b' * 10, [])
+    cache.obtener(_clave('v1'))
+    cache.guardar(_clave('v2', 'CALI'), b'c' * 10, [])
+    cache.guardar(_clave('v2', 'MEDELLIN'), b'd' * 10, [])
+
+    assert not cache.contiene(_clave('v2'))
+    assert cache.contiene(_clave('v1'))
+    assert cache.estadisticas()['bytes'] == 30
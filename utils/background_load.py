@@ -0,0 +1,341 @@
+"""Módulo para la carga del dataset de tarifas en un hilo de fondo con progreso por etapas."""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from config.settings import CACHE_CONFIG, DATA_CONFIG
+from core import data_processing
+from core.data_processing import MODO_INGESTA_BLOQUES, compactar_df_tarifas, reporte_memoria
+from core.resultado import ResultadoCalculo
+from utils.dataset_cache import CacheDataset, EntradaDataset, cache_dataset
+from utils.file_cache import calcular_hash_archivo
+from utils.snapshot import cargar_snapshot, guardar_snapshot
+
+ETAPA_INSTANTANEA = 'instantanea'
+ETAPA_DESCARGA = 'descarga'
+ETAPA_LECTURA = 'lectura'
+ETAPA_PROCESAMIENTO = 'procesamiento'
+ETAPA_INDICES = 'indices'
+ETAPA_GUARDADO = 'guardado'
+
+ETIQUETAS_ETAPAS = {
+    ETAPA_INSTANTANEA: "Buscando instantánea procesada",
+    ETAPA_DESCARGA: "Descargando archivo",
+    ETAPA_LECTURA: "Leyendo tabla de datos",
+    ETAPA_PROCESAMIENTO: "Aplicando transformaciones",
+    ETAPA_INDICES: "Construyendo índices",
+    ETAPA_GUARDADO: "Guardando instantánea"
+}
+
+
+class TrabajoCarga:
+    """
+    Carga de una versión del dataset ejecutada en un hilo de fondo.
+
+    El hilo publica la etapa actual, los bytes descargados, las filas leídas y la
+    duración de cada etapa; las sesiones consultan `estado()` sin bloquearse.
+    """
+
+    def __init__(self, version: str, metadatos: Dict[str, Any]):
+        """
+        Inicializa el trabajo sin etapas.
+
+        Args:
+            version: Clave de versión del archivo (ver `version_desde_metadatos`).
+            metadatos: Metadatos del driveItem; la carga agrega el reporte de memoria.
+        """
+        self.version = version
+        self.metadatos = dict(metadatos)
+        self._lock = threading.Lock()
+        self._etapa: Optional[str] = None
+        self._inicio_etapa = 0.0
+        self._tiempos: Dict[str, float] = {}
+        self._progreso: Dict[str, Optional[int]] = {
+            'bytes_recibidos': 0, 'bytes_totales': None, 'filas_leidas': 0, 'filas_totales': None
+        }
+        self.mensajes: List[str] = []
+        self.advertencias: List[str] = []
+        self.error: Optional[str] = None
+        self.entrada: Optional[EntradaDataset] = None
+        self.iniciado_en = time.perf_counter()
+        self.terminado = threading.Event()
+
+    @property
+    def fallido(self) -> bool:
+        """Indica si el trabajo terminó sin obtener el dataset."""
+        return self.terminado.is_set() and self.entrada is None
+
+    def iniciar_etapa(self, etapa: str) -> None:
+        """Cierra la etapa en curso (registrando su duración) y empieza otra."""
+        with self._lock:
+            self._cerrar_etapa()
+            self._etapa = etapa
+            self._inicio_etapa = time.perf_counter()
+
+    def _cerrar_etapa(self) -> None:
+        """Registra la duración de la etapa en curso (con el lock tomado)."""
+        if self._etapa is not None:
+            self._tiempos[self._etapa] = self._tiempos.get(self._etapa, 0.0) + time.perf_counter() - self._inicio_etapa
+            self._etapa = None
+
+    def registrar_tiempo(self, etapa: str, segundos: float) -> None:
+        """Registra la duración de una etapa ejecutada en paralelo con la principal."""
+        with self._lock:
+            self._tiempos[etapa] = segundos
+
+    def progreso_descarga(self, bytes_recibidos: int, bytes_totales: Optional[int]) -> None:
+        """Función de progreso para `SharePointClient.download_file_cached()`."""
+        with self._lock:
+            self._progreso['bytes_recibidos'] = bytes_recibidos
+            self._progreso['bytes_totales'] = bytes_totales
+
+    def progreso_lectura(self, filas_leidas: int, filas_totales: int) -> None:
+        """Función de progreso para los lectores de `core.data_processing`."""
+        with self._lock:
+            self._progreso['filas_leidas'] = filas_leidas
+            self._progreso['filas_totales'] = filas_totales
+
+    def agregar_resultado(self, resultado: ResultadoCalculo) -> Any:
+        """
+        Acumula los mensajes, advertencias y error de un cálculo del núcleo.
+
+        Returns:
+            Los datos del resultado (None si hubo error).
+        """
+        with self._lock:
+            self.mensajes.extend(resultado.mensajes)
+            self.advertencias.extend(resultado.advertencias)
+            if resultado.error:
+                self.error = resultado.error
+        return resultado.datos
+
+    def finalizar(self, entrada: Optional[EntradaDataset]) -> None:
+        """Cierra la última etapa, publica la entrada y despierta a las sesiones en espera."""
+        with self._lock:
+            self._cerrar_etapa()
+            self.entrada = entrada
+            if entrada is None and self.error is None:
+                self.error = "❌ No se pudo cargar el archivo de tarifas. Intenta nuevamente en unos minutos."
+        self.terminado.set()
+
+    def resultado(self) -> ResultadoCalculo:
+        """Mensajes, advertencias y error de la carga como ResultadoCalculo (ver `mostrar_resultado`)."""
+        with self._lock:
+            return ResultadoCalculo(
+                datos=self.entrada,
+                mensajes=list(self.mensajes),
+                advertencias=list(self.advertencias),
+                error=self.error
+            )
+
+    def estado(self) -> Dict[str, Any]:
+        """
+        Copia del estado del trabajo para mostrarlo en la interfaz.
+
+        Returns:
+            Diccionario con etapa, segundos en la etapa, tiempos por etapa, contadores
+            de progreso, segundos totales y si el trabajo terminó.
+        """
+        with self._lock:
+            ahora = time.perf_counter()
+            return {
+                'etapa': self._etapa,
+                'segundos_etapa': ahora - self._inicio_etapa if self._etapa else 0.0,
+                'tiempos': dict(self._tiempos),
+                **self._progreso,
+                'segundos_totales': ahora - self.iniciado_en,
+                'terminado': self.terminado.is_set()
+            }
+
+
+def _cargar_df_procesado(trabajo: TrabajoCarga, cliente: Any) -> Optional[pd.DataFrame]:
+    """Descarga, lee y procesa el archivo (o lo recupera de la instantánea)."""
+    metadatos = trabajo.metadatos
+
+    # Tras un reinicio, la instantánea procesada evita descargar y parsear el archivo
+    trabajo.iniciar_etapa(ETAPA_INSTANTANEA)
+    df_snapshot = cargar_snapshot(CACHE_CONFIG['directorio'], etag=metadatos.get('eTag'))
+    if df_snapshot is not None:
+        return df_snapshot
+
+    # El .xlsx/.xlsm es un zip con el directorio central al final: la lectura
+    # solo puede empezar cuando el archivo está completo (en memoria acotada o en disco)
+    trabajo.iniciar_etapa(ETAPA_DESCARGA)
+    archivo, _ = cliente.download_file_cached(metadatos=metadatos, progreso=trabajo.progreso_descarga)
+    # El cliente corre sin Streamlit en este hilo: sus errores y advertencias se muestran desde la sesión
+    if cliente.advertencias:
+        trabajo.agregar_resultado(ResultadoCalculo(advertencias=list(cliente.advertencias)))
+    if archivo is None:
+        trabajo.agregar_resultado(ResultadoCalculo(
+            error=cliente.ultimo_error or "❌ No se pudo descargar el archivo de tarifas desde SharePoint."
+        ))
+        return None
+
+    with archivo:
+        # Si solo cambiaron los metadatos, la instantánea del mismo contenido sigue siendo válida
+        trabajo.iniciar_etapa(ETAPA_INSTANTANEA)
+        sha256 = calcular_hash_archivo(archivo)
+        df_snapshot = cargar_snapshot(CACHE_CONFIG['directorio'], sha256=sha256)
+        if df_snapshot is not None:
+            return df_snapshot
+
+        trabajo.iniciar_etapa(ETAPA_LECTURA)
+        if DATA_CONFIG['modo_ingesta'] == MODO_INGESTA_BLOQUES:
+            # Lectura y transformación por bloques con memoria acotada
+            df_procesado = trabajo.agregar_resultado(
+                data_processing.cargar_tabla_por_bloques(archivo, progreso=trabajo.progreso_lectura)
+            )
+        else:
+            df = trabajo.agregar_resultado(
+                data_processing.cargar_tabla_desde_excel(archivo, progreso=trabajo.progreso_lectura)
+            )
+            if df is None:
+                return None
+            trabajo.iniciar_etapa(ETAPA_PROCESAMIENTO)
+            df_procesado = trabajo.agregar_resultado(data_processing.procesar_df_tarifas(df))
+
+    if df_procesado is not None:
+        # La escritura de la instantánea no bloquea la carga: corre en paralelo
+        # con la compactación y la construcción de los índices
+        hilo = threading.Thread(
+            target=_guardar_snapshot_fondo,
+            args=(trabajo, df_procesado, metadatos.get('eTag'), sha256),
+            name="snapshot-tarifas",
+            daemon=True
+        )
+        hilo.start()
+    return df_procesado
+
+
+def _guardar_snapshot_fondo(trabajo: TrabajoCarga, df: pd.DataFrame, etag: Optional[str], sha256: str) -> None:
+    """Guarda la instantánea y registra su duración en el trabajo."""
+    inicio = time.perf_counter()
+    try:
+        guardar_snapshot(df, CACHE_CONFIG['directorio'], etag, sha256)
+    except Exception as e:
+        # El hilo es independiente de la carga: cualquier error se registra en el trabajo y no se pierde
+        trabajo.agregar_resultado(
+            ResultadoCalculo(advertencias=[f"⚠️ No se pudo guardar la instantánea de la tabla: {str(e)}"])
+        )
+    trabajo.registrar_tiempo(ETAPA_GUARDADO, time.perf_counter() - inicio)
+
+
+def _cargar_dataset(trabajo: TrabajoCarga, cliente: Any) -> Optional[pd.DataFrame]:
+    """Carga el dataset y, si está configurado, lo convierte al esquema compacto."""
+    df_procesado = _cargar_df_procesado(trabajo, cliente)
+    if df_procesado is not None and DATA_CONFIG['esquema_compacto']:
+        trabajo.iniciar_etapa(ETAPA_PROCESAMIENTO)
+        df_compacto = compactar_df_tarifas(df_procesado, DATA_CONFIG['medidas_float32'])
+        # Se guarda junto a los metadatos de la entrada compartida del caché
+        trabajo.metadatos['reporte_memoria'] = reporte_memoria(df_procesado, df_compacto)
+        return df_compacto
+    return df_procesado
+
+
+class GestorCargas:
+    """
+    Trabajos de carga en segundo plano, uno por versión del dataset.
+
+    Las sesiones que llegan mientras una versión se está cargando se unen al
+    trabajo en curso en lugar de iniciar otro. Solo se conserva el trabajo de la
+    última versión solicitada.
+    """
+
+    def __init__(self, cache: CacheDataset):
+        """
+        Inicializa el gestor sin trabajos.
+
+        Args:
+            cache: Caché del dataset donde se publica la entrada cargada.
+        """
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._trabajos: Dict[str, TrabajoCarga] = {}
+
+    def obtener(self, version: str) -> Optional[TrabajoCarga]:
+        """Trabajo de una versión (en curso o terminado) o None si no se ha iniciado."""
+        with self._lock:
+            return self._trabajos.get(version)
+
+    def iniciar(
+        self,
+        version: str,
+        metadatos: Dict[str, Any],
+        cliente: Any,
+        reiniciar_fallido: bool = True
+    ) -> TrabajoCarga:
+        """
+        Inicia la carga de una versión o retorna el trabajo que ya la está cargando.
+
+        Args:
+            version: Clave de versión del archivo (ver `version_desde_metadatos`).
+            metadatos: Metadatos del driveItem.
+            cliente: SharePointClient con el que se descarga el archivo.
+            reiniciar_fallido: Si el trabajo existente falló, iniciar uno nuevo.
+
+        Returns:
+            TrabajoCarga de la versión.
+        """
+        with self._lock:
+            trabajo = self._trabajos.get(version)
+            if trabajo is not None and not (reiniciar_fallido and trabajo.fallido):
+                return trabajo
+            trabajo = TrabajoCarga(version, metadatos)
+            self._trabajos = {version: trabajo}
+
+        threading.Thread(
+            target=self._ejecutar, args=(trabajo, cliente), name="carga-tarifas", daemon=True
+        ).start()
+        return trabajo
+
+    def _ejecutar(self, trabajo: TrabajoCarga, cliente: Any) -> None:
+        """Cuerpo del hilo: carga el dataset a través del caché (single-flight) y publica el resultado."""
+        entrada = None
+        try:
+            entrada = self._cache.obtener(
+                trabajo.version,
+                lambda: _cargar_dataset(trabajo, cliente),
+                trabajo.metadatos,
+                antes_de_indexar=lambda: trabajo.iniciar_etapa(ETAPA_INDICES)
+            )
+        except Exception as e:
+            trabajo.agregar_resultado(ResultadoCalculo(error=f"❌ Error al cargar los datos: {str(e)}"))
+        finally:
+            trabajo.finalizar(entrada)
+
+
+def mostrar_progreso_carga(estado: Dict[str, Any]) -> None:
+    """
+    Muestra la etapa en curso, su progreso y la duración de las etapas terminadas.
+
+    Args:
+        estado: Estado del trabajo (ver `TrabajoCarga.estado()`).
+    """
+    etapa = estado['etapa']
+    etiqueta = ETIQUETAS_ETAPAS.get(etapa, "Preparando carga")
+
+    if etapa == ETAPA_DESCARGA and estado['bytes_totales']:
+        recibidos, totales = estado['bytes_recibidos'], estado['bytes_totales']
+        st.progress(
+            min(recibidos / totales, 1.0),
+            text=f"{etiqueta}... {recibidos / 1024 / 1024:,.1f} de {totales / 1024 / 1024:,.1f} MB"
+        )
+    elif etapa == ETAPA_LECTURA and estado['filas_totales']:
+        leidas, totales = estado['filas_leidas'], estado['filas_totales']
+        st.progress(min(leidas / totales, 1.0), text=f"{etiqueta}... {leidas:,} de {totales:,} filas")
+    else:
+        st.progress(0.0, text=f"{etiqueta}... ({estado['segundos_etapa']:.1f} s)")
+
+    if estado['tiempos']:
+        st.caption(" · ".join(
+            f"{ETIQUETAS_ETAPAS.get(nombre, nombre)}: {segundos:.1f} s"
+            for nombre, segundos in estado['tiempos'].items()
+        ) + f" · Total: {estado['segundos_totales']:.1f} s")
+
+
+# Instancia única por proceso, compartida por todas las sesiones (ver `cache_dataset`)
+gestor_cargas = GestorCargas(cache_dataset)
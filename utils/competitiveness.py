@@ -0,0 +1,27 @@
+"""Módulo para la matriz de competitividad (adaptador de Streamlit de `core.competitiveness`)."""
+
+from typing import Optional
+
+import pandas as pd
+
+from core import competitiveness
+from core.competitiveness import MatrizCompetitividad
+from utils.streamlit_adapter import mostrar_resultado
+
+def calcular_matriz_competitividad(
+    df_tarifas: pd.DataFrame,
+    periodo_inicio: str = None,
+    periodo_fin: str = None,
+    matriz: Optional[MatrizCompetitividad] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Calcula la matriz de competitividad y muestra los errores en la interfaz.
+    
+    Ver `core.competitiveness.calcular_matriz_competitividad()`.
+    
+    Returns:
+        DataFrame con la matriz o None si hay error.
+    """
+    return mostrar_resultado(
+        competitiveness.calcular_matriz_competitividad(df_tarifas, periodo_inicio, periodo_fin, matriz=matriz)
+    )
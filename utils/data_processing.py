@@ -1,82 +1,42 @@
-"""Módulo para el procesamiento de datos de tarifas."""
+"""Módulo para el procesamiento de datos de tarifas (adaptador de Streamlit de `core.data_processing`)."""
+
+from typing import Any, Optional
 
 import pandas as pd
 import streamlit as st
-from openpyxl import load_workbook
-import io
-from typing import Optional, Dict, Any
 
-def cargar_tabla_desde_excel(file_content: Any) -> Optional[pd.DataFrame]:
+from core import data_processing
+from utils.streamlit_adapter import mostrar_resultado
+
+def cargar_tabla_desde_excel(file_content: Any, motor: Optional[str] = None) -> Optional[pd.DataFrame]:
     """
-    Carga específicamente la tabla 'TablaDatos' desde la hoja 'Hojadedatos' del archivo Excel.
+    Carga la tabla 'TablaDatos' y muestra el resultado en la interfaz.
     
-    Args:
-        file_content: Contenido del archivo Excel cargado.
+    Ver `core.data_processing.cargar_tabla_desde_excel()`.
     
     Returns:
         DataFrame con los datos cargados o None si hay error.
     """
-    try:
-        with io.BytesIO(file_content.read()) as file:
-            wb = load_workbook(file, data_only=True)
-            
-            if "Hojadedatos" not in wb.sheetnames:
-                st.error("❌ No se encontró la hoja 'Hojadedatos' en el archivo")
-                return None
-            
-            sheet = wb["Hojadedatos"]
-            
-            if "TablaDatos" not in sheet.tables:
-                st.error("❌ No se encontró la tabla 'TablaDatos' en la hoja 'Hojadedatos'")
-                return None
-            
-            table = sheet.tables["TablaDatos"]
-            table_range = table.ref
-            data = sheet[table_range]
-            rows = [[cell.value for cell in row] for row in data]
-            
-            if len(rows) < 2:
-                st.error("❌ La tabla 'TablaDatos' está vacía")
-                return None
-            
-            df = pd.DataFrame(rows[1:], columns=rows[0])
-            st.success("✅ Tabla 'TablaDatos' encontrada y cargada desde la hoja 'Hojadedatos'")
-            
-            return df
-            
-    except Exception as e:
-        st.error(f"❌ Error al cargar la tabla: {str(e)}")
-        return None
+    return mostrar_resultado(data_processing.cargar_tabla_desde_excel(file_content, motor), st.success)
 
 def procesar_df_tarifas(df: pd.DataFrame) -> Optional[pd.DataFrame]:
     """
-    Procesa el DataFrame de tarifas para obtener las columnas necesarias y realizar las transformaciones.
+    Procesa el DataFrame de tarifas y muestra los errores en la interfaz.
     
-    Args:
-        df: DataFrame con los datos crudos.
+    Ver `core.data_processing.procesar_df_tarifas()`.
     
     Returns:
         DataFrame procesado o None si hay error.
     """
-    try:
-        columnas_necesarias = {'MERCADO', 'FECHA', 'COMERCIALIZADOR', 'NT', 'G', 'C', 'CU'}
-        if not columnas_necesarias.issubset(df.columns):
-            st.error("❌ La tabla no contiene todas las columnas necesarias.")
-            st.info("ℹ️ Las columnas requeridas son: MERCADO, FECHA, COMERCIALIZADOR, NT, G, C, CU")
-            return None
-
-        df['FECHA'] = pd.to_datetime(df['FECHA'])
-
-        columnas_numericas = ['G', 'C', 'CU']
-        for col in columnas_numericas:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        columnas_orden = ['FECHA', 'MERCADO', 'COMERCIALIZADOR', 'NT', 'G', 'C', 'CU']
-        df = df[columnas_orden]
-        df['FECHA'] = df['FECHA'].dt.strftime('%Y-%m')
-
-        return df
+    return mostrar_resultado(data_processing.procesar_df_tarifas(df), st.info)
 
-    except Exception as e:
-        st.error(f"❌ Error al procesar los datos: {str(e)}")
-        return None 
\ No newline at end of file
+def cargar_tabla_por_bloques(file_content: Any, tamano_bloque: Optional[int] = None) -> Optional[pd.DataFrame]:
+    """
+    Carga y procesa la tabla de tarifas por bloques y muestra el resultado en la interfaz.
+    
+    Ver `core.data_processing.cargar_tabla_por_bloques()`.
+    
+    Returns:
+        DataFrame procesado o None si hay error.
+    """
+    return mostrar_resultado(data_processing.cargar_tabla_por_bloques(file_content, tamano_bloque), st.success)
@@ -0,0 +1,149 @@
+"""Módulo para el caché compartido (a nivel de proceso) del dataset de tarifas."""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+
+from core.competitiveness import MatrizCompetitividad
+from core.group_index import IndiceGrupos
+from utils.selector_catalog import CatalogoSelectores
+
+
+@dataclass(frozen=True)
+class EntradaDataset:
+    """
+    Dataset de tarifas procesado y compartido entre todas las sesiones.
+
+    El DataFrame se comparte por referencia: ninguna sesión debe modificarlo
+    en sitio (las funciones de `utils` trabajan siempre sobre copias o filtros).
+    Los índices derivados pertenecen a la entrada, por lo que se invalidan junto
+    con la versión del dataset.
+    """
+    version: str
+    df_tarifas: pd.DataFrame
+    metadatos: Dict[str, Any] = field(default_factory=dict)
+    indice_grupos: Optional[IndiceGrupos] = None
+    catalogo: Optional[CatalogoSelectores] = None
+    matriz_competitividad: Optional[MatrizCompetitividad] = None
+    cargado_en: float = field(default_factory=time.time)
+
+
+class _CargaEnCurso:
+    """Carga en progreso para una versión; las sesiones concurrentes esperan su resultado."""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.entrada: Optional[EntradaDataset] = None
+
+
+def version_desde_metadatos(metadatos: Dict[str, Any]) -> str:
+    """
+    Construye la clave de versión del dataset a partir de los metadatos del archivo.
+
+    Args:
+        metadatos: Metadatos del driveItem de SharePoint (eTag, lastModifiedDateTime).
+
+    Returns:
+        Cadena que identifica la versión del archivo.
+    """
+    return f"{metadatos.get('eTag', '')}|{metadatos.get('lastModifiedDateTime', '')}"
+
+
+class CacheDataset:
+    """
+    Caché del dataset de tarifas compartido por todas las sesiones del proceso.
+
+    Mantiene solo la versión vigente del archivo. Si varias sesiones solicitan
+    la misma versión mientras se está cargando, solo una ejecuta la carga
+    (single-flight) y las demás esperan y reciben la misma referencia.
+    """
+
+    def __init__(self):
+        """Inicializa el caché vacío."""
+        self._lock = threading.Lock()
+        self._entrada: Optional[EntradaDataset] = None
+        self._en_curso: Dict[str, _CargaEnCurso] = {}
+
+    def actual(self) -> Optional[EntradaDataset]:
+        """
+        Obtiene la entrada vigente del caché sin disparar ninguna carga.
+
+        Returns:
+            EntradaDataset vigente o None si aún no hay datos cargados.
+        """
+        with self._lock:
+            return self._entrada
+
+    def obtener(
+        self,
+        version: str,
+        cargador: Callable[[], Optional[pd.DataFrame]],
+        metadatos: Optional[Dict[str, Any]] = None,
+        antes_de_indexar: Optional[Callable[[], None]] = None
+    ) -> Optional[EntradaDataset]:
+        """
+        Obtiene el dataset para una versión, cargándolo una sola vez si es necesario.
+
+        Args:
+            version: Clave de versión del archivo (ver `version_desde_metadatos`).
+            cargador: Función que descarga y procesa el archivo; retorna el DataFrame o None.
+            metadatos: Metadatos del archivo asociados a la versión.
+            antes_de_indexar: Función invocada cuando termina el cargador y empieza
+                              la construcción de los índices (p. ej. para reportar la etapa).
+
+        Returns:
+            EntradaDataset compartida o None si la carga falló.
+        """
+        with self._lock:
+            if self._entrada is not None and self._entrada.version == version:
+                return self._entrada
+
+            carga = self._en_curso.get(version)
+            es_propietario = carga is None
+            if es_propietario:
+                carga = _CargaEnCurso()
+                self._en_curso[version] = carga
+
+        if not es_propietario:
+            # Otra sesión ya está cargando esta versión: esperar su resultado
+            carga.evento.wait()
+            return carga.entrada
+
+        entrada = None
+        try:
+            df = cargador()
+            if df is not None:
+                if antes_de_indexar:
+                    antes_de_indexar()
+                indice_grupos = IndiceGrupos(df)
+                entrada = EntradaDataset(
+                    version=version,
+                    df_tarifas=df,
+                    metadatos=dict(metadatos or {}),
+                    indice_grupos=indice_grupos,
+                    catalogo=CatalogoSelectores(df),
+                    # El índice ya está deduplicado: el pivote parte de él
+                    matriz_competitividad=MatrizCompetitividad(indice_grupos.df)
+                )
+                with self._lock:
+                    self._entrada = entrada
+        finally:
+            with self._lock:
+                self._en_curso.pop(version, None)
+            carga.entrada = entrada
+            carga.evento.set()
+
+        return entrada
+
+    def invalidar(self) -> None:
+        """Descarta la entrada vigente para forzar una nueva carga."""
+        with self._lock:
+            self._entrada = None
+
+
+# Instancia única por proceso: los módulos se importan una sola vez,
+# aunque Streamlit vuelva a ejecutar app.py en cada interacción
+cache_dataset = CacheDataset()
@@ -0,0 +1,95 @@
+"""Módulo para la exportación a Excel bajo demanda, con caché compartido de los archivos generados."""
+
+from typing import Any, Callable, NamedTuple, Optional, Tuple
+
+import streamlit as st
+
+from config.settings import CACHE_CONFIG
+from core.resultado import ResultadoCalculo
+from core.savings import CuboAhorro
+from utils.result_cache import CacheResultados
+from utils.streamlit_adapter import mostrar_resultado
+
+MIME_EXCEL = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class ClaveExportacion(NamedTuple):
+    """
+    Identifica un archivo exportado: versión del dataset, comparación y ventana de periodos.
+
+    El rango de la comparación (el del formulario) forma parte de la clave porque
+    los promedios exportados (PROM_CU_*, DIF_PROM_CU_*) se calculan sobre él; la
+    ventana (`periodo_inicio`, `periodo_fin`) es la del slider.
+    """
+    version: str
+    mercado: Any
+    nt: Any
+    comercializadores: Tuple[str, ...]
+    comparacion_inicio: Any
+    comparacion_fin: Any
+    periodo_inicio: Any
+    periodo_fin: Any
+    tabla_ahorro: Any = None  # Firma de la tabla de ahorro incluida (solo en el libro consolidado)
+
+
+def firma_cubo_ahorro(cubo: Optional[CuboAhorro]) -> Any:
+    """
+    Firma de un CuboAhorro para la clave del libro consolidado.
+
+    Args:
+        cubo: CuboAhorro calculado o None.
+
+    Returns:
+        Tupla hashable que cambia si cambian los consumos, las ventanas o los comercializadores.
+    """
+    if cubo is None:
+        return None
+    return (cubo.periodo_fin, tuple(cubo.ventanas_meses), tuple(cubo.comercializadores), hash(cubo.consumos_kwh.tobytes()))
+
+
+def boton_descarga_excel(
+    clave: Optional[ClaveExportacion],
+    generar: Callable[[], ResultadoCalculo],
+    etiqueta: str,
+    nombre_archivo: str,
+    key: str,
+    ayuda: Optional[str] = None
+) -> None:
+    """
+    Muestra la descarga de un Excel que solo se genera cuando el usuario lo pide.
+
+    Si el archivo ya está en el caché para la clave (misma comparación y ventana),
+    se ofrece directamente la descarga; si no, un botón lo genera y lo guarda.
+
+    Args:
+        clave: Clave del archivo; None para no usar el caché.
+        generar: Función que genera el archivo (ver `core.excel_export`).
+        etiqueta: Texto de los botones.
+        nombre_archivo: Nombre del archivo descargado.
+        key: Clave única de los widgets.
+        ayuda: Texto de ayuda de los botones.
+    """
+    libro = None
+    if clave is not None and cache_exportaciones.contiene(clave):
+        entrada = cache_exportaciones.obtener(clave)
+        libro = entrada.datos if entrada is not None else None
+
+    if libro is None and st.button(f"⚙️ Preparar {etiqueta}", key=f'preparar_btn_{key}', help=ayuda):
+        with st.spinner('Generando archivo Excel...'):
+            libro = mostrar_resultado(generar())
+        if libro is not None and clave is not None:
+            cache_exportaciones.guardar(clave, libro, None)
+
+    if libro is not None:
+        st.download_button(
+            label=f"📥 Descargar {etiqueta}",
+            data=libro,
+            file_name=nombre_archivo,
+            mime=MIME_EXCEL,
+            key=f'descargar_btn_{key}',
+            help=ayuda
+        )
+
+
+# Instancia única por proceso, compartida por todas las sesiones (ver `cache_resultados`)
+cache_exportaciones = CacheResultados(CACHE_CONFIG['exportaciones_max_bytes'])
@@ -0,0 +1,177 @@
+"""Módulo para el caché en disco del contenido de archivos descargados de SharePoint."""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+
+TAMANO_BLOQUE_HASH = 1024 * 1024
+
+
+def calcular_hash_archivo(archivo: BinaryIO) -> str:
+    """
+    Calcula el hash SHA-256 de un archivo leyéndolo por bloques.
+
+    Args:
+        archivo: Archivo binario abierto; se lee desde el inicio.
+
+    Returns:
+        Hash hexadecimal del contenido.
+    """
+    hasher = hashlib.sha256()
+    archivo.seek(0)
+    for bloque in iter(lambda: archivo.read(TAMANO_BLOQUE_HASH), b""):
+        hasher.update(bloque)
+    archivo.seek(0)
+    return hasher.hexdigest()
+
+
+def _escribir_atomico(ruta: Path, datos: bytes) -> None:
+    """Escribe un archivo de forma atómica (temporal + reemplazo) para no dejar entradas a medias."""
+    _copiar_atomico(ruta, io.BytesIO(datos))
+
+
+def _copiar_atomico(ruta: Path, origen: BinaryIO) -> None:
+    """Copia un archivo abierto a `ruta` de forma atómica sin cargarlo completo en memoria."""
+    fd, ruta_tmp = tempfile.mkstemp(dir=ruta.parent, prefix=ruta.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            origen.seek(0)
+            shutil.copyfileobj(origen, f, TAMANO_BLOQUE_HASH)
+        os.replace(ruta_tmp, ruta)
+    except Exception:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
+    finally:
+        origen.seek(0)
+
+
+class CacheArchivoLocal:
+    """
+    Caché en disco de archivos remotos.
+
+    Cada entrada guarda el contenido (`.bin`) y sus metadatos (`.json`):
+    eTag, cTag, size, lastModifiedDateTime, el hash SHA-256 del contenido y el
+    tamaño y la fecha de modificación del `.bin` en disco. Al abrir una entrada
+    basta con comparar estos dos últimos; el hash solo se recalcula si no coinciden.
+    """
+
+    def __init__(self, directorio: str):
+        """
+        Inicializa el caché.
+
+        Args:
+            directorio: Carpeta donde se almacenan las entradas.
+        """
+        self.directorio = Path(directorio)
+
+    def _rutas(self, clave: str) -> Tuple[Path, Path]:
+        nombre = hashlib.sha1(clave.encode("utf-8")).hexdigest()
+        return self.directorio / f"{nombre}.bin", self.directorio / f"{nombre}.json"
+
+    @staticmethod
+    def _sello(estado: os.stat_result) -> Dict[str, int]:
+        """Tamaño y fecha de modificación (ns) del contenido en disco."""
+        return {"bytes_locales": estado.st_size, "mtime_local_ns": estado.st_mtime_ns}
+
+    def leer_metadatos(self, clave: str) -> Optional[Dict[str, Any]]:
+        """
+        Lee los metadatos de una entrada sin cargar su contenido.
+
+        Args:
+            clave: Identificador del archivo (p. ej. su ruta en SharePoint).
+
+        Returns:
+            Diccionario con los metadatos o None si la entrada no existe.
+        """
+        ruta_bin, ruta_meta = self._rutas(clave)
+        if not ruta_bin.exists() or not ruta_meta.exists():
+            return None
+        try:
+            return json.loads(ruta_meta.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def abrir(self, clave: str) -> Optional[Tuple[BinaryIO, Dict[str, Any]]]:
+        """
+        Abre una entrada del caché verificando la integridad de su contenido.
+
+        El contenido no se carga en memoria: se retorna el archivo abierto
+        para que el lector de Excel lo consuma directamente desde disco. Si el
+        tamaño y la fecha de modificación coinciden con los registrados, no se
+        vuelve a calcular el hash.
+
+        Args:
+            clave: Identificador del archivo.
+
+        Returns:
+            Tupla (archivo abierto en modo binario, metadatos) o None si no existe o está corrupta.
+        """
+        metadatos = self.leer_metadatos(clave)
+        if metadatos is None:
+            return None
+        ruta_bin, ruta_meta = self._rutas(clave)
+        try:
+            archivo = open(ruta_bin, "rb")
+        except OSError:
+            return None
+        sello = self._sello(os.fstat(archivo.fileno()))
+        if all(metadatos.get(campo) == valor for campo, valor in sello.items()):
+            return archivo, metadatos
+        if calcular_hash_archivo(archivo) != metadatos.get("sha256"):
+            archivo.close()
+            return None
+        # Contenido íntegro con otro sello (p. ej. entrada de una versión anterior o copiada): se actualiza
+        metadatos = {**metadatos, **sello}
+        try:
+            _escribir_atomico(ruta_meta, json.dumps(metadatos).encode("utf-8"))
+        except OSError:
+            pass
+        return archivo, metadatos
+
+    def guardar(self, clave: str, archivo: BinaryIO, metadatos: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Guarda el contenido de un archivo abierto y sus metadatos.
+
+        Args:
+            clave: Identificador del archivo.
+            archivo: Archivo binario con el contenido; queda posicionado al inicio.
+            metadatos: Metadatos del driveItem.
+
+        Returns:
+            Metadatos almacenados (incluye el hash del contenido).
+        """
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        ruta_bin, ruta_meta = self._rutas(clave)
+        registro = dict(metadatos)
+        registro["sha256"] = calcular_hash_archivo(archivo)
+        _copiar_atomico(ruta_bin, archivo)
+        registro.update(self._sello(ruta_bin.stat()))
+        _escribir_atomico(ruta_meta, json.dumps(registro).encode("utf-8"))
+        return registro
+
+    def actualizar_metadatos(self, clave: str, metadatos: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Actualiza los metadatos de una entrada conservando su contenido, hash y sello en disco.
+
+        Args:
+            clave: Identificador del archivo.
+            metadatos: Nuevos metadatos del driveItem.
+
+        Returns:
+            Metadatos almacenados.
+        """
+        _, ruta_meta = self._rutas(clave)
+        anterior = self.leer_metadatos(clave) or {}
+        registro = dict(metadatos)
+        registro["sha256"] = anterior.get("sha256")
+        for campo in ("bytes_locales", "mtime_local_ns"):
+            registro[campo] = anterior.get(campo)
+        _escribir_atomico(ruta_meta, json.dumps(registro).encode("utf-8"))
+        return registro
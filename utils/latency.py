@@ -0,0 +1,60 @@
+"""Módulo para medir la latencia de cada interacción (ejecución completa o de un fragmento)."""
+
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+import streamlit as st
+
+from config.settings import MONITOREO_CONFIG
+
+# Mediciones que se conservan por zona
+HISTORIAL_MAXIMO = 50
+
+
+def registrar_latencia(zona: str, segundos: float) -> None:
+    """
+    Guarda una medición en el historial de la sesión.
+    
+    Args:
+        zona: Nombre de la zona medida ('app' o el nombre del fragmento).
+        segundos: Duración de la ejecución.
+    """
+    latencias = st.session_state.setdefault('latencias', {})
+    latencias.setdefault(zona, deque(maxlen=HISTORIAL_MAXIMO)).append(segundos)
+
+
+@contextmanager
+def medir_latencia(zona: str) -> Iterator[None]:
+    """
+    Mide la duración del bloque y la registra en el historial de la zona.
+    
+    Args:
+        zona: Nombre de la zona medida.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_latencia(zona, time.perf_counter() - inicio)
+
+
+def mostrar_latencia(zona: str, etiqueta: str) -> None:
+    """
+    Muestra la última medición y la mediana de la zona (si está activado en `MONITOREO_CONFIG`).
+    
+    Args:
+        zona: Nombre de la zona medida.
+        etiqueta: Texto que identifica la zona en la interfaz.
+    """
+    if not MONITOREO_CONFIG['mostrar_latencias']:
+        return
+    historial = st.session_state.get('latencias', {}).get(zona)
+    if not historial:
+        return
+    st.caption(
+        f"⏱️ {etiqueta}: {historial[-1] * 1000:,.0f} ms "
+        f"(mediana {np.median(historial) * 1000:,.0f} ms en {len(historial)} ejecuciones)"
+    )
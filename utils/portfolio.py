@@ -0,0 +1,136 @@
+"""Módulo para el análisis de ahorro de una cartera de clientes (adaptador de Streamlit de `core.portfolio`)."""
+
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Dict, Optional
+
+import streamlit as st
+
+from config.settings import DATA_CONFIG
+from core import portfolio
+from core.competitiveness import MatrizCompetitividad
+from utils.streamlit_adapter import mostrar_resultado
+
+# Versiones del dataset cuyas TarifasCartera se conservan (la vigente y la anterior)
+VERSIONES_TARIFAS_CARTERA = 2
+
+_tarifas_por_version: "OrderedDict[str, portfolio.TarifasCartera]" = OrderedDict()
+_lock_tarifas = threading.Lock()
+_lock_detalle = threading.Lock()
+
+def obtener_tarifas_cartera(version: Optional[str], matriz: MatrizCompetitividad) -> portfolio.TarifasCartera:
+    """
+    Obtiene las TarifasCartera de una versión del dataset, construyéndolas una sola vez.
+    
+    Se comparten entre sesiones; se conservan las de las últimas
+    `VERSIONES_TARIFAS_CARTERA` versiones para las sesiones que aún no cambian de versión.
+    
+    Args:
+        version: Versión del dataset en uso (None para no guardarlas).
+        matriz: MatrizCompetitividad de esa versión.
+    
+    Returns:
+        TarifasCartera del dataset.
+    """
+    if version is None:
+        return portfolio.TarifasCartera(matriz)
+    with _lock_tarifas:
+        tarifas = _tarifas_por_version.get(version)
+        if tarifas is None:
+            tarifas = portfolio.TarifasCartera(matriz)
+            _tarifas_por_version[version] = tarifas
+            while len(_tarifas_por_version) > VERSIONES_TARIFAS_CARTERA:
+                _tarifas_por_version.popitem(last=False)
+        _tarifas_por_version.move_to_end(version)
+        return tarifas
+
+def _leer_detalle(archivo: Any) -> bytes:
+    """Contenido del archivo temporal del detalle (se invoca al pulsar la descarga, fuera del script)."""
+    with _lock_detalle:
+        if archivo.closed:
+            return b""
+        archivo.seek(0)
+        return archivo.read()
+
+def descartar_resultado_cartera(resultados: Optional[Dict]) -> None:
+    """
+    Cierra el archivo temporal del detalle de un análisis que se va a reemplazar o limpiar.
+    
+    Si el detalle pasó a disco, el archivo solo se elimina al cerrarlo.
+    
+    Args:
+        resultados: Diccionario retornado por `analizar_cartera()` o None.
+    """
+    if resultados and resultados.get('detalle_csv') is not None:
+        with _lock_detalle:
+            resultados['detalle_csv'].close()
+
+def analizar_cartera(
+    archivo: Any,
+    nombre_archivo: str,
+    matriz: MatrizCompetitividad,
+    version: Optional[str] = None
+) -> Optional[Dict]:
+    """
+    Calcula el ahorro de una cartera y muestra los errores y advertencias en la interfaz.
+    
+    Ver `core.portfolio.analizar_cartera()`. El detalle por cliente se escribe en un
+    archivo temporal que pasa a disco por encima de `DATA_CONFIG['memoria_maxima_detalle_cartera']`;
+    la sesión solo guarda el archivo y la descarga lo lee cuando se pide.
+    
+    Args:
+        archivo: Archivo de cartera subido (CSV o Excel).
+        nombre_archivo: Nombre del archivo subido.
+        matriz: MatrizCompetitividad del dataset en uso.
+        version: Versión del dataset en uso (para reutilizar sus TarifasCartera).
+    
+    Returns:
+        Diccionario con el análisis y el archivo temporal del detalle por cliente en
+        'detalle_csv', o None si hay error.
+    """
+    destino = tempfile.SpooledTemporaryFile(max_size=DATA_CONFIG['memoria_maxima_detalle_cartera'])
+    resultados = mostrar_resultado(portfolio.analizar_cartera(
+        archivo, nombre_archivo, matriz, destino, tarifas=obtener_tarifas_cartera(version, matriz)
+    ))
+    if resultados is None:
+        destino.close()
+        return None
+    return {**resultados, 'detalle_csv': destino}
+
+def mostrar_resultado_cartera(resultados: Dict) -> None:
+    """
+    Muestra el resumen del análisis de cartera y el botón de descarga del detalle.
+    
+    Args:
+        resultados: Diccionario retornado por `analizar_cartera()`.
+    """
+    if not resultados:
+        return
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Clientes", f"{resultados['clientes']:,}")
+    with col2:
+        st.metric("Clientes con ahorro", f"{resultados['clientes_con_ahorro']:,}")
+    with col3:
+        st.metric("Ahorro total de la cartera", f"${resultados['ahorro_total']:,.0f}")
+    
+    st.markdown("**Resumen por mercado, nivel de tensión y comercializador**")
+    st.dataframe(
+        resultados['resumen'].round(2).sort_values('AHORRO', ascending=False),
+        use_container_width=True,
+        hide_index=True
+    )
+    
+    st.markdown(f"**Detalle por cliente** (primeras {len(resultados['vista_previa']):,} filas)")
+    st.dataframe(resultados['vista_previa'].round(2), use_container_width=True, hide_index=True)
+    
+    st.download_button(
+        label="📥 Descargar detalle por cliente (CSV)",
+        data=partial(_leer_detalle, resultados['detalle_csv']),
+        file_name="ahorro_cartera.csv",
+        mime="text/csv",
+        key='descargar_cartera_btn'
+    )
@@ -0,0 +1,201 @@
+"""Módulo para la precarga programada del dataset de tarifas en el servidor."""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from auth.app_token import ProveedorTokenAplicacion
+from auth.sharepoint import SharePointClient
+from config.settings import PRECARGA_CONFIG
+from utils.background_load import GestorCargas, gestor_cargas
+from utils.comparison import comparar_con_cache
+from utils.dataset_cache import CacheDataset, EntradaDataset, cache_dataset, version_desde_metadatos
+
+ESTADO_VIGENTE = 'vigente'          # La versión en caché coincide con la de SharePoint
+ESTADO_ACTUALIZADO = 'actualizado'  # Se cargó una versión nueva
+ESTADO_ERROR = 'error'              # No se pudo revisar o cargar el archivo
+
+
+def precalentar_comparaciones(entrada: EntradaDataset) -> int:
+    """
+    Calcula y guarda en `cache_resultados` la comparación por defecto de cada mercado.
+
+    Es la que muestra el formulario al abrirlo: primer comercializador, primer nivel
+    de tensión y los últimos 12 periodos disponibles.
+
+    Args:
+        entrada: Entrada del dataset con su catálogo e índice.
+
+    Returns:
+        Número de comparaciones con datos guardadas en el caché.
+    """
+    catalogo = entrada.catalogo
+    total = 0
+    for mercado in catalogo.mercados:
+        comercializadores = catalogo.comercializadores(mercado)
+        niveles_tension = catalogo.niveles_tension(mercado)
+        if not comercializadores or not niveles_tension:
+            continue
+        comercializador, nt = comercializadores[0], niveles_tension[0]
+        periodos = catalogo.periodos(mercado, comercializador, nt)
+        if not periodos:
+            continue
+        resultado = comparar_con_cache(
+            entrada.df_tarifas, mercado, [comercializador], nt,
+            periodos[max(len(periodos) - 12, 0)], periodos[-1],
+            entrada.indice_grupos, entrada.version
+        )
+        total += len(resultado.datos or {})
+    return total
+
+
+class ProgramadorPrecarga:
+    """
+    Carga el dataset al iniciar y revisa periódicamente si el archivo cambió en SharePoint.
+
+    Usa una credencial de aplicación, por lo que no depende de ninguna sesión de
+    usuario. Cuando cambia la versión, la carga corre como un trabajo de
+    `gestor_cargas` (las sesiones que llegan durante la carga se unen a él) y la
+    entrada nueva reemplaza a la anterior en `cache_dataset` solo cuando está
+    completa; las sesiones abiertas siguen usando la versión que ya tenían.
+    """
+
+    def __init__(
+        self,
+        proveedor_token: ProveedorTokenAplicacion,
+        intervalo_segundos: float,
+        gestor: GestorCargas = gestor_cargas,
+        cache: CacheDataset = cache_dataset
+    ):
+        """
+        Inicializa el programador sin iniciar el hilo.
+
+        Args:
+            proveedor_token: Proveedor de tokens de aplicación de Microsoft Graph.
+            intervalo_segundos: Segundos entre revisiones.
+            gestor: Gestor de los trabajos de carga.
+            cache: Caché del dataset compartido.
+        """
+        self._proveedor_token = proveedor_token
+        self.intervalo_segundos = intervalo_segundos
+        self._gestor = gestor
+        self._cache = cache
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._estado: Dict[str, Any] = {
+            'revisiones': 0, 'ultima_revision': None, 'ultimo_resultado': None,
+            'ultimo_error': None, 'version': None, 'comparaciones_precalentadas': 0
+        }
+
+    def iniciar(self) -> None:
+        """Inicia el hilo de revisión si aún no está corriendo (la primera revisión es inmediata)."""
+        with self._lock:
+            if self._hilo is not None and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._bucle, name="precarga-tarifas", daemon=True)
+            self._hilo.start()
+
+    def detener(self) -> None:
+        """Detiene el hilo tras la revisión en curso."""
+        self._detener.set()
+
+    def _bucle(self) -> None:
+        """Cuerpo del hilo: revisa, espera el intervalo y repite hasta que se detenga."""
+        while not self._detener.is_set():
+            try:
+                self.revisar()
+            except Exception as e:
+                self._registrar(ESTADO_ERROR, error=f"Error inesperado en la precarga: {str(e)}")
+            self._detener.wait(self.intervalo_segundos)
+
+    def revisar(self) -> str:
+        """
+        Revalida el archivo en SharePoint y carga la versión nueva si cambió.
+
+        Returns:
+            'vigente', 'actualizado' o 'error'.
+        """
+        if not self._proveedor_token.obtener_token():
+            return self._registrar(
+                ESTADO_ERROR, error=f"No se pudo obtener el token de aplicación: {self._proveedor_token.ultimo_error}"
+            )
+
+        # El cliente pide el token vigente en cada solicitud: una carga larga no usa un token vencido
+        cliente = SharePointClient(proveedor_token=self._proveedor_token, mostrar_errores=False)
+        metadatos = cliente.get_file_metadata()
+        if not metadatos:
+            return self._registrar(
+                ESTADO_ERROR, error=cliente.ultimo_error or "No se pudieron consultar los metadatos del archivo"
+            )
+
+        version = version_desde_metadatos(metadatos)
+        entrada = self._cache.actual()
+        if entrada is not None and entrada.version == version:
+            return self._registrar(ESTADO_VIGENTE, version=version)
+
+        trabajo = self._gestor.iniciar(version, metadatos, cliente)
+        trabajo.terminado.wait()
+        if trabajo.fallido:
+            return self._registrar(ESTADO_ERROR, version=version, error=trabajo.error)
+
+        precalentadas = precalentar_comparaciones(trabajo.entrada)
+        return self._registrar(ESTADO_ACTUALIZADO, version=version, precalentadas=precalentadas)
+
+    def _registrar(
+        self,
+        resultado: str,
+        version: Optional[str] = None,
+        error: Optional[str] = None,
+        precalentadas: Optional[int] = None
+    ) -> str:
+        """Actualiza el estado de la última revisión y retorna su resultado."""
+        with self._lock:
+            self._estado['revisiones'] += 1
+            self._estado['ultima_revision'] = time.time()
+            self._estado['ultimo_resultado'] = resultado
+            self._estado['ultimo_error'] = error
+            if version is not None:
+                self._estado['version'] = version
+            if precalentadas is not None:
+                self._estado['comparaciones_precalentadas'] = precalentadas
+        return resultado
+
+    def estado(self) -> Dict[str, Any]:
+        """
+        Obtiene el estado de la última revisión.
+
+        Returns:
+            Diccionario con revisiones, ultima_revision (epoch), ultimo_resultado,
+            ultimo_error, version y comparaciones_precalentadas.
+        """
+        with self._lock:
+            return dict(self._estado)
+
+
+_programador: Optional[ProgramadorPrecarga] = None
+_lock_programador = threading.Lock()
+
+
+def iniciar_precarga(proveedor_token: ProveedorTokenAplicacion) -> Optional[ProgramadorPrecarga]:
+    """
+    Inicia (una sola vez por proceso) la precarga programada si está activada en `PRECARGA_CONFIG`.
+
+    Streamlit no ofrece un gancho de arranque del servidor: se invoca en cada
+    ejecución de app.py y solo la primera crea el programador.
+
+    Args:
+        proveedor_token: Proveedor de tokens de aplicación de Microsoft Graph.
+
+    Returns:
+        El programador del proceso o None si la precarga está desactivada.
+    """
+    global _programador
+    if not PRECARGA_CONFIG['activa']:
+        return None
+    with _lock_programador:
+        if _programador is None:
+            _programador = ProgramadorPrecarga(proveedor_token, PRECARGA_CONFIG['intervalo_minutos'] * 60)
+            _programador.iniciar()
+    return _programador
@@ -0,0 +1,179 @@
+"""Módulo para el caché compartido (a nivel de proceso) de resultados de comparación."""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from config.settings import CACHE_CONFIG
+
+
+class ClaveResultado(NamedTuple):
+    """Identifica una comparación: versión del dataset y parámetros seleccionados."""
+    version: str
+    mercado: Any
+    nt: Any
+    comercializador: Any
+    periodo_inicio: Any
+    periodo_fin: Any
+
+
+@dataclass(frozen=True)
+class ResultadoCacheado:
+    """
+    Resultado de una comparación (o archivo exportado, o figura) compartido entre sesiones.
+
+    Es de solo lectura: el DataFrame y los mensajes se comparten por referencia,
+    por lo que ninguna sesión debe modificarlos en sitio (las funciones de
+    filtrado, promedios, gráficos y ahorro trabajan sobre copias).
+    `datos` es None cuando el comercializador no tiene periodos en común con RUITOQUE,
+    el contenido del archivo (bytes) en el caché de exportaciones y la figura de
+    Plotly en el caché de gráficos.
+    """
+    datos: Any
+    mensajes: Any
+    tamano_bytes: int
+
+
+def _tamano_bytes(datos: Optional[Union[pd.DataFrame, bytes]], mensajes: Any) -> int:
+    """Tamaño aproximado en memoria de un resultado."""
+    if isinstance(datos, (bytes, bytearray)):
+        tamano = len(datos)
+    else:
+        tamano = int(datos.memory_usage(deep=True).sum()) if datos is not None else 0
+    # Los mensajes guardan arreglos de NumPy y algunas cadenas de cabecera
+    for valor in getattr(mensajes, '__dict__', {}).values():
+        if isinstance(valor, np.ndarray):
+            tamano += valor.nbytes
+        elif isinstance(valor, list):
+            tamano += sum(len(str(v)) for v in valor)
+    return tamano
+
+
+class CacheResultados:
+    """
+    Caché LRU de resultados de comparación, acotado por tamaño en bytes.
+
+    Las claves incluyen la versión del dataset, por lo que conviven los resultados
+    de varias versiones: una sesión que sigue usando la versión anterior no descarta
+    los de la nueva (ni al revés). Los de una versión que ya nadie consulta dejan de
+    marcarse como usados y salen por el desalojo LRU.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Inicializa el caché vacío.
+
+        Args:
+            max_bytes: Tamaño máximo total de los resultados guardados.
+        """
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[ClaveResultado, ResultadoCacheado]" = OrderedDict()
+        self._bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave: ClaveResultado) -> Optional[ResultadoCacheado]:
+        """
+        Busca un resultado y lo marca como usado recientemente.
+
+        Args:
+            clave: Clave de la comparación.
+
+        Returns:
+            ResultadoCacheado o None si no está en el caché.
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada
+
+    def contiene(self, clave: ClaveResultado) -> bool:
+        """
+        Indica si un resultado está en el caché, sin marcarlo como usado ni contar la consulta.
+
+        Args:
+            clave: Clave de la comparación.
+
+        Returns:
+            True si el resultado está guardado.
+        """
+        with self._lock:
+            return clave in self._entradas
+
+    def guardar(
+        self,
+        clave: ClaveResultado,
+        datos: Any,
+        mensajes: Any,
+        tamano_bytes: Optional[int] = None
+    ) -> ResultadoCacheado:
+        """
+        Guarda un resultado, desalojando los menos usados si se supera el tamaño máximo.
+
+        Args:
+            clave: Clave de la comparación.
+            datos: DataFrame de la comparación (None si no hubo periodos para comparar), contenido del archivo o figura.
+            mensajes: Mensajes del análisis.
+            tamano_bytes: Tamaño del resultado si ya se conoce (p. ej. figuras); por defecto se estima.
+
+        Returns:
+            El ResultadoCacheado (se retorna aunque no quepa en el caché).
+        """
+        if tamano_bytes is None:
+            tamano_bytes = _tamano_bytes(datos, mensajes)
+        entrada = ResultadoCacheado(datos=datos, mensajes=mensajes, tamano_bytes=tamano_bytes)
+        with self._lock:
+            if entrada.tamano_bytes > self.max_bytes:
+                return entrada
+
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior.tamano_bytes
+            self._entradas[clave] = entrada
+            self._bytes += entrada.tamano_bytes
+
+            while self._bytes > self.max_bytes:
+                _, desalojada = self._entradas.popitem(last=False)
+                self._bytes -= desalojada.tamano_bytes
+                self.desalojos += 1
+        return entrada
+
+    def invalidar(self) -> None:
+        """Descarta todos los resultados guardados."""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def estadisticas(self) -> Dict[str, Any]:
+        """
+        Obtiene los contadores del caché.
+
+        Returns:
+            Diccionario con entradas, bytes usados, máximo, aciertos, fallos,
+            tasa de aciertos (%) y desalojos.
+        """
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'tasa_aciertos': (self.aciertos / consultas * 100) if consultas else 0.0,
+                'desalojos': self.desalojos
+            }
+
+
+# Instancia única por proceso, compartida por todas las sesiones (ver `cache_dataset`)
+cache_resultados = CacheResultados(CACHE_CONFIG['resultados_max_bytes'])
@@ -1,8 +1,16 @@
 """Módulo para el análisis de ahorro en tarifas de energía."""
 
+from functools import partial
+
+import numpy as np
 import pandas as pd
 import streamlit as st
-from typing import Dict, Tuple, Optional
+from typing import Dict, Optional, Sequence
+
+from core import savings
+from core.period_index import IndicePeriodos
+from core.savings import CuboAhorro, VENTANAS_AHORRO_MESES
+from utils.streamlit_adapter import mostrar_resultado
 
 def calcular_ahorro_energia(
     df_resultado: pd.DataFrame,
@@ -11,91 +19,83 @@ def calcular_ahorro_energia(
     consumo_promedio_kwh: float
 ) -> Optional[Dict]:
     """
-    Calcula el ahorro total en energía comparando RUITOQUE vs otro comercializador.
+    Calcula el ahorro total en energía y muestra los errores en la interfaz.
     
-    Args:
-        df_resultado: DataFrame con los resultados de la comparación
-        periodo_inicio: Periodo inicial del análisis (formato: YYYY-MM)
-        periodo_fin: Periodo final del análisis (formato: YYYY-MM)
-        consumo_promedio_kwh: Consumo promedio mensual del cliente en kWh
+    Ver `core.savings.calcular_ahorro_energia()`.
     
     Returns:
         Diccionario con los resultados del análisis de ahorro o None si hay error
     """
-    try:
-        # Filtrar datos por el rango de periodos seleccionado
-        df_filtrado = df_resultado[
-            (df_resultado['FECHA'] >= periodo_inicio) & 
-            (df_resultado['FECHA'] <= periodo_fin)
-        ].copy()
-        
-        if df_filtrado.empty:
-            st.error("❌ No hay datos disponibles para el rango de periodos seleccionado")
-            return None
-        
-        # Verificar que el DataFrame tiene la estructura esperada (columnas con sufijos)
-        if 'CU_RTQ' not in df_filtrado.columns:
-            st.error("❌ El DataFrame no tiene la estructura esperada. Falta la columna 'CU_RTQ'")
-            return None
-        
-        # Identificar la columna del competidor
-        columnas_cu = [col for col in df_filtrado.columns if col.startswith('CU_') and col != 'CU_RTQ']
-        if not columnas_cu:
-            st.error("❌ No se encontró la columna del competidor en los datos")
-            return None
-        
-        col_competidor = columnas_cu[0]
-        competidor = col_competidor.replace('CU_', '')
-        
-        # Calcular costos totales por comercializador (sumatoria de todos los periodos)
-        # Fórmula: Σ(CU_mes_n × Consumo_Promedio) para cada comercializador
-        costo_total_ruitoque = (df_filtrado['CU_RTQ'] * consumo_promedio_kwh).sum()
-        costo_total_competidor = (df_filtrado[col_competidor] * consumo_promedio_kwh).sum()
-        
-        # Calcular ahorro total
-        # Ahorro = Σ(CU_mes_n × Consumo_Promedio)_Competidor - Σ(CU_mes_n × Consumo_Promedio)_RUITOQUE
-        ahorro_absoluto = costo_total_competidor - costo_total_ruitoque
-        ahorro_porcentual = (ahorro_absoluto / costo_total_competidor) * 100 if costo_total_competidor > 0 else 0
-        
-        # Calcular costos promedio por kWh (para referencia)
-        cu_promedio_ruitoque = df_filtrado['CU_RTQ'].mean()
-        cu_promedio_competidor = df_filtrado[col_competidor].mean()
-        
-        # Calcular ahorro por kWh (diferencia promedio)
-        ahorro_por_kwh = cu_promedio_competidor - cu_promedio_ruitoque
-        
-        # Calcular ahorro mensual promedio basado en la diferencia promedio
-        ahorro_mensual_promedio = ahorro_por_kwh * consumo_promedio_kwh
-        
-        # Calcular número total de periodos analizados
-        total_periodos = len(df_filtrado)
-        
-        # Preparar resultados
-        resultados = {
-            'periodo_inicio': periodo_inicio,
-            'periodo_fin': periodo_fin,
-            'periodos_analizados': len(df_filtrado['FECHA'].unique()),
-            'total_periodos': total_periodos,
-            'consumo_promedio_kwh': consumo_promedio_kwh,
-            'competidor': competidor,
-            'costo_total_ruitoque': costo_total_ruitoque,
-            'costo_total_competidor': costo_total_competidor,
-            'ahorro_absoluto': ahorro_absoluto,
-            'ahorro_porcentual': ahorro_porcentual,
-            'cu_promedio_ruitoque': cu_promedio_ruitoque,
-            'cu_promedio_competidor': cu_promedio_competidor,
-            'ahorro_por_kwh': ahorro_por_kwh,
-            'ahorro_mensual_promedio': ahorro_mensual_promedio,
-            'hay_ahorro': ahorro_absoluto > 0,
-            'df_detalle': df_filtrado,
-            'col_competidor': col_competidor
-        }
-        
-        return resultados
-        
-    except Exception as e:
-        st.error(f"❌ Error al calcular el ahorro: {str(e)}")
-        return None
+    return mostrar_resultado(
+        savings.calcular_ahorro_energia(df_resultado, periodo_inicio, periodo_fin, consumo_promedio_kwh)
+    )
+
+def calcular_cubo_ahorro(
+    resultados: Dict[str, pd.DataFrame],
+    consumos_kwh: Sequence[float],
+    ventanas_meses: Sequence[int] = VENTANAS_AHORRO_MESES,
+    periodo_fin: Optional[str] = None,
+    indices_periodos: Optional[Dict[str, IndicePeriodos]] = None
+) -> Optional[CuboAhorro]:
+    """
+    Calcula la tabla de ahorro por consumo y ventana y muestra los errores en la interfaz.
+    
+    Ver `core.savings.calcular_cubo_ahorro()`.
+    
+    Returns:
+        CuboAhorro o None si hay error
+    """
+    return mostrar_resultado(
+        savings.calcular_cubo_ahorro(resultados, consumos_kwh, ventanas_meses, periodo_fin, indices_periodos)
+    )
+
+def _csv_cubo_ahorro(cubo: CuboAhorro) -> bytes:
+    """CSV del cubo de ahorro en formato largo (se invoca al pulsar la descarga, fuera del script)."""
+    return cubo.tabla_larga().to_csv(index=False).encode('utf-8')
+
+def mostrar_cubo_ahorro(cubo: CuboAhorro) -> None:
+    """
+    Muestra el cubo de ahorro como tablas de calor, una pestaña por ventana.
+    
+    Args:
+        cubo: CuboAhorro calculado
+    """
+    if cubo is None:
+        return
+    
+    st.caption(
+        f"Ahorro total del cliente al cambiarse a RUITOQUE en los últimos N meses hasta {cubo.periodo_fin}. "
+        "Verde: RUITOQUE más económico; rojo: costo adicional."
+    )
+    
+    pestanas = st.tabs([f"Últimos {v} meses" for v in cubo.ventanas_meses])
+    for k, (pestana, ventana) in enumerate(zip(pestanas, cubo.ventanas_meses)):
+        with pestana:
+            resumen = pd.DataFrame({
+                'Periodos con datos': cubo.periodos[:, k],
+                'Ahorro %': cubo.ahorro_porcentual[:, k]
+            }, index=cubo.comercializadores).T
+            st.dataframe(resumen.style.format("{:,.2f}", subset=pd.IndexSlice['Ahorro %', :]), use_container_width=True)
+            
+            tabla = cubo.tabla(ventana)
+            # Escala simétrica para que el ahorro cero quede en el centro del mapa de color
+            limite = np.nanmax(np.abs(tabla.to_numpy())) if tabla.notna().any().any() else 0
+            st.dataframe(
+                tabla.style
+                .background_gradient(cmap='RdYlGn', axis=None, vmin=-limite, vmax=limite)
+                .format("${:,.0f}", na_rep="-")
+                .format_index("{:,.0f} kWh"),
+                use_container_width=True
+            )
+    
+    st.download_button(
+        label="📥 Descargar tabla de ahorro (CSV)",
+        # Se serializa solo al pulsar la descarga, no en cada ejecución del fragmento
+        data=partial(_csv_cubo_ahorro, cubo),
+        file_name=f"tabla_ahorro_{cubo.periodo_fin}.csv",
+        mime="text/csv",
+        key='descargar_cubo_ahorro_btn'
+    )
 
 def mostrar_analisis_ahorro(resultados: Dict) -> None:
     """
@@ -0,0 +1,93 @@
+"""Módulo para el catálogo precalculado de opciones del formulario de comparación."""
+
+from typing import Any, Dict, List, Tuple
+
+import pandas as pd
+
+from core.data_processing import vista_fechas
+
+COMERCIALIZADOR_BASE = "RUITOQUE"
+
+
+class CatalogoSelectores:
+    """
+    Opciones de los selectores y resumen del dataset, calculados una vez por versión.
+
+    Con el catálogo, cada interacción con los widgets se resuelve con búsquedas
+    en diccionarios en lugar de filtrar el DataFrame completo.
+    """
+
+    def __init__(self, df_tarifas: pd.DataFrame):
+        """
+        Construye el catálogo en una sola pasada agrupada sobre el dataset.
+
+        Args:
+            df_tarifas: DataFrame procesado de tarifas (esquema normal o compacto).
+        """
+        self.total_registros = len(df_tarifas)
+        self.num_mercados = df_tarifas['MERCADO'].nunique()
+        self.num_comercializadores = df_tarifas['COMERCIALIZADOR'].nunique()
+        self.num_niveles_tension = df_tarifas['NT'].nunique()
+
+        vista_previa = df_tarifas.sort_values('FECHA', ascending=False).head(5)
+        self.vista_previa = vista_previa.assign(FECHA=vista_fechas(vista_previa['FECHA']))
+
+        periodos = (
+            df_tarifas.dropna(subset=['FECHA'])
+            .groupby(['MERCADO', 'COMERCIALIZADOR', 'NT'], observed=True, sort=False)['FECHA']
+            .unique()
+        )
+
+        comercializadores: Dict[Any, set] = {}
+        niveles: Dict[Any, set] = {}
+        self._periodos: Dict[Tuple[Any, Any, Any], List[str]] = {}
+        for (mercado, comercializador, nt), fechas in periodos.items():
+            if comercializador != COMERCIALIZADOR_BASE:
+                comercializadores.setdefault(mercado, set()).add(comercializador)
+            else:
+                comercializadores.setdefault(mercado, set())
+            niveles.setdefault(mercado, set()).add(nt)
+            self._periodos[(mercado, comercializador, nt)] = sorted(vista_fechas(pd.Series(fechas)))
+
+        self.mercados: List[Any] = sorted(comercializadores)
+        self._comercializadores = {m: sorted(c) for m, c in comercializadores.items()}
+        self._niveles = {m: sorted(n) for m, n in niveles.items()}
+
+    def comercializadores(self, mercado: Any, excluir: Tuple[Any, ...] = ()) -> List[Any]:
+        """
+        Comercializadores de un mercado (sin RUITOQUE), ordenados.
+
+        Args:
+            mercado: Mercado seleccionado.
+            excluir: Comercializadores que no deben aparecer (ya seleccionados).
+
+        Returns:
+            Lista de comercializadores.
+        """
+        return [c for c in self._comercializadores.get(mercado, []) if c not in excluir]
+
+    def niveles_tension(self, mercado: Any) -> List[Any]:
+        """
+        Niveles de tensión disponibles en un mercado, ordenados.
+
+        Args:
+            mercado: Mercado seleccionado.
+
+        Returns:
+            Lista de niveles de tensión.
+        """
+        return self._niveles.get(mercado, [])
+
+    def periodos(self, mercado: Any, comercializador: Any, nt: Any) -> List[str]:
+        """
+        Periodos disponibles ('YYYY-MM') de un comercializador en un mercado y NT, ordenados.
+
+        Args:
+            mercado: Mercado seleccionado.
+            comercializador: Comercializador seleccionado.
+            nt: Nivel de tensión seleccionado.
+
+        Returns:
+            Lista de periodos.
+        """
+        return self._periodos.get((mercado, comercializador, nt), [])
@@ -0,0 +1,123 @@
+"""Módulo para la instantánea columnar (Parquet) de la tabla de tarifas procesada."""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from config.constants import SNAPSHOT_SCHEMA_VERSION
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # La instantánea es opcional: sin pyarrow se usa siempre el camino completo
+    pa = None
+    pq = None
+
+NOMBRE_ARCHIVO_SNAPSHOT = "snapshot_tarifas.parquet"
+CLAVE_METADATOS = b"tarifas_snapshot"
+
+
+def snapshot_disponible() -> bool:
+    """Indica si las instantáneas están disponibles (requiere pyarrow)."""
+    return pq is not None
+
+
+def _ruta_snapshot(directorio: str) -> Path:
+    return Path(directorio) / NOMBRE_ARCHIVO_SNAPSHOT
+
+
+def leer_metadatos_snapshot(directorio: str) -> Optional[Dict[str, Any]]:
+    """
+    Lee los metadatos de la instantánea sin cargar sus datos.
+
+    Args:
+        directorio: Carpeta donde se guarda la instantánea.
+
+    Returns:
+        Diccionario con schema_version, eTag, sha256 y fecha de creación, o None si no existe.
+    """
+    ruta = _ruta_snapshot(directorio)
+    if not snapshot_disponible() or not ruta.exists():
+        return None
+    try:
+        metadatos = pq.read_schema(ruta).metadata or {}
+        return json.loads(metadatos[CLAVE_METADATOS])
+    except (OSError, KeyError, ValueError, pa.ArrowException):
+        return None
+
+
+def cargar_snapshot(directorio: str, etag: Optional[str] = None, sha256: Optional[str] = None) -> Optional[pd.DataFrame]:
+    """
+    Carga la instantánea si sigue siendo válida para la versión del archivo.
+
+    Es válida cuando su versión de esquema coincide con la del código y
+    corresponde al mismo archivo de origen (mismo eTag o mismo hash de contenido).
+
+    Args:
+        directorio: Carpeta donde se guarda la instantánea.
+        etag: eTag actual del archivo en SharePoint.
+        sha256: Hash del contenido actual del archivo.
+
+    Returns:
+        DataFrame procesado o None si no existe, está desactualizada o fue creada con otro esquema.
+    """
+    metadatos = leer_metadatos_snapshot(directorio)
+    if metadatos is None or metadatos.get("schema_version") != SNAPSHOT_SCHEMA_VERSION:
+        return None
+
+    coincide_etag = etag is not None and metadatos.get("eTag") == etag
+    coincide_hash = sha256 is not None and metadatos.get("sha256") == sha256
+    if not (coincide_etag or coincide_hash):
+        return None
+
+    try:
+        return pq.read_table(_ruta_snapshot(directorio)).to_pandas()
+    except (OSError, pa.ArrowException):
+        return None
+
+
+def guardar_snapshot(df: pd.DataFrame, directorio: str, etag: Optional[str], sha256: Optional[str]) -> bool:
+    """
+    Guarda la tabla procesada como instantánea Parquet etiquetada con su origen.
+
+    Args:
+        df: DataFrame procesado de tarifas.
+        directorio: Carpeta donde se guarda la instantánea.
+        etag: eTag del archivo de origen.
+        sha256: Hash del contenido del archivo de origen.
+
+    Returns:
+        True si se guardó la instantánea, False en caso contrario.
+    """
+    if not snapshot_disponible():
+        return False
+
+    metadatos = {
+        "schema_version": SNAPSHOT_SCHEMA_VERSION,
+        "eTag": etag,
+        "sha256": sha256,
+        "creado": time.time()
+    }
+    ruta = _ruta_snapshot(directorio)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    fd, ruta_tmp = tempfile.mkstemp(dir=ruta.parent, prefix=ruta.name, suffix=".tmp")
+    os.close(fd)
+    try:
+        # La conversión también puede fallar (p. ej. columnas object con tipos mezclados)
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        tabla = tabla.replace_schema_metadata({
+            **(tabla.schema.metadata or {}),
+            CLAVE_METADATOS: json.dumps(metadatos).encode("utf-8")
+        })
+        pq.write_table(tabla, ruta_tmp)
+        os.replace(ruta_tmp, ruta)
+        return True
+    except (OSError, pa.ArrowException):
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        return False
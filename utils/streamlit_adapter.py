@@ -0,0 +1,32 @@
+"""Módulo para presentar en Streamlit los resultados del núcleo de cálculo."""
+
+from typing import Any, Callable, Optional
+
+import streamlit as st
+
+from core.resultado import ResultadoCalculo
+
+
+def mostrar_resultado(
+    resultado: ResultadoCalculo,
+    mostrar_mensaje: Optional[Callable[[str], Any]] = None
+) -> Any:
+    """
+    Muestra las advertencias, el error y (opcionalmente) los mensajes de un resultado.
+    
+    Args:
+        resultado: Resultado de una función de `core`.
+        mostrar_mensaje: Función de Streamlit para los mensajes (p. ej. `st.success`);
+                         None para no mostrarlos.
+    
+    Returns:
+        Los datos del resultado (None si hubo error).
+    """
+    for advertencia in resultado.advertencias:
+        st.warning(advertencia)
+    if resultado.error:
+        st.error(resultado.error)
+    if mostrar_mensaje is not None:
+        for mensaje in resultado.mensajes:
+            mostrar_mensaje(mensaje)
+    return resultado.datos
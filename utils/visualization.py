@@ -1,10 +1,62 @@
 """Módulo para la visualización de datos y gráficos."""
 
 import plotly.graph_objects as go
+import numpy as np
 import pandas as pd
-from typing import Optional
+from typing import Any, NamedTuple, Optional, Tuple
 
-def crear_grafico_comparacion(df_resultado: pd.DataFrame, periodo_inicio: str = None, periodo_fin: str = None) -> Optional[go.Figure]:
+from config.settings import CACHE_CONFIG, GRAFICOS_CONFIG
+from core.downsampling import indices_lttb
+from utils.result_cache import CacheResultados
+
+
+class ClaveGrafico(NamedTuple):
+    """Identifica una figura: versión del dataset, comparación y ventana de periodos."""
+    version: str
+    mercado: Any
+    nt: Any
+    comercializadores: Tuple[str, ...]
+    periodo_inicio: Any
+    periodo_fin: Any
+
+
+def _clase_traza(total_puntos: int, umbral_webgl: Optional[int] = None) -> type:
+    """Scattergl (WebGL) si la figura supera el umbral de puntos; Scatter (SVG) en otro caso."""
+    umbral_webgl = GRAFICOS_CONFIG['umbral_webgl'] if umbral_webgl is None else umbral_webgl
+    return go.Scattergl if total_puntos > umbral_webgl else go.Scatter
+
+
+def _reducir_serie(x: pd.Series, y: pd.Series, max_puntos: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Valores de la serie para graficar, reducidos con LTTB si superan `max_puntos`.
+    
+    Args:
+        x: Periodos de la serie.
+        y: Valores de la serie.
+        max_puntos: Puntos máximos (0 para no reducir). Por defecto usa `GRAFICOS_CONFIG`.
+    
+    Returns:
+        Tupla (x, y) como arreglos.
+    """
+    max_puntos = GRAFICOS_CONFIG['max_puntos_serie'] if max_puntos is None else max_puntos
+    x, y = x.to_numpy(), y.to_numpy()
+    if max_puntos and len(y) > max_puntos:
+        indices = indices_lttb(y, max_puntos)
+        return x[indices], y[indices]
+    return x, y
+
+
+def _tamano_figura(fig: go.Figure) -> int:
+    """Tamaño aproximado en memoria de una figura (valores x, y de sus trazas)."""
+    return sum(16 * (len(traza.x) + len(traza.y)) for traza in fig.data if traza.x is not None)
+
+def crear_grafico_comparacion(
+    df_resultado: pd.DataFrame,
+    periodo_inicio: str = None,
+    periodo_fin: str = None,
+    umbral_webgl: Optional[int] = None,
+    max_puntos: Optional[int] = None
+) -> Optional[go.Figure]:
     """
     Crea un gráfico interactivo comparando CU de RUITOQUE vs otro comercializador.
     
@@ -12,13 +64,15 @@ def crear_grafico_comparacion(df_resultado: pd.DataFrame, periodo_inicio: str =
         df_resultado: DataFrame con los resultados de la comparación.
         periodo_inicio: Periodo de inicio para filtrar (opcional)
         periodo_fin: Periodo final para filtrar (opcional)
+        umbral_webgl: Puntos a partir de los cuales se usan trazas WebGL (por defecto, `GRAFICOS_CONFIG`)
+        max_puntos: Puntos máximos por serie, reducidos con LTTB (por defecto, `GRAFICOS_CONFIG`)
     
     Returns:
         Figura de Plotly o None si hay error.
     """
     try:
-        # Filtrar datos si se especifican periodos
-        df_plot = df_resultado.copy()
+        # Filtrar datos si se especifican periodos (el filtro ya produce un DataFrame nuevo)
+        df_plot = df_resultado
         if periodo_inicio and periodo_fin:
             df_plot = df_plot[
                 (df_plot['FECHA'] >= periodo_inicio) & 
@@ -35,23 +89,25 @@ def crear_grafico_comparacion(df_resultado: pd.DataFrame, periodo_inicio: str =
         # Crear figura
         fig = go.Figure()
 
-        # Separar periodos exitosos y de atención
-        periodos_exitosos = df_plot[df_plot['ESTADO'] == '✅ Exitoso']
+        # Separar periodos de atención
         periodos_atencion = df_plot[df_plot['ESTADO'] == '❌ Atención']
+        Traza = _clase_traza(2 * len(df_plot) + len(periodos_atencion), umbral_webgl)
 
         # Agregar línea para RUITOQUE (todos los periodos)
-        fig.add_trace(go.Scatter(
-            x=df_plot['FECHA'],
-            y=df_plot['CU_RTQ'],
+        x, y = _reducir_serie(df_plot['FECHA'], df_plot['CU_RTQ'], max_puntos)
+        fig.add_trace(Traza(
+            x=x,
+            y=y,
             name='RUITOQUE',
             line=dict(color='#64B43F', width=2),
             mode='lines+markers'
         ))
 
         # Agregar línea para el otro comercializador (todos los periodos)
-        fig.add_trace(go.Scatter(
-            x=df_plot['FECHA'],
-            y=df_plot[col_com],
+        x, y = _reducir_serie(df_plot['FECHA'], df_plot[col_com], max_puntos)
+        fig.add_trace(Traza(
+            x=x,
+            y=y,
             name=comercializador,
             line=dict(color='#FF4B4B', width=2),
             mode='lines+markers'
@@ -59,7 +115,7 @@ def crear_grafico_comparacion(df_resultado: pd.DataFrame, periodo_inicio: str =
 
         # Agregar marcadores especiales para periodos de atención
         if not periodos_atencion.empty:
-            fig.add_trace(go.Scatter(
+            fig.add_trace(Traza(
                 x=periodos_atencion['FECHA'],
                 y=periodos_atencion['CU_RTQ'],
                 name='Periodos de Atención',
@@ -102,7 +158,14 @@ def crear_grafico_comparacion(df_resultado: pd.DataFrame, periodo_inicio: str =
         return None
 
 
-def crear_grafico_comparacion_multiple(resultados_comparacion: dict, periodo_inicio: str = None, periodo_fin: str = None) -> Optional[go.Figure]:
+def crear_grafico_comparacion_multiple(
+    resultados_comparacion: dict,
+    periodo_inicio: str = None,
+    periodo_fin: str = None,
+    indices_periodos: Optional[dict] = None,
+    umbral_webgl: Optional[int] = None,
+    max_puntos: Optional[int] = None
+) -> Optional[go.Figure]:
     """
     Crea un gráfico interactivo comparando CU de RUITOQUE vs múltiples comercializadores.
     
@@ -110,6 +173,10 @@ def crear_grafico_comparacion_multiple(resultados_comparacion: dict, periodo_ini
         resultados_comparacion: Diccionario con DataFrames de resultados por comercializador.
         periodo_inicio: Periodo de inicio para filtrar (opcional)
         periodo_fin: Periodo final para filtrar (opcional)
+        indices_periodos: Diccionario con el `IndicePeriodos` de cada comercializador (opcional);
+                          si se proporciona, el rango se toma como porción sin copiar el DataFrame.
+        umbral_webgl: Puntos a partir de los cuales se usan trazas WebGL (por defecto, `GRAFICOS_CONFIG`)
+        max_puntos: Puntos máximos por serie, reducidos con LTTB (por defecto, `GRAFICOS_CONFIG`)
     
     Returns:
         Figura de Plotly o None si hay error.
@@ -124,22 +191,36 @@ def crear_grafico_comparacion_multiple(resultados_comparacion: dict, periodo_ini
         # Colores para los comercializadores (excluyendo RUITOQUE que siempre es verde)
         colores_comercializadores = ['#FF4B4B', '#4B9FFF', '#FFB84B', '#9B4BFF', '#FF6B9D']
         
-        # Agregar línea para RUITOQUE (usar el primer DataFrame para obtener las fechas)
-        primer_df = list(resultados_comparacion.values())[0]
-        df_rtq = primer_df.copy()
-        if periodo_inicio and periodo_fin:
-            df_rtq = df_rtq[
-                (df_rtq['FECHA'] >= periodo_inicio) & 
-                (df_rtq['FECHA'] <= periodo_fin)
-            ]
+        def filtrar(comercializador: str, df_resultado: pd.DataFrame) -> pd.DataFrame:
+            if indices_periodos and comercializador in indices_periodos:
+                return indices_periodos[comercializador].filtrar(periodo_inicio, periodo_fin)
+            df_plot = df_resultado
+            if periodo_inicio and periodo_fin:
+                df_plot = df_plot[
+                    (df_plot['FECHA'] >= periodo_inicio) & 
+                    (df_plot['FECHA'] <= periodo_fin)
+                ]
+            return df_plot
+
+        # Filtrar una sola vez cada resultado; el total de puntos decide el tipo de traza
+        filtrados = {
+            comercializador: filtrar(comercializador, df_resultado)
+            for comercializador, df_resultado in resultados_comparacion.items()
+        }
+
+        # Línea de RUITOQUE: usar el primer DataFrame para obtener las fechas
+        df_rtq = next(iter(filtrados.values()))
         
         if df_rtq.empty:
             return None
 
+        Traza = _clase_traza(len(df_rtq) + sum(len(df_plot) for df_plot in filtrados.values()), umbral_webgl)
+
         # Agregar línea para RUITOQUE
-        fig.add_trace(go.Scatter(
-            x=df_rtq['FECHA'],
-            y=df_rtq['CU_RTQ'],
+        x, y = _reducir_serie(df_rtq['FECHA'], df_rtq['CU_RTQ'], max_puntos)
+        fig.add_trace(Traza(
+            x=x,
+            y=y,
             name='RUITOQUE',
             line=dict(color='#64B43F', width=3),
             mode='lines+markers',
@@ -147,13 +228,7 @@ def crear_grafico_comparacion_multiple(resultados_comparacion: dict, periodo_ini
         ))
 
         # Agregar línea para cada comercializador
-        for idx, (comercializador, df_resultado) in enumerate(resultados_comparacion.items()):
-            df_plot = df_resultado.copy()
-            if periodo_inicio and periodo_fin:
-                df_plot = df_plot[
-                    (df_plot['FECHA'] >= periodo_inicio) & 
-                    (df_plot['FECHA'] <= periodo_fin)
-                ]
+        for idx, (comercializador, df_plot) in enumerate(filtrados.items()):
             
             if df_plot.empty:
                 continue
@@ -165,9 +240,10 @@ def crear_grafico_comparacion_multiple(resultados_comparacion: dict, periodo_ini
             color = colores_comercializadores[idx % len(colores_comercializadores)]
             
             # Agregar línea para el comercializador
-            fig.add_trace(go.Scatter(
-                x=df_plot['FECHA'],
-                y=df_plot[col_com],
+            x, y = _reducir_serie(df_plot['FECHA'], df_plot[col_com], max_puntos)
+            fig.add_trace(Traza(
+                x=x,
+                y=y,
                 name=comercializador,
                 line=dict(color=color, width=2),
                 mode='lines+markers',
@@ -202,4 +278,43 @@ def crear_grafico_comparacion_multiple(resultados_comparacion: dict, periodo_ini
         
     except Exception as e:
         print(f"Error al crear el gráfico múltiple: {str(e)}")
-        return None 
\ No newline at end of file
+        return None 
+
+
+def obtener_grafico_comparacion_multiple(
+    clave: Optional[ClaveGrafico],
+    resultados_comparacion: dict,
+    periodo_inicio: str = None,
+    periodo_fin: str = None,
+    indices_periodos: Optional[dict] = None
+) -> Optional[go.Figure]:
+    """
+    Obtiene la figura de `crear_grafico_comparacion_multiple()` desde el caché o la construye.
+    
+    Las figuras se comparten entre sesiones y reejecuciones: son de solo lectura.
+    
+    Args:
+        clave: Clave de la figura (comparación y ventana); None para no usar el caché.
+        resultados_comparacion: Diccionario con DataFrames de resultados por comercializador.
+        periodo_inicio: Periodo de inicio para filtrar (opcional)
+        periodo_fin: Periodo final para filtrar (opcional)
+        indices_periodos: Diccionario con el `IndicePeriodos` de cada comercializador (opcional)
+    
+    Returns:
+        Figura de Plotly o None si hay error.
+    """
+    if clave is not None:
+        entrada = cache_graficos.obtener(clave)
+        if entrada is not None:
+            return entrada.datos
+
+    fig = crear_grafico_comparacion_multiple(
+        resultados_comparacion, periodo_inicio, periodo_fin, indices_periodos=indices_periodos
+    )
+    if fig is not None and clave is not None:
+        cache_graficos.guardar(clave, fig, None, tamano_bytes=_tamano_figura(fig))
+    return fig
+
+
+# Instancia única por proceso, compartida por todas las sesiones (ver `cache_resultados`)
+cache_graficos = CacheResultados(CACHE_CONFIG['graficos_max_bytes'])